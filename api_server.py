@@ -8,12 +8,16 @@ from dotenv import load_dotenv
 from src.agents.betting_agent import BettingAgent
 from src.services.llm_service import LLMService
 from src.models.bet_history import BetHistory
+from src.models.records import Opportunity
 
 load_dotenv()
 
 # Inicializa serviço LLM
 llm_service = LLMService()
 
+# Oportunidades decodificadas do snapshot quando a mensagem não cita jogo/competição
+CONTEXT_TOP_OPPORTUNITIES = 10
+
 app = FastAPI(title="Value Betting API")
 
 
@@ -77,14 +81,26 @@ def _needs_context(message: str) -> bool:
     return any(k in m for k in opportunity_keywords)
 
 
-def _build_context(bankroll: float) -> Dict:
-    """Constrói contexto inteligente para o LLM usando APENAS cache"""
+def _mentioned(name: str, message: str) -> bool:
+    """Nome (time/competição) citado na mensagem (jogo "Casa x Fora": basta um dos times)"""
+    parts = [part.strip().lower() for part in str(name).replace(' vs ', ' x ').split(' x ')]
+    return any(len(part) >= 3 and part in message for part in parts)
+
+
+def _build_context(bankroll: float, message: str = "") -> Dict:
+    """
+    Constrói contexto inteligente para o LLM usando APENAS cache
+
+    Consulta o índice do snapshot do dia: jogos/competições citados na mensagem
+    são buscados direto no índice; sem citação, só as melhores oportunidades
+    (CONTEXT_TOP_OPPORTUNITIES) são decodificadas.
+    """
     from src.utils.daily_cache import DailyCache
     
     # 📦 USA APENAS O CACHE - NUNCA RECALCULA
-    cached_data = DailyCache.load_today_data()
+    summary = DailyCache.index_summary()
     
-    if not cached_data:
+    if not summary:
         print("   ⚠️ Sem cache disponível - retornando vazio")
         return {
             'date': datetime.now().strftime('%d/%m/%Y'),
@@ -97,7 +113,25 @@ def _build_context(bankroll: float) -> Dict:
             'min_ev': 8.0
         }
     
-    opportunities = cached_data['opportunities']
+    # Só registros com preço entram (análises de tênis não têm mercado/odd/EV)
+    message = message.lower()
+    opportunities = [
+        opp
+        for match in summary['matches'] if match and _mentioned(match, message)
+        for opp in DailyCache.find_opportunities(match=match) if Opportunity.is_priced(opp)
+    ]
+    if not opportunities:
+        opportunities = [
+            opp
+            for competition in summary['competitions']
+            if competition and competition != 'N/A' and competition.lower() in message
+            for opp in DailyCache.find_opportunities(competition=competition) if Opportunity.is_priced(opp)
+        ]
+    if not opportunities:
+        opportunities = [
+            opp for opp in DailyCache.top_opportunities(CONTEXT_TOP_OPPORTUNITIES) if Opportunity.is_priced(opp)
+        ]
+    opportunities.sort(key=lambda x: x.get('ev', 0), reverse=True)
     
     # Organiza oportunidades por jogo
     games = {}
@@ -106,8 +140,8 @@ def _build_context(bankroll: float) -> Dict:
         if match_key not in games:
             games[match_key] = {
                 'match': opp['match'],
-                'competition': opp['competition'],
-                'date': opp['date'],
+                'competition': opp.get('competition', 'N/A'),
+                'date': opp.get('date', ''),
                 'opportunities': []
             }
         games[match_key]['opportunities'].append(opp)
@@ -118,8 +152,8 @@ def _build_context(bankroll: float) -> Dict:
     
     return {
         'date': datetime.now().strftime('%d/%m/%Y'),
-        'total_opportunities': len(opportunities),
-        'total_games': len(games),
+        'total_opportunities': summary['opportunities_count'],
+        'total_games': summary['matches_count'],
         'opportunities': opportunities,
         'games': list(games.values()),
         'phase': phase_info['phase'],
@@ -148,6 +182,7 @@ def get_opportunities(request: OpportunitiesRequest):
             "opportunities": opportunities,
             "multiples": multiples,
             "count": len(opportunities),
+            "trace": agent.finish_trace(),
         }
     except Exception as e:
         import traceback
@@ -156,6 +191,24 @@ def get_opportunities(request: OpportunitiesRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/arbitrage")
+def get_arbitrage(total_stake: float = 100.0, min_profit: float = 0.0):
+    """Retorna surebets entre casas nas ligas prioritárias (janela de kickoff do pipeline)"""
+    try:
+        agent = BettingAgent(100)
+        surebets = agent.find_arbitrages(total_stake, min_profit)
+
+        return {
+            "surebets": surebets,
+            "count": len(surebets),
+        }
+    except Exception as e:
+        import traceback
+        error_detail = traceback.format_exc()
+        print(f"\n❌ ERRO NO ARBITRAGE:\n{error_detail}\n")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/statistics")
 def get_statistics():
     """Retorna estatísticas"""
@@ -209,14 +262,14 @@ def chat(request: ChatRequest):
     context = None
     if needs_ctx:
         print(f"   🔍 Detectado pedido de oportunidades - construindo contexto...")
-        context = _build_context(bankroll=100.0)
+        context = _build_context(bankroll=100.0, message=request.message)
         print(f"   📊 Contexto: {context['total_opportunities']} oportunidades em {context['total_games']} jogos")
         
         # Formata contexto para o LLM
         llm_context = {
             'bankroll': context['bankroll'],
             'phase': context['phase'],
-            'opportunities': context['opportunities'],
+            'opportunities': [Opportunity.from_dict(opp).to_context() for opp in context['opportunities']],
             'stats': {}  # Pode adicionar stats se tiver
         }
     else:
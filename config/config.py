@@ -45,6 +45,21 @@ class Config:
     FOOTBALL_API_BASE_URL = os.getenv('FOOTBALL_API_BASE_URL')
     ODDS_API_KEY = os.getenv('ODDS_API_KEY')
     ODDS_API_BASE_URL = os.getenv('ODDS_API_BASE_URL')
+    ODDS_MAX_WORKERS = int(os.getenv('ODDS_MAX_WORKERS', 8))  # Ligas buscadas em paralelo (1 = sequencial)
+    ODDS_REGIONS = os.getenv('ODDS_REGIONS', 'us,uk,eu')
+    ODDS_MARKETS = os.getenv('ODDS_MARKETS', 'h2h,totals,spreads')
+    ODDS_WINDOW_HOURS = int(os.getenv('ODDS_WINDOW_HOURS', 12))  # Só jogos com kickoff nas próximas N horas
+    # Início da janela alinhado a blocos de N horas: a chave de cache dura o bloco inteiro
+    # (precisa ser maior que CACHE_SOFT_TTL_ODDS para o stale-while-revalidate valer)
+    ODDS_WINDOW_ALIGN_HOURS = int(os.getenv('ODDS_WINDOW_ALIGN_HOURS', 6))
+    
+    # Planejador de créditos: orçamento diário (0 = cota restante / dias restantes do mês)
+    # e decaimento do histórico de rendimento por liga
+    ODDS_DAILY_BUDGET = int(os.getenv('ODDS_DAILY_BUDGET', 0))
+    ODDS_PLANNER_DECAY = float(os.getenv('ODDS_PLANNER_DECAY', 0.9))
+    
+    # Stats dos times buscadas em paralelo (1 = sequencial)
+    STATS_MAX_WORKERS = int(os.getenv('STATS_MAX_WORKERS', 8))
     
     # API-Football (api-sports.io)
     API_FOOTBALL_KEY = os.getenv('API_FOOTBALL_KEY')
@@ -70,3 +85,55 @@ class Config:
     
     # RapidAPI Tennis
     RAPIDAPI_TENNIS_KEY = os.getenv('RAPIDAPI_TENNIS_KEY')
+    
+    # Cache em memória na frente do Redis (máximo de chaves, LRU)
+    MEMORY_CACHE_MAX_ENTRIES = int(os.getenv('MEMORY_CACHE_MAX_ENTRIES', 2048))
+    
+    # Cache local quando o Redis não responde (sqlite | none)
+    CACHE_FALLBACK = os.getenv('CACHE_FALLBACK', 'sqlite')
+    CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', 'cache/cache.sqlite3')
+    CACHE_REDIS_RETRY_SECONDS = int(os.getenv('CACHE_REDIS_RETRY_SECONDS', 60))  # Redis caiu: testa de novo a cada N s
+    
+    # Single-flight: lease de busca por chave e espera máxima de quem aguarda (segundos)
+    CACHE_LEASE_SECONDS = int(os.getenv('CACHE_LEASE_SECONDS', 60))
+    CACHE_WAIT_TIMEOUT = float(os.getenv('CACHE_WAIT_TIMEOUT', 30))
+    
+    # Stale-while-revalidate: após o soft TTL o valor é servido e atualizado em segundo plano
+    CACHE_SOFT_TTL_ODDS = int(os.getenv('CACHE_SOFT_TTL_ODDS', 7200))          # TTL máximo 12h
+    CACHE_SOFT_TTL_FIXTURES = int(os.getenv('CACHE_SOFT_TTL_FIXTURES', 3600))  # TTL máximo 6h
+    CACHE_SOFT_TTL_STATS = int(os.getenv('CACHE_SOFT_TTL_STATS', 21600))       # TTL máximo 24h
+    CACHE_REFRESH_WORKERS = int(os.getenv('CACHE_REFRESH_WORKERS', 2))
+    
+    # Cache diário incremental: validade de cada liga = fração do tempo até o próximo kickoff
+    DAILY_CACHE_TTL_FRACTION = float(os.getenv('DAILY_CACHE_TTL_FRACTION', 0.25))
+    DAILY_CACHE_MIN_TTL = int(os.getenv('DAILY_CACHE_MIN_TTL', 600))      # 10 min
+    DAILY_CACHE_MAX_TTL = int(os.getenv('DAILY_CACHE_MAX_TTL', 21600))    # 6h
+    # Liga cortada pelo planejador de créditos ou com erro na busca: espera antes de tentar de novo
+    DAILY_CACHE_BACKOFF_TTL = int(os.getenv('DAILY_CACHE_BACKOFF_TTL', 1800))  # 30 min
+    
+    # Espera máxima por uma análise em andamento; depois serve o último snapshot (segundos)
+    PIPELINE_WAIT_TIMEOUT = float(os.getenv('PIPELINE_WAIT_TIMEOUT', 5))
+    
+    # Histórico de odds (movimento de linha por casa) em SQLite local
+    ODDS_HISTORY_ENABLED = os.getenv('ODDS_HISTORY_ENABLED', 'True') == 'True'
+    ODDS_HISTORY_PATH = os.getenv('ODDS_HISTORY_PATH', 'cache/odds_history.sqlite3')
+    
+    # Aliases de times aprendidos no matching (TeamAliasStore)
+    TEAM_ALIASES_FILE = os.getenv('TEAM_ALIASES_FILE', 'cache/team_aliases.json')
+    
+    # Consenso entre casas: preço > X acima do justo (sem margem) = provável linha parada
+    ODDS_OUTLIER_EDGE = float(os.getenv('ODDS_OUTLIER_EDGE', 0.10))
+    ODDS_CONSENSUS_MIN_BOOKS = int(os.getenv('ODDS_CONSENSUS_MIN_BOOKS', 3))
+    
+    # Serialização do cache (msgpack/json; compressão zstd/zlib/none acima de N bytes)
+    CACHE_CODEC = os.getenv('CACHE_CODEC', 'msgpack')
+    CACHE_COMPRESSION = os.getenv('CACHE_COMPRESSION', 'zstd')
+    CACHE_COMPRESS_MIN_BYTES = int(os.getenv('CACHE_COMPRESS_MIN_BYTES', 1024))
+    
+    # Instrumentação (spans por etapa, chamadas HTTP, cache hit/miss) - desligada por padrão
+    TRACE_ENABLED = os.getenv('TRACE_ENABLED', 'False') == 'True'
+    TRACE_FILE = os.getenv('TRACE_FILE', 'logs/traces.jsonl')
+    
+    # Logs (DEBUG mostra os detalhes por jogo/mercado; json = uma linha JSON por evento)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
@@ -1,18 +1,29 @@
 from src.models.bankroll_manager import BankrollManager
 from src.models.probability_model import ProbabilityModel
+from src.models.score_matrix import ScoreMatrix
 from src.models.bet_history import BetHistory
 from src.models.risk_manager import RiskManager
 from src.models.advanced_stats import AdvancedStats
+from src.models.records import Event, Opportunity, OpportunityFrame
 from src.services.football_api import FootballAPI
 from src.services.api_football_service import APIFootballService
 from src.utils.daily_cache import DailyCache
-from src.services.team_matcher import TeamMatcher
+from src.services.team_matcher import TeamMatcher, TeamAliasStore
 from src.services.odds_api import OddsAPI
 from src.utils.rejection_logger import RejectionLogger
 from src.utils.validators import OpportunityValidator
 from src.utils.reporter import Reporter
 from src.utils.multiple_detector import MultipleDetector
-from typing import List, Dict
+from src.utils.arbitrage_scanner import ArbitrageScanner
+from src.utils.instrumentation import start_trace, use_trace, span, bind, record_cache
+from src.utils.logger import get_logger
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+import logging
+import threading
+import numpy as np
+
+logger = get_logger(__name__)
 
 class BettingAgent:
     """Agente principal que orquestra análises e sugestões"""
@@ -41,6 +52,8 @@ class BettingAgent:
         'soccer_brazil_campeonato': 'BSA',    # Brasileirão
     }
 
+    _pipeline_lock = threading.Lock()
+
     def __init__(self, current_bankroll: float):
         """Inicializa o agente com a banca atual"""
         from src.models.bankroll_manager import BankrollManager
@@ -53,113 +66,188 @@ class BettingAgent:
         self.bet_history = BetHistory()
         self.risk_manager = RiskManager(current_bankroll, self.bankroll_manager.phase)
         self.rejection_logger = RejectionLogger()
+        self.trace = None  # Trace da última análise (instrumentação)
 
     def analyze_today_opportunities(self) -> List[Dict]:
         """Analisa todas oportunidades do dia usando The Odds API + API-Football"""
         from config.config import Config
         
-        print("🔍 Buscando oportunidades de hoje...")
+        self.trace = start_trace('opportunities')
         
-        # 🎯 VERIFICA CACHE DIÁRIO PRIMEIRO
-        cached_data = DailyCache.load_today_data()
-        if cached_data:  # ✅ CACHE REATIVADO
-            print(f"   ✅ Já buscamos hoje! ({cached_data['matches_count']} jogos, {cached_data['leagues_count']} ligas)")
-            print(f"   ✅ {len(cached_data['opportunities'])} oportunidades em cache")
-            return cached_data['opportunities']
+        # Cache diário em dia: leitura do snapshot, sem esperar análise nenhuma
+        state = DailyCache.load_state()
+        if not self._refresh_due(state):
+            with use_trace(self.trace):
+                return self._cached_opportunities(state)
         
-        print("   🆕 Primeira busca do dia - consultando APIs...")
+        # Single-flight no processo: requisições simultâneas esperam a análise em
+        # andamento por até PIPELINE_WAIT_TIMEOUT; depois servem o último snapshot
+        with use_trace(self.trace), span('wait_pipeline'):
+            acquired = self._pipeline_lock.acquire(timeout=Config.PIPELINE_WAIT_TIMEOUT)
         
-        # 1. Busca jogos da API-Football (para ter IDs e stats)
-        print("📊 Buscando jogos da API-Football...")
-        api_football_matches = self.api_football.get_fixtures_next_days(1)  # Apenas hoje
-        print(f"   ✅ {len(api_football_matches)} jogos encontrados (API-Football)")
+        if not acquired:
+            logger.warning("⏳ Análise em andamento há mais de %gs - servindo o último snapshot",
+                           Config.PIPELINE_WAIT_TIMEOUT)
+            with use_trace(self.trace):
+                return self._cached_opportunities(DailyCache.load_state())
         
-        # 2. Busca odds da The Odds API (ligas prioritárias)
-        print(f"💰 Buscando odds das {len(self.PRIORITY_LEAGUES)} ligas prioritárias...")
-        print(f"   📋 Ligas: Championship, Premier, La Liga, Bundesliga, Brasileirão, Serie A, Portugal, Bundesliga 2")
-        
-        all_matches_with_odds = []
-        leagues_found = 0
-        
-        for sport in self.PRIORITY_LEAGUES:
-            try:
-                matches = self.odds_api.get_odds_for_match(sport)
-                if matches:
-                    all_matches_with_odds.extend(matches)
-                    leagues_found += 1
-            except Exception as e:
-                print(f"   ⚠️ Erro ao buscar {sport}: {e}")
-                continue
+        try:
+            with use_trace(self.trace):
+                return self._analyze_today_opportunities()
+        finally:
+            self._pipeline_lock.release()
+    
+    def _refresh_due(self, state: Dict) -> bool:
+        """Alguma liga (ou o tênis) com validade vencida no snapshot?"""
+        return bool(DailyCache.due_leagues(state, self.PRIORITY_LEAGUES)) or DailyCache.extra_due(state, 'tennis')
+    
+    @staticmethod
+    def _cached_opportunities(state: Dict) -> List[Dict]:
+        """Oportunidades do snapshot do dia (sem consultar APIs)"""
+        record_cache('daily_cache', True)
+        opportunities = DailyCache.opportunities(state)
+        print(f"   ✅ Cache diário em dia ({len(state['matches'])} jogos, {len(state['leagues'])} ligas)")
+        print(f"   ✅ {len(opportunities)} oportunidades em cache")
+        return opportunities
+    
+    def finish_trace(self) -> Optional[Dict]:
+        """Fecha o trace da última análise (grava em TRACE_FILE) e retorna o resumo"""
+        return self.trace.finish() if self.trace else None
+    
+    def _analyze_today_opportunities(self) -> List[Dict]:
+        from config.config import Config
         
-        print(f"   ✅ {leagues_found} ligas carregadas")
-        print(f"   ✅ {len(all_matches_with_odds)} jogos com odds disponíveis")
-
-        # FILTRO: Remove jogos que não são de hoje/amanhã
-        from datetime import datetime, timedelta
-        today = datetime.now()
-        max_date = today + timedelta(hours=12)
-        
-        filtered_matches = []
-        for match in all_matches_with_odds:
-            try:
-                game_time_str = match.get('commence_time', '')
-                if game_time_str:
-                    # Parse da data
-                    game_time = datetime.fromisoformat(game_time_str.replace('Z', '+00:00'))
-                    game_time = game_time.replace(tzinfo=None)
-                    
-                    # Filtra jogos nas próximas 48h
-                    if game_time <= max_date:
-                        filtered_matches.append(match)
-            except:
-                continue
+        print("🔍 Buscando oportunidades de hoje...")
         
-        all_matches_with_odds = filtered_matches
-        print(f"   🗓️  Filtrado: {len(all_matches_with_odds)} jogos nas próximas 12h")
+        # 🎯 CACHE DIÁRIO INCREMENTAL: só ligas com validade vencida vão para a API
+        state = DailyCache.load_state()
+        due_leagues = DailyCache.due_leagues(state, self.PRIORITY_LEAGUES)
+        tennis_due = DailyCache.extra_due(state, 'tennis')
         
-        if not all_matches_with_odds:
-            if Config.ENVIRONMENT == 'production':
-                print("❌ ERRO: Nenhum jogo com odds encontrado e sistema está em PRODUÇÃO")
-                return []
+        if not due_leagues and not tennis_due:
+            # Outra requisição atualizou o snapshot enquanto esta esperava
+            return self._cached_opportunities(state)
+        
+        record_cache('daily_cache', not due_leagues)
+        
+        if due_leagues:
+            # Ligas já no snapshot estão vencidas: ignoram o cache de odds (linhas novas)
+            expired = [sport for sport in due_leagues if state['leagues'].get(sport, {}).get('fetched_at')]
+            
+            if state['leagues']:
+                print(f"   🔄 Atualizando {len(due_leagues)}/{len(self.PRIORITY_LEAGUES)} ligas (validade vencida)")
             else:
-                print("⚠️  Nenhum jogo encontrado. Usando dados simulados (DEVELOPMENT)...")
-                from src.utils.mock_data import get_mock_matches, get_mock_odds
-                matches = get_mock_matches()
-                odds_data = get_mock_odds()
-                # Processa dados simulados (fallback antigo)
-                opportunities = []
-                phase_info = self.bankroll_manager.get_phase_info()
-                for match in matches:
-                    match_odds = self._find_match_odds(match, odds_data)
-                    if not match_odds:
-                        continue
-                    home_stats, away_stats = self._get_real_team_stats(match)
-                    opps = self._analyze_match_markets(match, match_odds, phase_info, home_stats, away_stats)
-                    opportunities.extend(opps)
-                opportunities = self._validate_opportunities(opportunities, phase_info)
-                opportunities.sort(key=lambda x: x['ev'], reverse=True)
-                return opportunities
-        
-        # 3. Faz matching entre The Odds API e API-Football
+                print("   🆕 Primeira busca do dia - consultando APIs...")
+            
+            # 1. Busca odds da The Odds API (só ligas vencidas, só jogos da janela)
+            window_hours = Config.ODDS_WINDOW_HOURS
+            print(f"💰 Buscando odds de {len(due_leagues)} ligas (jogos nas próximas {window_hours}h)...")
+            
+            with span('odds', leagues=len(due_leagues)):
+                league_odds = self._fetch_leagues_odds(
+                    due_leagues, refresh=expired, window=OddsAPI.commence_window(window_hours)
+                )
+            
+            # Ligas cortadas pelo planejador ou com erro: back-off curto, senão seguem vencidas
+            # e toda requisição refaz o pipeline (e volta a pedir créditos)
+            skipped = [sport for sport in due_leagues if sport not in league_odds]
+            for sport in skipped:
+                DailyCache.defer_league(state, sport, Config.DAILY_CACHE_BACKOFF_TTL)
+            if skipped:
+                logger.info("⏸️  %d ligas sem odds nesta rodada (orçamento/erro), nova tentativa em %ds: %s",
+                            len(skipped), Config.DAILY_CACHE_BACKOFF_TTL, ", ".join(skipped))
+            
+            window_count = sum(len(matches) for matches in league_odds.values())
+            
+            # Jogos fora da janela não aparecem na resposta: a validade da liga também
+            # é limitada pela janela, para jogos novos entrarem a tempo
+            max_ttl = int(window_hours * 3600 * Config.DAILY_CACHE_TTL_FRACTION)
+            
+            print(f"   ✅ {sum(1 for matches in league_odds.values() if matches)} ligas carregadas")
+            print(f"   ✅ {window_count} jogos com odds disponíveis")
+            
+            # Surebets entre casas nas ligas recém-buscadas (1 passada vetorizada, sem custo de API)
+            with span('arbitrage'):
+                surebets = ArbitrageScanner.scan([m for matches in league_odds.values() for m in matches])
+            if surebets:
+                logger.info("💱 %d surebets nas ligas atualizadas (melhor: %s %s, +%.2f%%)",
+                            len(surebets), surebets[0]['match'], surebets[0]['market'], surebets[0]['profit_pct'])
+            
+            if not window_count and not state['matches']:
+                if Config.ENVIRONMENT == 'production':
+                    print("❌ ERRO: Nenhum jogo com odds encontrado e sistema está em PRODUÇÃO")
+                    # Ligas sem jogos na janela também deixam de ficar vencidas
+                    for sport, matches in league_odds.items():
+                        DailyCache.update_league(state, sport, matches, [], max_ttl=max_ttl)
+                    DailyCache.save_state(state)
+                    return []
+                else:
+                    print("⚠️  Nenhum jogo encontrado. Usando dados simulados (DEVELOPMENT)...")
+                    return self._analyze_mock_matches()
+            
+            # 2. Só jogos novos ou com odds alteradas (hash do conteúdo) são reanalisados
+            changed = [
+                match
+                for matches in league_odds.values()
+                for match in DailyCache.changed_matches(state, matches)
+            ]
+            print(f"   🔁 {len(changed)}/{window_count} jogos com odds novas ou alteradas")
+            
+            opportunities = self._analyze_matches(changed) if changed else []
+            
+            for sport, matches in league_odds.items():
+                DailyCache.update_league(state, sport, matches, opportunities, max_ttl=max_ttl)
+                # Rendimento da liga alimenta a prioridade no planejador de créditos
+                self.odds_api.planner.record_yield(sport, DailyCache.league_opportunities(state, sport))
+        
+        if tennis_due:
+            # Analisa Tênis
+            print("\n🎾 Analisando oportunidades de Tênis...")
+            with span('tennis'):
+                tennis_opps = self.analyze_tennis_opportunities()
+            if tennis_opps:
+                print(f"   ✅ {len(tennis_opps)} oportunidades de tênis adicionadas")
+            DailyCache.set_extra(state, 'tennis', tennis_opps, Config.DAILY_CACHE_MIN_TTL)
+        
+        # 🎯 SALVA NO CACHE DIÁRIO
+        DailyCache.save_state(state)
+        
+        # Ordena por EV
+        return DailyCache.opportunities(state)
+
+    def _analyze_matches(self, matches_with_odds: List[Dict]) -> List[Dict]:
+        """Matching com a API-Football, stats, análise e validação de um conjunto de jogos com odds"""
+        # 3. Busca jogos da API-Football (para ter IDs e stats)
+        print("📊 Buscando jogos da API-Football...")
+        with span('fixtures'):
+            api_football_matches = self.api_football.get_fixtures_next_days(1)  # Apenas hoje
+        print(f"   ✅ {len(api_football_matches)} jogos encontrados (API-Football)")
+        
+        # 4. Faz matching entre The Odds API e API-Football
         print(f"\n🔗 Fazendo matching entre APIs...")
         
-        opportunities = []
         phase_info = self.bankroll_manager.get_phase_info()
         
         matched_count = 0
         total_processed = 0
+        slate = []
         
-        for match_with_odds in all_matches_with_odds:
-            total_processed += 1
+        with span('matching', games=len(matches_with_odds)):
+            # Índice dos jogos da API-Football (montado uma vez para o slate todo)
+            fixture_index = TeamMatcher.build_index(api_football_matches)
             
-            # Tenta fazer match com API-Football
-            matched_game = TeamMatcher.match_teams(
-                match_with_odds['home_team'],
-                match_with_odds['away_team'],
-                api_football_matches,
-                odds_datetime=match_with_odds.get('commence_time'),
+            # Matching global do slate (cada jogo da API-Football usado uma única vez)
+            matched_games = fixture_index.match_slate(
+                [
+                    (m['home_team'], m['away_team'], m.get('commence_time'))
+                    for m in matches_with_odds
+                ],
                 threshold=0.6
             )
+            TeamAliasStore.save()
+        
+        for match_with_odds, matched_game in zip(matches_with_odds, matched_games):
+            total_processed += 1
             
             if matched_game:
                 matched_count += 1
@@ -176,10 +264,12 @@ class BettingAgent:
                     'league_id': matched_game.get('league_id')
                 }
                 
-                if total_processed <= 3:  # Debug dos primeiros 3
-                    print(f"   ✅ Match: {match_with_odds['home_team']} vs {match_with_odds['away_team']}")
-                    print(f"      → {matched_game.get('home_team')} vs {matched_game.get('away_team')}")
-                    print(f"      Score: {matched_game.get('match_score', 0):.2f} | IDs: {match['home_team_id']}, {match['away_team_id']}")
+                logger.debug(
+                    "✅ Match: %s vs %s → %s vs %s | Score: %.2f | IDs: %s, %s",
+                    match_with_odds['home_team'], match_with_odds['away_team'],
+                    matched_game.get('home_team'), matched_game.get('away_team'),
+                    matched_game.get('match_score', 0), match['home_team_id'], match['away_team_id']
+                )
             else:
                 # Sem match - usa dados da The Odds API sem IDs
                 match = {
@@ -192,45 +282,75 @@ class BettingAgent:
                     'league_id': None
                 }
                 
-                if total_processed <= 3:  # Debug dos primeiros 3
-                    print(f"   ❌ Sem match: {match_with_odds['home_team']} vs {match_with_odds['away_team']}")
+                logger.debug("❌ Sem match: %s vs %s", match_with_odds['home_team'], match_with_odds['away_team'])
             
-            # Busca estatísticas reais (vai usar APIs se tiver IDs, senão fallback)
-            home_stats, away_stats = self._get_real_team_stats(match)
-            
-            # Analisa mercados (match_with_odds já tem as odds)
-            opps = self._analyze_match_markets(match, match_with_odds, phase_info, home_stats, away_stats)
-            opportunities.extend(opps)
+            slate.append((match, match_with_odds))
+        
+        # 5. Busca estatísticas reais do slate inteiro (cada time uma única vez)
+        with span('stats'):
+            slate_stats = self._enrich_team_stats([match for match, _ in slate])
+        
+        # 6. Analisa mercados do slate inteiro (match_with_odds já tem as odds)
+        with span('analysis'):
+            opportunities = self._analyze_slate(
+                [
+                    (match, match_with_odds, home_stats, away_stats)
+                    for (match, match_with_odds), (home_stats, away_stats) in zip(slate, slate_stats)
+                ],
+                phase_info
+            )
         
         print(f"\n📊 RESULTADO DO MATCHING:")
         print(f"   ✅ {matched_count}/{total_processed} jogos com match ({matched_count/total_processed*100:.1f}%)")
         print(f"   ✅ {len(opportunities)} oportunidades encontradas (antes da validação)")
         
         # Valida oportunidades
-        opportunities = self._validate_opportunities(opportunities, phase_info)
+        with span('validation'):
+            opportunities = self._validate_opportunities(opportunities, phase_info)
         
         print(f"   ✅ {len(opportunities)} oportunidades validadas")
         
+        return opportunities
+
+    def _analyze_mock_matches(self) -> List[Dict]:
+        """Processa dados simulados (fallback de desenvolvimento, sem cache diário)"""
+        from src.utils.mock_data import get_mock_matches, get_mock_odds
+        matches = get_mock_matches()
+        odds_data = get_mock_odds()
         
-        # Analisa Tênis
-        print("\n🎾 Analisando oportunidades de Tênis...")
-        tennis_opps = self.analyze_tennis_opportunities()
-        if tennis_opps:
-            opportunities.extend(tennis_opps)
-            print(f"   ✅ {len(tennis_opps)} oportunidades de tênis adicionadas")
-        
-        # Ordena por EV
+        phase_info = self.bankroll_manager.get_phase_info()
+        games = []
+        for match in matches:
+            match_odds = self._find_match_odds(match, odds_data)
+            if not match_odds:
+                continue
+            home_stats, away_stats = self._get_real_team_stats(match)
+            games.append((match, match_odds, home_stats, away_stats))
+        opportunities = self._analyze_slate(games, phase_info)
+        opportunities = self._validate_opportunities(opportunities, phase_info)
         opportunities.sort(key=lambda x: x['ev'], reverse=True)
+        return opportunities
+
+    def _fetch_leagues_odds(self, leagues: List[str], refresh: List[str] = (),
+                            window: Optional[tuple] = None) -> Dict[str, List[Dict]]:
+        """
+        Busca odds de várias ligas (cache em lote + requests em paralelo, ver OddsAPI.get_odds_for_sports)
         
-        # 🎯 SALVA NO CACHE DIÁRIO
-        DailyCache.save_today_data(
-            opportunities=opportunities,
-            matches_count=total_processed,
-            leagues_count=leagues_found
-        )
+        Args:
+            refresh: ligas que ignoram o cache de odds (snapshot vencido → busca linhas novas)
+            window: (início, fim) do kickoff, ver OddsAPI.commence_window
         
-        return opportunities
-    
+        Returns:
+            {liga: jogos com odds} na ordem das ligas (ligas com erro ficam de fora)
+        """
+        cached_leagues = [sport for sport in leagues if sport not in refresh]
+        results = self.odds_api.get_odds_for_sports(cached_leagues, window=window) if cached_leagues else {}
+        if refresh:
+            results.update(self.odds_api.get_odds_for_sports(list(refresh), refresh=True, window=window))
+
+        # Ordem original das ligas (resultado determinístico)
+        return {sport: results[sport] for sport in leagues if sport in results}
+
     def _deduplicate_matches(self, matches: List[Dict]) -> List[Dict]:
         """Remove jogos duplicados (mesmo jogo de APIs diferentes)"""
         seen = set()
@@ -247,80 +367,93 @@ class BettingAgent:
                 unique.append(match)
         
         return unique
+    def find_arbitrages(self, total_stake: float = 100.0, min_profit_pct: float = 0.0) -> List[Dict]:
+        """
+        Surebets nas ligas prioritárias, ordenadas por retorno garantido
+        
+        Mesmas chaves de cache (janela de kickoff) do pipeline diário e mesmo
+        planejador de créditos: com o cache aquecido não gasta nada.
+        """
+        from config.config import Config
+        
+        with use_trace(self.trace), span('arbitrage'):
+            league_odds = self._fetch_leagues_odds(
+                self.PRIORITY_LEAGUES, window=OddsAPI.commence_window(Config.ODDS_WINDOW_HOURS)
+            )
+            games = [match for matches in league_odds.values() for match in matches]
+            return ArbitrageScanner.scan(games, total_stake, min_profit_pct)
+    
     def detect_multiples(self, opportunities: List[Dict]) -> List[Dict]:
         """Detecta múltiplas estratégicas"""
-        # Só sugere múltiplas em fase 1 e 2 (alavancagem agressiva)
-        phase = self.bankroll_manager.phase
-        
-        if phase not in [1, 2]:
+        with use_trace(self.trace), span('multiples'):
+            # Só sugere múltiplas em fase 1 e 2 (alavancagem agressiva)
+            phase = self.bankroll_manager.phase
+            
+            if phase not in [1, 2]:
+                return []
+            
+            # Detecta múltiplas
+            multiples = MultipleDetector.detect_multiples(
+                opportunities,
+                min_combined_prob=0.30,  # 30% probabilidade combinada mínima
+                max_legs=3  # Máximo 3 pernas
+            )
+            
+            # Calcula stakes para cada múltipla
+            formatted_multiples = []
+            for multiple in multiples[:3]:  # Top 3 múltiplas
+                # Stake mais agressivo para múltiplas (5-8% da banca)
+                stake_pct = 0.08 if phase == 1 else 0.05
+                stake = self.bankroll_manager.bankroll * stake_pct
+            
+                formatted = MultipleDetector.format_multiple(multiple, stake)
+                formatted_multiples.append(formatted)
+            
+            return formatted_multiples
+    
+    def _validate_opportunities(self, opportunities: List[Dict], phase_info: Dict) -> List[Dict]:
+        """Valida oportunidades antes de sugerir (lote único: regras + limite diário de risco)"""
+        if not opportunities:
             return []
         
-        # Detecta múltiplas
-        multiples = MultipleDetector.detect_multiples(
-            opportunities,
-            min_combined_prob=0.30,  # 30% probabilidade combinada mínima
-            max_legs=3  # Máximo 3 pernas
-        )
+        bankroll = self.bankroll_manager.bankroll
+        frame = OpportunityFrame.from_dicts(opportunities)
         
-        # Calcula stakes para cada múltipla
-        formatted_multiples = []
-        for multiple in multiples[:3]:  # Top 3 múltiplas
-            # Stake mais agressivo para múltiplas (5-8% da banca)
-            stake_pct = 0.08 if phase == 1 else 0.05
-            stake = self.bankroll_manager.bankroll * stake_pct
-            
-            formatted = MultipleDetector.format_multiple(multiple, stake)
-            formatted_multiples.append(formatted)
+        valid, reasons = OpportunityValidator.validate_frame(frame, phase_info, bankroll)
+        within_limit = self.risk_manager.daily_limit_mask(frame.stake)
+        reasons |= np.where(within_limit, 0, OpportunityValidator.DAILY_LIMIT).astype(np.uint8)
+        accepted = valid & within_limit
         
-        return formatted_multiples
-    
-    def _validate_opportunities(self, opportunities: List[Dict], phase_info: Dict) -> List[Dict]:
-        """Valida oportunidades antes de sugerir"""
-        validated = []
-        
-        for opp in opportunities:
-            is_valid, errors = OpportunityValidator.validate_opportunity(
-                opp, 
-                phase_info, 
-                self.bankroll_manager.bankroll
-            )
-            
-            if is_valid:
-                # Verifica limites de risco
-                can_bet, msg = self.risk_manager.check_daily_limit(opp['stake'])
-                if can_bet:
-                    validated.append(opp)
-                else:
-                    print(f"⚠️  Rejeitado: {opp['match']} - {msg}")
-            else:
-                print(f"⚠️  Rejeitado: {opp['match']} - {errors[0]}")
+        rejected = len(opportunities) - int(accepted.sum())
+        if rejected:
+            logger.info("⚠️  %d oportunidades rejeitadas na validação: %s",
+                        rejected, OpportunityValidator.count_reasons(reasons))
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            for i in np.flatnonzero(~accepted):
+                opp = opportunities[i]
+                logger.debug("⚠️  Rejeitado: %s - %s", opp['match'], "; ".join(
+                    OpportunityValidator.describe(int(reasons[i]), opp, phase_info, bankroll)
+                ))
         
-        return validated
+        return [opp for opp, ok in zip(opportunities, accepted) if ok]
     
     def _find_match_odds(self, match: Dict, odds_data: List[Dict]) -> Dict:
         """Encontra odds para o jogo específico"""
-        # DEBUG: Mostra apenas os primeiros 3 matchings
-        if not hasattr(self, '_match_debug_count'):
-            self._match_debug_count = 0
-        
-        if self._match_debug_count < 3:
-            print(f"\n🔍 Tentando matchear: {match['home_team']} vs {match['away_team']}")
-            self._match_debug_count += 1
+        logger.debug("🔍 Tentando matchear: %s vs %s", match['home_team'], match['away_team'])
         
         for odds in odds_data:
             home_match = odds['home_team'].lower() in match['home_team'].lower()
             away_match = odds['away_team'].lower() in match['away_team'].lower()
             
-            if self._match_debug_count <= 3 and (home_match or away_match):
-                print(f"   🎯 Candidato: {odds['home_team']} vs {odds['away_team']}")
-                print(f"      Home match: {home_match} | Away match: {away_match}")
-            
             if home_match or away_match:
+                logger.debug("🎯 Candidato: %s vs %s | Home match: %s | Away match: %s",
+                             odds['home_team'], odds['away_team'], home_match, away_match)
                 return odds
         
-        if self._match_debug_count <= 3:
-            print(f"   ❌ Nenhuma odd encontrada para este jogo")
-            print(f"   📋 Exemplo de odd disponível: {odds_data[0]['home_team']} vs {odds_data[0]['away_team']}")
+        if odds_data:
+            logger.debug("❌ Nenhuma odd encontrada | Exemplo disponível: %s vs %s",
+                         odds_data[0]['home_team'], odds_data[0]['away_team'])
         
         return {}
     
@@ -329,32 +462,101 @@ class BettingAgent:
         Busca estatísticas reais dos times via Football-Data API
         Retorna (home_stats, away_stats) com stats de CASA e FORA
         """
-        print(f"\n🔎 Buscando stats reais: {match.get('home_team')} vs {match.get('away_team')}")
-        
+        return self._enrich_team_stats([match])[0]
+
+    def _competition_code(self, match: Dict) -> str:
+        """Mapeia liga do jogo (The Odds API) para código Football-Data"""
+        league = match.get('league', 'soccer_epl')  # Liga do jogo
+        return self.LEAGUE_MAPPING.get(league, 'PL')
+
+    def _enrich_team_stats(self, matches: List[Dict]) -> List[tuple]:
+        """
+        Busca estatísticas reais de todos os jogos do slate em lote
+
+        Coleta os pares únicos (time, competição) e resolve IDs e stats por
+        venue em paralelo, buscando cada time uma única vez (times repetidos
+        em vários jogos/casas de aposta não geram novas chamadas).
+
+        Returns:
+            Lista de (home_stats, away_stats) alinhada com matches
+        """
+        from config.config import Config
+
+        # 1. Pares únicos (time, competição) - mantém ordem de aparição
+        pairs = list(dict.fromkeys(
+            (team_name, self._competition_code(match))
+            for match in matches
+            for team_name in (match.get('home_team'), match.get('away_team'))
+        ))
+
+        if not pairs:
+            return []
+
+        # Elencos e tabelas das competições do slate: 1 round-trip ao cache
+        self.football_api.prefetch_competitions([code for _, code in pairs], season=2025)
+
+        max_workers = max(1, min(len(pairs), Config.STATS_MAX_WORKERS))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 2. IDs dos times no Football-Data
+            team_ids = dict(zip(pairs, executor.map(
+                bind(lambda pair: self._safe_call(self.football_api.get_team_id_by_name, *pair)),
+                pairs
+            )))
+
+            # 3. Stats separadas por venue (casa/fora), uma vez por time
+            # (tabela da liga: 1 request por competição, compartilhada entre os times)
+            unique_teams = list(dict.fromkeys(
+                (team_id, code) for (_, code), team_id in team_ids.items() if team_id
+            ))
+            venue_stats = dict(zip((team_id for team_id, _ in unique_teams), executor.map(
+                bind(lambda team: self._safe_call(
+                    self.football_api.get_team_stats_by_venue, team[0], season=2025, competition_code=team[1]
+                )),
+                unique_teams
+            )))
+
+        results = []
+        for match in matches:
+            code = self._competition_code(match)
+            home_team_id = team_ids.get((match.get('home_team'), code))
+            away_team_id = team_ids.get((match.get('away_team'), code))
+
+            results.append(self._build_team_stats(
+                match,
+                code,
+                home_team_id,
+                away_team_id,
+                venue_stats.get(home_team_id),
+                venue_stats.get(away_team_id)
+            ))
+
+        return results
+
+    @staticmethod
+    def _safe_call(func, *args, **kwargs):
+        """Executa chamada de API sem derrubar o lote inteiro em caso de erro"""
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.warning("⚠️ Erro em %s%s: %s", func.__name__, args, e)
+            return None
+
+    def _build_team_stats(self, match: Dict, competition_code: str,
+                          home_team_id, away_team_id,
+                          home_stats_data: Dict, away_stats_data: Dict) -> tuple:
+        """Monta (home_stats, away_stats) ajustados a partir dos dados já buscados"""
         home_team_name = match.get('home_team')
         away_team_name = match.get('away_team')
-        league = match.get('league', 'soccer_epl')  # Liga do jogo
-        
-        # Mapeia liga para código Football-Data
-        competition_code = self.LEAGUE_MAPPING.get(league, 'PL')
-        print(f"   📍 Liga: {league} → {competition_code}")
-        
-        # Busca IDs dos times no Football-Data
-        home_team_id = self.football_api.get_team_id_by_name(home_team_name, competition_code)
-        away_team_id = self.football_api.get_team_id_by_name(away_team_name, competition_code)
-        
+
         if not home_team_id or not away_team_id:
-            print(f"   ❌ IDs não encontrados em {competition_code}!")
+            logger.info("❌ %s vs %s: IDs não encontrados em %s (liga %s)",
+                        home_team_name, away_team_name, competition_code, match.get('league', 'soccer_epl'))
             return None, None
         
-        print(f"   ✅ IDs encontrados: {home_team_id}, {away_team_id}")
-        
-        # Busca stats separadas por venue (casa/fora)
-        home_stats_data = self.football_api.get_team_stats_by_venue(home_team_id, season=2025)
-        away_stats_data = self.football_api.get_team_stats_by_venue(away_team_id, season=2025)
-        
         if not home_stats_data or not away_stats_data:
-            print(f"   ❌ Stats não disponíveis no Football-Data")
+            logger.info("❌ %s vs %s: stats não disponíveis no Football-Data (IDs %s, %s)",
+                        home_team_name, away_team_name, home_team_id, away_team_id)
             return None, None
         
         # Time mandante joga EM CASA
@@ -362,9 +564,12 @@ class BettingAgent:
         # Time visitante joga FORA
         away_venue_stats = away_stats_data['away']
         
-        print(f"   ✅ Stats reais carregadas!")
-        print(f"      🏠 {home_team_name} (casa): {home_venue_stats['avg_scored']:.2f} marcados / {home_venue_stats['avg_conceded']:.2f} sofridos")
-        print(f"      🚗 {away_team_name} (fora): {away_venue_stats['avg_scored']:.2f} marcados / {away_venue_stats['avg_conceded']:.2f} sofridos")
+        logger.debug(
+            "✅ Stats reais %s: 🏠 %s (casa) %.2f/%.2f | 🚗 %s (fora) %.2f/%.2f",
+            competition_code,
+            home_team_name, home_venue_stats['avg_scored'], home_venue_stats['avg_conceded'],
+            away_team_name, away_venue_stats['avg_scored'], away_venue_stats['avg_conceded']
+        )
         
         # Monta dados para cálculo ajustado
         home_team_data = {
@@ -383,6 +588,7 @@ class BettingAgent:
         away_stats_final = self._calculate_adjusted_stats(away_team_data)
         
         return home_stats_final, away_stats_final
+
     def _calculate_adjusted_stats(self, team_data: Dict) -> Dict:
         """Calcula estatísticas ajustadas com forma recente e mando de campo"""
         base_scored = team_data.get('base_avg_scored', 1.5)
@@ -427,328 +633,197 @@ class BettingAgent:
     def _analyze_match_markets(self, match: Dict, odds: Dict, phase_info: Dict, 
                                home_stats: Dict, away_stats: Dict) -> List[Dict]:
         """Analisa mercados disponíveis do jogo"""
-        opportunities = []
-        markets = odds.get('markets', {})
+        return self._analyze_slate([(match, odds, home_stats, away_stats)], phase_info)
+    
+    def _analyze_slate(self, games: List[tuple], phase_info: Dict) -> List[Dict]:
+        """
+        Analisa os mercados de todos os jogos do slate em uma única avaliação vetorizada
         
-        # Verifica se tem stats reais
-        if not home_stats or not away_stats:
-            print(f"   ⚠️  Pulando {match.get('home_team')} x {match.get('away_team')} - sem stats reais")
-            return []
+        Args:
+            games: lista de (match, odds, home_stats, away_stats)
+        
+        Returns:
+            Oportunidades na ordem dos jogos (Over, Under, Handicaps, BTTS)
+        """
+        min_ev = phase_info['min_ev']
+        lambdas = []
+        analyzed = []
+        rows = []
+        rejections = []
         
-        # DEBUG: Força debug nos primeiros 5 jogos
         if not hasattr(self, '_debug_count'):
             self._debug_count = 0
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
-        should_debug = self._debug_count < 5
-        self._debug_count += 1
-        
-        if should_debug:
-            print(f"\n🎯 DEBUG #{self._debug_count}: {match['home_team']} x {match['away_team']}")
-            print(f"   📊 Home: {home_stats['avg_scored']:.2f} gols/jogo | Away: {away_stats['avg_scored']:.2f} gols/jogo")
-            print(f"   📊 EV mínimo exigido: {phase_info['min_ev']}%")
-        
-        # DEBUG: Mostra estrutura de markets
-        if should_debug:
+        # 1. Monta as linhas (jogo × mercado) do slate
+        for match, odds, home_stats, away_stats in games:
+            event = Event.from_dict(odds)
+            markets = event.markets
+            
+            # Verifica se tem stats reais
+            if not home_stats or not away_stats:
+                logger.info("⚠️  Pulando %s x %s - sem stats reais", match.get('home_team'), match.get('away_team'))
+                continue
+            
+            game = len(analyzed)
+            home_lambda, away_lambda = self._expected_goals(home_stats, away_stats)
+            lambdas.append((home_lambda, away_lambda))
+            
+            # DEBUG: detalha os primeiros 5 jogos (só com LOG_LEVEL=DEBUG)
+            should_debug = debug_enabled and self._debug_count < 5
+            self._debug_count += 1
+            analyzed.append((match, should_debug))
+            
+            if should_debug:
+                logger.debug("🎯 DEBUG #%d: %s x %s | Home: %.2f gols/jogo | Away: %.2f gols/jogo | EV mínimo: %s%%",
+                             self._debug_count, match['home_team'], match['away_team'],
+                             home_stats['avg_scored'], away_stats['avg_scored'], min_ev)
+                for key in ('over_2.5', 'spread_-0.5', 'spread_0.5'):
+                    if key in markets:
+                        logger.debug("🔍 markets['%s']: %s", key, markets[key])
+            
+            # Over/Under 2.5
             if 'over_2.5' in markets:
-                print(f"   🔍 markets['over_2.5']: {markets['over_2.5']}")
-            if 'spread_-0.5' in markets:
-                print(f"   🔍 markets['spread_-0.5']: {markets['spread_-0.5']}")
-            if 'spread_0.5' in markets:
-                print(f"   🔍 markets['spread_0.5']: {markets['spread_0.5']}")
-        
-        # 1. Over 2.5
-        if 'over_2.5' in markets:
-            opp = self._analyze_over(match, odds, home_stats, away_stats, 2.5, markets['over_2.5'], phase_info)
-            if opp:
-                opportunities.append(opp)
-                if should_debug:
-                    print(f"   ✅ Over 2.5 @ {markets['over_2.5']} - EV: {opp['ev']:.1f}% - Prob: {opp['probability']*100:.1f}%")
-            elif should_debug:
-                # Calcula manualmente para debug
-                probs = self.probability_model.calculate_over_under(home_stats['avg_scored'], away_stats['avg_scored'], 2.5)
-            opp = self._analyze_under(match, odds, home_stats, away_stats, 2.5, markets['under_2.5'], phase_info)
-            if opp:
-                opportunities.append(opp)
-                if should_debug:
-                    print(f"   ✅ Under 2.5 @ {markets['under_2.5']} - EV: {opp['ev']:.1f}% - Prob: {opp['probability']*100:.1f}%")
-            elif should_debug:
-                probs = self.probability_model.calculate_over_under(home_stats['avg_scored'], away_stats['avg_scored'], 2.5)
-        handicap_count = 0
-        for spread_key in markets.keys():
-            if spread_key.startswith('spread_'):
-                parts = spread_key.split('_')
-                if len(parts) >= 2:
-                    try:
-                        handicap = float(parts[1])
-                        opp = self._analyze_handicap(match, odds, home_stats, away_stats, handicap, markets[spread_key], phase_info)
-                        if opp:
-                            opportunities.append(opp)
-                            if should_debug and handicap_count < 2:
-                                print(f"   ✅ Handicap {handicap:+.1f} @ {markets[spread_key]} - EV: {opp['ev']:.1f}%")
-                                handicap_count += 1
-                    except ValueError:
-                        continue
-        
-        # 4. BTTS (se disponível)
-        if 'btts_yes' in markets:
-            opp = self._analyze_btts(match, odds, home_stats, away_stats, markets['btts_yes'], phase_info)
-            if opp:
-                opportunities.append(opp)
-                if should_debug:
-                    print(f"   ✅ BTTS @ {markets['btts_yes']} - EV: {opp['ev']:.1f}%")
-        
-        return opportunities
-    
-    def _analyze_over(self, match: Dict, odds: Dict, home_stats: Dict, 
-                     away_stats: Dict, line: float, market_odds, 
-                     phase_info: Dict) -> Dict:
-        """Analisa oportunidade de Over usando lambdas"""
-        
-        # Extrai odd e bookmaker
-        if isinstance(market_odds, dict):
-            bookmaker = market_odds.get("bookmaker", "Unknown")
-            market_odds = market_odds.get("odd", market_odds)
-        else:
-            bookmaker = "Unknown"
-        
-        # Calcula lambdas (ataque vs defesa)
-        home_lambda, away_lambda = self._expected_goals(home_stats, away_stats)
-        
-        # 🎯 FILTRO 1: Over 2.5 precisa de 3.2+ gols esperados
-        expected_goals = home_lambda + away_lambda
-        if line == 2.5 and expected_goals < 3.2:
-            if hasattr(self, '_debug_count') and self._debug_count <= 5:
-                print(f"   ❌ Over {line} rejeitado: apenas {expected_goals:.2f} gols esperados (mín: 3.2)")
-            self.rejection_logger.log_rejection(
-                match=f"{match["home_team"]} x {match["away_team"]}", 
-                market=f"Over {line}", 
-                reason="insufficient_expected_goals", 
-                details={"expected_goals": round(expected_goals, 2), "minimum": 3.2}, 
-                competition=match.get("competition", "N/A")
-            )
-            return None
-        
-        # Calcula probabilidades usando lambdas
-        probs = self.probability_model.calculate_over_under(home_lambda, away_lambda, line)
-        
-        # 🎯 FILTRO 2: EV mínimo de +25%
-        min_ev_required = max(phase_info["min_ev"], 25.0)  # No mínimo 25%
-        
-        is_valid, ev = self.probability_model.validate_opportunity(
-            probs['prob_over'], 
-            market_odds, 
-            min_ev_required
-        )
-
-        
-        if not is_valid:
-            self.rejection_logger.log_rejection(
-                match=f"{match["home_team"]} x {match["away_team"]}", 
-                market=f"Over {line}", 
-                reason="insufficient_ev", 
-                details={"ev": round(ev, 2), "min_required": round(min_ev_required, 2), "odds": market_odds}, 
-                competition=match.get("competition", "N/A")
-            )
-            return None
+                # 🎯 FILTRO 1: Over 2.5 precisa de 3.2+ gols esperados
+                expected_goals = home_lambda * self.probability_model.home_advantage + away_lambda
+                if expected_goals < 3.2:
+                    if should_debug:
+                        logger.debug("❌ Over 2.5 rejeitado: apenas %.2f gols esperados (mín: 3.2)", expected_goals)
+                    rejections.append(self._rejection(
+                        match, "Over 2.5", "insufficient_expected_goals",
+                        {"expected_goals": round(expected_goals, 2), "minimum": 3.2}
+                    ))
+                else:
+                    # 🎯 FILTRO 2: EV mínimo de +25%
+                    rows.append(self._market_row(game, 'over', 2.5, event, 'over_2.5',
+                                                 'Over 2.5', max(min_ev, 25.0)))
+                
+                if 'under_2.5' in markets:
+                    rows.append(self._market_row(game, 'under', 2.5, event, 'under_2.5',
+                                                 'Under 2.5', min_ev))
+            
+            # Handicaps asiáticos do mandante (exatos, incluindo linhas de 1/4)
+            for spread_key in markets.keys():
+                if not spread_key.startswith('spread_'):
+                    continue
+                try:
+                    line = float(spread_key.split('_')[1])
+                except (IndexError, ValueError):
+                    continue
+                rows.append(self._market_row(game, 'home', line, event, spread_key,
+                                             f"{match['home_team']} {self._format_line(line)}", min_ev))
+            
+            # BTTS (se disponível)
+            if 'btts_yes' in markets:
+                row = self._market_row(game, 'btts_yes', 0.0, event, 'btts_yes',
+                                       'BTTS (Ambas Marcam)', min_ev)
+                row['rejection_market'] = 'BTTS Yes'
+                row['bookmaker'] = None
+                rows.append(row)
+        
+        if not rows:
+            self.rejection_logger.log_rejections(rejections)
+            return []
         
-        stake = self.bankroll_manager.calculate_stake(
-            probs['prob_over'], 
-            market_odds, 
-            ev
+        # 2. Probabilidade, EV, validação e stake de todas as linhas de uma vez
+        home_lambdas, away_lambdas = zip(*lambdas)
+        result = self.probability_model.evaluate_markets(
+            home_lambdas,
+            away_lambdas,
+            [row['game'] for row in rows],
+            [row['type'] for row in rows],
+            [row['line'] for row in rows],
+            [row['odds'] for row in rows],
+            [row['min_ev'] for row in rows],
+            bankroll_manager=self.bankroll_manager
         )
         
         # Aplica ajuste de risco
         stake_adjustment = self.risk_manager.get_stake_adjustment()
-        stake = stake * stake_adjustment
-        
-        return {
-            'match': f"{match['home_team']} x {match['away_team']}",
-            'competition': match.get('competition', 'N/A'),
-            'date': match['date'],
-            'market': f'Over {line}',
-            'odds': market_odds,
-            'bookmaker': bookmaker,
-            'probability': probs['prob_over'],
-            'ev': ev,
-            'stake': round(stake, 2),
-            'potential_return': round(stake * market_odds, 2),
-            'phase': phase_info['phase']
-        }
-    
-    def _analyze_under(self, match: Dict, odds: Dict, home_stats: Dict, 
-                      away_stats: Dict, line: float, market_odds, 
-                      phase_info: Dict) -> Dict:
-        """Analisa oportunidade de Under usando lambdas"""
-        
-        # Extrai odd e bookmaker
-        if isinstance(market_odds, dict):
-            bookmaker = market_odds.get("bookmaker", "Unknown")
-            market_odds = market_odds.get("odd", market_odds)
-        else:
-            bookmaker = "Unknown"
-        
-        # Calcula lambdas (ataque vs defesa)
-        home_lambda, away_lambda = self._expected_goals(home_stats, away_stats)
-        
-        # Calcula probabilidades usando lambdas
-        probs = self.probability_model.calculate_over_under(home_lambda, away_lambda, line)
-        
-        # Usa probabilidade de UNDER
-        
-        is_valid, ev = self.probability_model.validate_opportunity(
-            probs["prob_under"],
-            market_odds,
-            phase_info["min_ev"]
-        )
-        
-        if not is_valid:
-            self.rejection_logger.log_rejection(
-                match=f"{match["home_team"]} x {match["away_team"]}", 
-                market=f"Under {line}", 
-                reason="insufficient_ev", 
-                details={"ev": round(ev, 2), "min_required": round(phase_info["min_ev"], 2), "odds": market_odds}, 
-                competition=match.get("competition", "N/A")
-            )
-            return None
+        opportunities = []
         
-        stake = self.bankroll_manager.calculate_stake(
-            probs['prob_under'], 
-            market_odds, 
-            ev
-        )
+        # 3. Monta oportunidades / rejeições
+        for i, row in enumerate(rows):
+            match, should_debug = analyzed[row['game']]
+            probability = float(result['probability'][i])
+            ev = float(result['ev'][i])
+            market_odds = row['odds']
+            
+            if not result['valid'][i]:
+                rejections.append(self._rejection(
+                    match, row.get('rejection_market', row['market']), "insufficient_ev",
+                    {"ev": round(ev, 2), "min_required": round(row['min_ev'], 2), "odds": market_odds}
+                ))
+                continue
+            
+            stake = float(result['stake'][i]) * stake_adjustment
+            
+            # Consenso do mercado (sem margem) como referência; stale = preço fora da curva
+            has_consensus = row['consensus'] is not None
+            opportunities.append(Opportunity(
+                match=f"{match['home_team']} x {match['away_team']}",
+                competition=match.get('competition', 'N/A'),
+                date=match['date'],
+                market=row['market'],
+                odds=market_odds,
+                probability=probability,
+                ev=ev,
+                stake=round(stake, 2),
+                potential_return=round(stake * market_odds, 2),
+                phase=phase_info['phase'],
+                bookmaker=row['bookmaker'],
+                consensus_probability=row['consensus'],
+                stale_price=row['stale'] if has_consensus else None,
+                event_id=row['event_id'],
+                outcome=row['outcome']
+            ).to_dict())
+            
+            if should_debug:
+                logger.debug("✅ %s @ %s - EV: %.1f%% - Prob: %.1f%%", row['market'], market_odds, ev, probability * 100)
         
-        # Aplica ajuste de risco
-        stake_adjustment = self.risk_manager.get_stake_adjustment()
-        stake = stake * stake_adjustment
+        self.rejection_logger.log_rejections(rejections)
         
-        return {
-            'match': f"{match['home_team']} x {match['away_team']}",
-            'competition': match.get('competition', 'N/A'),
-            'date': match['date'],
-            'market': f'Under {line}',
-            'odds': market_odds,
-            'bookmaker': bookmaker,
-            'probability': probs['prob_under'],
-            'ev': ev,
-            'stake': round(stake, 2),
-            'potential_return': round(stake * market_odds, 2),
-            'phase': phase_info['phase']
-        }
+        return opportunities
     
-    def _analyze_handicap(self, match: Dict, odds: Dict, home_stats: Dict, 
-                         away_stats: Dict, line: float, market_odds, 
-                         phase_info: Dict) -> Dict:
-        """Analisa oportunidade de Handicap/Spread usando lambdas"""
-        
-        # Extrai odd e bookmaker
-        if isinstance(market_odds, dict):
-            bookmaker = market_odds.get("bookmaker", "Unknown")
-            market_odds = market_odds.get("odd", market_odds)
-        else:
-            bookmaker = "Unknown"
-        
-        # Calcula lambdas (ataque vs defesa)
-        home_lambda, away_lambda = self._expected_goals(home_stats, away_stats)
-        
-        # Calcula probabilidades usando lambdas
-        probs = self.probability_model.calculate_handicap(home_lambda, away_lambda, line)
-        
-        
-        is_valid, ev = self.probability_model.validate_opportunity(
-            probs["prob_home_cover"],
-            market_odds,
-            phase_info["min_ev"]
-        )
-        
-        if not is_valid:
-            self.rejection_logger.log_rejection(
-                match=f"{match["home_team"]} x {match["away_team"]}", 
-                market=f"{match["home_team"]} {line:+.1f}", 
-                reason="insufficient_ev", 
-                details={"ev": round(ev, 2), "min_required": round(phase_info["min_ev"], 2), "odds": market_odds}, 
-                competition=match.get("competition", "N/A")
-            )
-            return None
-        
-        stake = self.bankroll_manager.calculate_stake(
-            probs['prob_home_cover'], 
-            market_odds, 
-            ev
-        )
-        
-        # Aplica ajuste de risco
-        stake_adjustment = self.risk_manager.get_stake_adjustment()
-        stake = stake * stake_adjustment
-        
-        line_str = f"{line:+.1f}" if line != 0 else "0.0"
+    @staticmethod
+    def _market_row(game: int, market_type: str, line: float, event: Event, key: str,
+                    market: str, min_ev: float) -> Dict:
+        """Linha do slate para ProbabilityModel.evaluate_markets (consenso/stale: ver OddsAPI._format_odds)"""
+        quote = event.markets[key]
         
         return {
-            'match': f"{match['home_team']} x {match['away_team']}",
-            'competition': match.get('competition', 'N/A'),
-            'date': match['date'],
-            'market': f"{match['home_team']} {line_str}",
-            'odds': market_odds,
-            'bookmaker': bookmaker,
-            'probability': probs['prob_home_cover'],
-            'ev': ev,
-            'stake': round(stake, 2),
-            'potential_return': round(stake * market_odds, 2),
-            'phase': phase_info['phase']
+            'game': game,
+            'type': market_type,
+            'line': line,
+            'odds': quote.odd,
+            'bookmaker': quote.bookmaker,
+            'market': market,
+            'event_id': event.match_id,
+            'outcome': key,
+            'min_ev': min_ev,
+            'consensus': event.consensus.get(key),
+            'stale': key in event.stale
         }
     
-    def _analyze_btts(self, match: Dict, odds: Dict, home_stats: Dict, 
-                     away_stats: Dict, market_odds, phase_info: Dict) -> Dict:
-        """Analisa oportunidade de BTTS (Both Teams To Score) usando lambdas"""
-        
-        # Extrai odd e bookmaker
-        if isinstance(market_odds, dict):
-            bookmaker = market_odds.get("bookmaker", "Unknown")
-            market_odds = market_odds.get("odd", market_odds)
-        else:
-            bookmaker = "Unknown"
-        
-        # Calcula lambdas (ataque vs defesa)
-        home_lambda, away_lambda = self._expected_goals(home_stats, away_stats)
-        
-        # Calcula probabilidade de BTTS usando lambdas
-        prob_btts = self.probability_model.calculate_btts_from_lambdas(home_lambda, away_lambda)
-        
-        
-        is_valid, ev = self.probability_model.validate_opportunity(
-            prob_btts,
-            market_odds,
-            phase_info["min_ev"]
-        )
-        
-        if not is_valid:
-            self.rejection_logger.log_rejection(
-                match=f"{match["home_team"]} x {match["away_team"]}", 
-                market="BTTS Yes", 
-                reason="insufficient_ev", 
-                details={"ev": round(ev, 2), "min_required": round(phase_info["min_ev"], 2), "odds": market_odds}, 
-                competition=match.get("competition", "N/A")
-            )
-            return None
-        
-        stake = self.bankroll_manager.calculate_stake(prob_btts, market_odds, ev)
-        
-        # Aplica ajuste de risco
-        stake_adjustment = self.risk_manager.get_stake_adjustment()
-        stake = stake * stake_adjustment
-        
+    @staticmethod
+    def _rejection(match: Dict, market: str, reason: str, details: Dict) -> Dict:
+        """Entrada para RejectionLogger.log_rejections"""
         return {
-            'match': f"{match['home_team']} x {match['away_team']}",
-            'competition': match.get('competition', 'N/A'),
-            'date': match['date'],
-            'market': 'BTTS (Ambas Marcam)',
-            'odds': market_odds,
-            'probability': prob_btts,
-            'ev': ev,
-            'stake': round(stake, 2),
-            'potential_return': round(stake * market_odds, 2),
-            'phase': phase_info['phase']
+            "match": f"{match['home_team']} x {match['away_team']}",
+            "market": market,
+            "reason": reason,
+            "details": details,
+            "competition": match.get("competition", "N/A")
         }
     
+    @staticmethod
+    def _format_line(line: float) -> str:
+        """Formata linha de handicap (+1.5, -0.25, 0.0)"""
+        if line == 0:
+            return "0.0"
+        # Linhas de 1/4 precisam de 2 casas
+        return f"{line:+.2f}" if round(line * 4) % 2 else f"{line:+.1f}"
+    
     def register_bet(self, bet_data: Dict) -> str:
         """Registra aposta no histórico"""
         bet_id = self.bet_history.add_bet(bet_data)
@@ -801,6 +876,11 @@ class BettingAgent:
         if stats['total_bets'] > 0:
             report += Reporter.generate_statistics_report(stats)
         
+        # Tempos por etapa / chamadas da última análise
+        trace = self.finish_trace()
+        if trace:
+            report += Reporter.format_trace(trace)
+        
         return report
     
     def get_phase_summary(self) -> str:
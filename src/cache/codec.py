@@ -0,0 +1,116 @@
+"""
+Serialização compacta dos valores do cache
+
+Formato: cabeçalho de 4 bytes + payload
+    b'BQ' | versão | flags (formato nos bits 0-3, compressão nos bits 4-7)
+
+- Formato: msgpack (se instalado) ou JSON
+- Compressão: zstd (se instalado) ou zlib, só acima de CACHE_COMPRESS_MIN_BYTES
+
+Entradas antigas (JSON puro, sem cabeçalho) continuam sendo lidas.
+"""
+import json
+import zlib
+from typing import Any, Union
+
+from config.config import Config
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b'BQ'
+VERSION = 1
+
+FORMAT_JSON = 0
+FORMAT_MSGPACK = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+ZSTD_LEVEL = 3
+
+# Erros possíveis ao decodificar uma entrada corrompida ou de outro formato
+DECODE_ERRORS = (ValueError, TypeError, zlib.error)
+if msgpack:
+    DECODE_ERRORS += (msgpack.exceptions.UnpackException,)
+if zstandard:
+    DECODE_ERRORS += (zstandard.ZstdError,)
+
+
+class CacheCodec:
+    """Codifica/decodifica valores do cache (configurado via Config.CACHE_*)"""
+
+    def __init__(self, fmt: str = None, compression: str = None, compress_min_bytes: int = None):
+        fmt = (fmt or Config.CACHE_CODEC).lower()
+        compression = (compression or Config.CACHE_COMPRESSION).lower()
+
+        self.format = FORMAT_MSGPACK if fmt == 'msgpack' and msgpack else FORMAT_JSON
+
+        if compression == 'zstd' and zstandard:
+            self.compression = COMPRESSION_ZSTD
+        elif compression in ('zstd', 'zlib'):
+            self.compression = COMPRESSION_ZLIB
+        else:
+            self.compression = COMPRESSION_NONE
+
+        self.compress_min_bytes = (
+            Config.CACHE_COMPRESS_MIN_BYTES if compress_min_bytes is None else compress_min_bytes
+        )
+
+    def encode(self, value: Any) -> bytes:
+        if self.format == FORMAT_MSGPACK:
+            payload = msgpack.packb(value, use_bin_type=True)
+        else:
+            payload = json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(payload) >= self.compress_min_bytes:
+            compression = self.compression
+            if compression == COMPRESSION_ZSTD:
+                payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+            else:
+                payload = zlib.compress(payload, 6)
+
+        return MAGIC + bytes((VERSION, self.format | (compression << 4))) + payload
+
+    @staticmethod
+    def decode(data: Union[bytes, str]) -> Any:
+        if isinstance(data, str):
+            return json.loads(data)
+
+        # Entrada antiga: JSON puro
+        if not data.startswith(MAGIC):
+            return json.loads(data)
+
+        version, flags = data[2], data[3]
+        if version != VERSION:
+            raise ValueError(f"Versão de codec desconhecida: {version}")
+
+        fmt, compression = flags & 0x0F, flags >> 4
+        payload = memoryview(data)[4:]
+
+        if compression == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression == COMPRESSION_ZSTD:
+            if not zstandard:
+                raise ValueError("Entrada comprimida com zstd, mas zstandard não está instalado")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        elif compression != COMPRESSION_NONE:
+            raise ValueError(f"Compressão desconhecida: {compression}")
+
+        if fmt == FORMAT_MSGPACK:
+            if not msgpack:
+                raise ValueError("Entrada em msgpack, mas msgpack não está instalado")
+            return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        if fmt == FORMAT_JSON:
+            return json.loads(bytes(payload))
+
+        raise ValueError(f"Formato desconhecido: {fmt}")
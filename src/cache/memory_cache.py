@@ -0,0 +1,56 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class MemoryCache:
+    """
+    Cache em memória do processo (TTL + LRU com limite de entradas)
+
+    Fica na frente do Redis: leituras repetidas na mesma execução não saem do
+    processo nem pagam json.loads. Os valores são compartilhados entre os
+    leitores (não copiados) - trate-os como somente leitura.
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, expire_seconds: float):
+        if value is None or expire_seconds <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + expire_seconds, value)
+            self._data.move_to_end(key)
+
+            # Remove os menos usados acima do limite
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,44 +1,489 @@
 import redis
-import json
 import os
-from typing import Any, Optional
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from config.config import Config
+from src.cache.codec import CacheCodec, DECODE_ERRORS
+from src.cache.memory_cache import MemoryCache
+from src.cache.sqlite_cache import SQLiteCacheClient
+from src.utils.instrumentation import record_cache
+from src.utils.logger import get_logger
 
-class RedisCache:
-    """Cliente Redis para cache"""
+logger = get_logger(__name__)
+
+SWR_MARKER = '__swr_fresh_until__'
+
+# Falhas do backend (Redis ou fallback SQLite): viram miss/no-op, nunca exceção para o chamador
+BACKEND_ERRORS = (redis.RedisError, sqlite3.Error)
+_UNAVAILABLE = object()
+
+
+class _Flight:
+    """Busca em andamento de uma chave (single-flight)"""
     
     def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[Exception] = None
+
+
+class RedisCache:
+    """
+    Cliente Redis para cache (com camada em memória na frente)
+    
+    Sem Redis acessível, usa o backend SQLite local (CACHE_FALLBACK=sqlite)
+    com a mesma semântica de get/set/TTL. Se o Redis cair depois da
+    inicialização, a troca acontece na primeira falha de conexão (a operação é
+    repetida no fallback) e o Redis é testado de novo a cada
+    CACHE_REDIS_RETRY_SECONDS.
+    """
+    
+    LEASE_POLL_SECONDS = 0.2
+    
+    def __init__(self, memory: Optional[MemoryCache] = None, codec: Optional[CacheCodec] = None):
         redis_host = os.getenv('REDIS_HOST', 'localhost')
         redis_port = int(os.getenv('REDIS_PORT', 6379))
         
+        # Camada em memória: TTL igual ao restante no Redis, LRU limitado
+        self.memory = memory if memory is not None else MemoryCache(Config.MEMORY_CACHE_MAX_ENTRIES)
+        
+        # Serialização (msgpack + compressão; lê entradas JSON antigas)
+        self.codec = codec or CacheCodec()
+        
+        # Single-flight: buscas em andamento por chave (neste processo)
+        self._flights: Dict[str, "_Flight"] = {}
+        self._flights_lock = threading.Lock()
+        self._refreshing = set()  # Chaves stale sendo atualizadas em segundo plano
+        
+        # Redis fora do ar em runtime: cliente guardado para reconexão
+        self._backend_lock = threading.Lock()
+        self._redis_client = None
+        self._redis_retry_at = 0.0
+        
         try:
             self.client = redis.Redis(
                 host=redis_host,
                 port=redis_port,
                 db=0,
-                decode_responses=True,
+                decode_responses=False,
                 socket_connect_timeout=2
             )
             self.client.ping()
             self.enabled = True
-        except:
+            self.backend = 'redis'
+        except redis.RedisError:
+            self.enabled = False
+            self.client = None
+            self.backend = None
+            self._use_fallback()
+    
+    def _use_fallback(self):
+        """Backend em disco quando o Redis não responde"""
+        if Config.CACHE_FALLBACK != 'sqlite':
+            return
+        
+        try:
+            self.client = SQLiteCacheClient(Config.CACHE_SQLITE_PATH)
+            self.enabled = True
+            self.backend = 'sqlite'
+            logger.warning("⚠️  Redis indisponível - usando cache local (%s)", Config.CACHE_SQLITE_PATH)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("⚠️  Redis indisponível e cache local falhou: %s", e)
+    
+    def _call(self, operation: Callable[[Any], Any], default: Any = None) -> Any:
+        """
+        Executa operation(client) no backend atual
+        
+        Conexão com o Redis caiu → troca para o fallback e repete uma vez;
+        outras falhas do backend devolvem default (miss / no-op).
+        """
+        self._maybe_restore_redis()
+        
+        for _ in range(2):
+            client = self.client
+            if not self.enabled or client is None:
+                return default
+            try:
+                return operation(client)
+            except BACKEND_ERRORS as e:
+                if not self._switch_to_fallback(client, e):
+                    logger.debug("⚠️ Falha no cache (%s): %s", self.backend, e)
+                    return default
+        return default
+    
+    def _switch_to_fallback(self, client: Any, error: Exception) -> bool:
+        """Troca o Redis pelo fallback após falha de conexão (True = repetir a operação)"""
+        if not isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            return False
+        
+        with self._backend_lock:
+            if client is not self.client:
+                return True  # Outra thread já trocou
+            
+            self._redis_client = client
+            self._redis_retry_at = time.monotonic() + Config.CACHE_REDIS_RETRY_SECONDS
             self.enabled = False
             self.client = None
+            self.backend = None
+            logger.warning("⚠️  Conexão com o Redis perdida: %s", error)
+            self._use_fallback()
+            return self.enabled
+    
+    def _maybe_restore_redis(self):
+        """Volta para o Redis quando ele responder de novo (testado a cada CACHE_REDIS_RETRY_SECONDS)"""
+        if self._redis_client is None or time.monotonic() < self._redis_retry_at:
+            return
+        
+        with self._backend_lock:
+            if self._redis_client is None or time.monotonic() < self._redis_retry_at:
+                return
+            self._redis_retry_at = time.monotonic() + Config.CACHE_REDIS_RETRY_SECONDS
+            client = self._redis_client
+        
+        try:
+            client.ping()
+        except redis.RedisError:
+            return
+        
+        with self._backend_lock:
+            self.client, self._redis_client = client, None
+            self.enabled = True
+            self.backend = 'redis'
+        logger.info("✅ Redis disponível de novo")
     
     def get(self, key: str) -> Optional[Any]:
-        if not self.enabled:
+        return self._unwrap(self._get_entry(key))[0]
+    
+    def _get_entry(self, key: str) -> Optional[Any]:
+        """Valor armazenado (pode ser envelope stale-while-revalidate)"""
+        value = self.memory.get(key)
+        if value is not None:
+            record_cache(key, True, memory=True)
+            return value
+        
+        # GET + TTL em um round-trip (TTL alimenta a camada em memória)
+        def get_with_ttl(client):
+            pipe = client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.ttl(key)
+            return pipe.execute()
+        
+        result = self._call(get_with_ttl)
+        if result is None:
+            return None
+        
+        data, ttl = result
+        record_cache(key, data is not None)
+        if not data:
             return None
         
         try:
-            data = self.client.get(key)
-            return json.loads(data) if data else None
-        except:
+            value = self.codec.decode(data)
+        except DECODE_ERRORS as e:
+            logger.warning("⚠️ Entrada inválida no cache (%s): %s", key, e)
             return None
+        
+        if ttl and ttl > 0:
+            self.memory.set(key, value, ttl)
+        return value
     
-    def set(self, key: str, value: Any, expire_seconds: int = 3600):
-        if not self.enabled:
-            return
+    def set(self, key: str, value: Any, expire_seconds: int = 3600, soft_ttl: Optional[int] = None):
+        """Grava com TTL; com soft_ttl o valor vira "stale" antes de expirar (ver get_or_fetch)"""
+        value = self._wrap(value, soft_ttl)
+        self.memory.set(key, value, expire_seconds)
+        
+        data = self.codec.encode(value)
+        self._call(lambda client: client.setex(key, expire_seconds, data))
+    
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Busca várias chaves de uma vez (memória → 1 pipeline MGET + TTLs no Redis)
+        
+        Returns:
+            {chave: valor} apenas para as chaves encontradas
+        """
+        found = {}
+        missing = []
+        
+        for key in dict.fromkeys(keys):
+            value = self.memory.get(key)
+            if value is not None:
+                record_cache(key, True, memory=True)
+                found[key] = self._unwrap(value)[0]
+            else:
+                missing.append(key)
+        
+        if not missing:
+            return found
+        
+        def mget_with_ttls(client):
+            pipe = client.pipeline(transaction=False)
+            pipe.mget(missing)
+            for key in missing:
+                pipe.ttl(key)
+            return pipe.execute()
+        
+        results = self._call(mget_with_ttls)
+        if results is None:
+            return found
+        
+        for key, data, ttl in zip(missing, results[0], results[1:]):
+            record_cache(key, data is not None)
+            if not data:
+                continue
+            try:
+                value = self.codec.decode(data)
+            except DECODE_ERRORS as e:
+                logger.warning("⚠️ Entrada inválida no cache (%s): %s", key, e)
+                continue
+            
+            found[key] = self._unwrap(value)[0]
+            if ttl and ttl > 0:
+                self.memory.set(key, value, ttl)
+        
+        return found
+    
+    def incr(self, key: str, amount: int = 1, expire_seconds: Optional[int] = None) -> int:
+        """
+        Contador atômico no backend (INCRBY): seguro entre threads e workers
+        
+        Contadores não passam pela camada em memória nem pelo codec;
+        leia com get_counter.
+        """
+        def incrby(client):
+            pipe = client.pipeline(transaction=True)
+            pipe.incrby(key, amount)
+            if expire_seconds:
+                pipe.expire(key, expire_seconds)
+            return int(pipe.execute()[0])
+        
+        value = self._call(incrby)
+        if value is not None:
+            return value
+        
+        # Sem backend: contador só deste processo
+        with self._flights_lock:
+            value = (self.memory.get(key) or 0) + amount
+            self.memory.set(key, value, expire_seconds or 86400)
+        return value
+    
+    def get_counter(self, key: str) -> int:
+        """Valor atual de um contador de incr (0 se não existe)"""
+        data = self._call(lambda client: client.get(key), default=_UNAVAILABLE)
+        if data is not _UNAVAILABLE:
+            return int(data) if data is not None else 0
+        return self.memory.get(key) or 0
+    
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any], expire_seconds: int,
+                     soft_ttl: Optional[int] = None, lease_seconds: Optional[int] = None,
+                     wait_timeout: Optional[float] = None,
+                     can_refresh: Optional[Callable[[], bool]] = None) -> Any:
+        """
+        Lê a chave ou executa fetch() uma única vez para todos os chamadores (single-flight)
+        
+        - No processo: o primeiro chamador busca; os demais esperam o resultado dele
+        - Entre processos: lease SET NX em "lease:{key}"; quem não pega o lease
+          aguarda a chave ser preenchida (até wait_timeout, depois busca por conta própria)
+        - soft_ttl (stale-while-revalidate): após soft_ttl segundos o valor ainda é
+          devolvido na hora, e uma única atualização roda em segundo plano;
+          expire_seconds continua sendo o TTL máximo
+        - can_refresh: consultado antes da atualização em segundo plano
+          (ex: orçamento de créditos); False mantém o valor stale
+        
+        Só valores "verdadeiros" são gravados (mesma regra dos serviços: cache vazio = miss).
+        Erros do fetch propagam para o chamador que buscou e para quem estava esperando.
+        """
+        value, fresh_until = self._unwrap(self._get_entry(key))
+        if value:
+            if fresh_until is not None and time.time() >= fresh_until and (can_refresh is None or can_refresh()):
+                self._refresh_in_background(key, fetch, expire_seconds, soft_ttl, lease_seconds)
+            return value
+        
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        
+        if not leader:
+            wait_timeout = Config.CACHE_WAIT_TIMEOUT if wait_timeout is None else wait_timeout
+            if flight.done.wait(wait_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            return fetch()
         
         try:
-            self.client.setex(key, expire_seconds, json.dumps(value))
-        except:
-            pass
+            flight.value = self._fetch_with_lease(key, fetch, expire_seconds, soft_ttl, lease_seconds, wait_timeout)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+    
+    def _fetch_with_lease(self, key: str, fetch: Callable[[], Any], expire_seconds: int, soft_ttl: Optional[int],
+                          lease_seconds: Optional[int], wait_timeout: Optional[float]) -> Any:
+        """Busca protegida por lease no backend (1 worker por chave)"""
+        lease_seconds = lease_seconds or Config.CACHE_LEASE_SECONDS
+        wait_timeout = Config.CACHE_WAIT_TIMEOUT if wait_timeout is None else wait_timeout
+        lease_key = f"lease:{key}"
+        token = uuid.uuid4().hex.encode()
+        
+        acquired = self._acquire_lease(lease_key, token, lease_seconds)
+        
+        if not acquired and self.enabled:
+            # Outro worker está buscando: espera a chave aparecer
+            deadline = time.monotonic() + wait_timeout
+            while time.monotonic() < deadline:
+                time.sleep(self.LEASE_POLL_SECONDS)
+                value = self.get(key)
+                if value:
+                    return value
+                # Lease liberado/expirado sem valor: assume a busca
+                acquired = self._acquire_lease(lease_key, token, lease_seconds)
+                if acquired:
+                    break
+        
+        try:
+            # Pode ter sido preenchida enquanto pegávamos o lease
+            value = self.get(key) if acquired else None
+            if value:
+                return value
+            
+            value = fetch()
+            if value:
+                self.set(key, value, expire_seconds, soft_ttl)
+            return value
+        finally:
+            if acquired:
+                self._release_lease(lease_key, token)
+    
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Any], expire_seconds: int,
+                               soft_ttl: Optional[int], lease_seconds: Optional[int]):
+        """Agenda a atualização de um valor stale (no máximo 1 por chave neste processo)"""
+        with self._flights_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        _refresh_executor().submit(self._refresh, key, fetch, expire_seconds, soft_ttl, lease_seconds)
+    
+    def _refresh(self, key: str, fetch: Callable[[], Any], expire_seconds: int,
+                 soft_ttl: Optional[int], lease_seconds: Optional[int]):
+        lease_key = f"lease:{key}"
+        token = uuid.uuid4().hex.encode()
+        
+        try:
+            acquired = self._acquire_lease(lease_key, token, lease_seconds or Config.CACHE_LEASE_SECONDS)
+            if self.enabled and not acquired:
+                return  # Outro worker já está atualizando
+            
+            try:
+                value = fetch()
+                if value:
+                    self.set(key, value, expire_seconds, soft_ttl)
+                    logger.debug("🔄 Cache atualizado em segundo plano: %s", key)
+            finally:
+                if acquired:
+                    self._release_lease(lease_key, token)
+        except Exception as e:
+            # Mantém o valor stale até a próxima tentativa
+            logger.warning("⚠️ Falha ao atualizar %s em segundo plano: %s", key, e)
+        finally:
+            with self._flights_lock:
+                self._refreshing.discard(key)
+    
+    @staticmethod
+    def _wrap(value: Any, soft_ttl: Optional[int]) -> Any:
+        """Envelope stale-while-revalidate: guarda quando o valor deixa de ser fresco"""
+        if not soft_ttl:
+            return value
+        return {SWR_MARKER: time.time() + soft_ttl, 'value': value}
+    
+    @staticmethod
+    def _unwrap(entry: Any) -> tuple:
+        """(valor, fresco até) - fresco até = None para entradas sem soft TTL"""
+        if isinstance(entry, dict) and SWR_MARKER in entry:
+            return entry.get('value'), entry[SWR_MARKER]
+        return entry, None
+    
+    def _acquire_lease(self, lease_key: str, token: bytes, lease_seconds: int) -> bool:
+        return bool(self._call(lambda client: client.set(lease_key, token, ex=lease_seconds, nx=True), False))
+    
+    def _release_lease(self, lease_key: str, token: bytes):
+        def release(client):
+            if client.get(lease_key) == token:
+                client.delete(lease_key)
+        
+        self._call(release)
+    
+    def set_many(self, items: Dict[str, Any], expire_seconds: int = 3600, soft_ttl: Optional[int] = None):
+        """Grava várias chaves com o mesmo TTL (1 pipeline de SETEX)"""
+        if not items:
+            return
+        
+        items = {key: self._wrap(value, soft_ttl) for key, value in items.items()}
+        for key, value in items.items():
+            self.memory.set(key, value, expire_seconds)
+        
+        encoded = {key: self.codec.encode(value) for key, value in items.items()}
+        
+        def setex_many(client):
+            pipe = client.pipeline(transaction=False)
+            for key, data in encoded.items():
+                pipe.setex(key, expire_seconds, data)
+            pipe.execute()
+        
+        self._call(setex_many)
+    
+    def delete(self, key: str):
+        self.memory.delete(key)
+        self._call(lambda client: client.delete(key))
+    
+    def clear_all(self) -> bool:
+        """Limpa a camada em memória e o banco Redis"""
+        self.memory.clear()
+        
+        if not self.enabled:
+            return True
+        
+        return bool(self._call(lambda client: client.flushdb(), False))
+
+
+_shared_cache: Optional[RedisCache] = None
+_shared_lock = threading.Lock()
+_refresh_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _refresh_executor() -> ThreadPoolExecutor:
+    """Pool de atualizações em segundo plano (stale-while-revalidate)"""
+    global _refresh_pool
+    
+    if _refresh_pool is None:
+        with _shared_lock:
+            if _refresh_pool is None:
+                _refresh_pool = ThreadPoolExecutor(
+                    max_workers=Config.CACHE_REFRESH_WORKERS,
+                    thread_name_prefix='cache-refresh'
+                )
+    
+    return _refresh_pool
+
+
+def get_shared_cache() -> RedisCache:
+    """Instância única (conexão Redis + camada em memória) compartilhada pelos serviços"""
+    global _shared_cache
+    
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = RedisCache()
+    
+    return _shared_cache
@@ -0,0 +1,189 @@
+"""
+Snapshot de oportunidades do dia em arquivo único, indexado e de leitura lazy
+
+Formato:
+    b'BQSS' | versão (1 byte) | tamanho do índice (uint32 BE) | índice | registros
+
+- Índice (CacheCodec): metadados + posição de cada registro + índices por
+  jogo, competição e mercado
+- Registros: cada oportunidade codificada à parte (CacheCodec), na ordem de EV
+
+A escrita é atômica (arquivo temporário + os.replace): leitores nunca veem um
+snapshot pela metade. A leitura faz mmap do arquivo, decodifica só o índice e
+cada registro sob demanda.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.cache.codec import CacheCodec
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b'BQSS'
+VERSION = 1
+_HEADER = struct.Struct('>4sBI')
+
+
+def write_snapshot(path: str, meta: Dict[str, Any], records: List[Dict]):
+    """Grava o snapshot de forma atômica (registros devem vir na ordem desejada de leitura)"""
+    codec = CacheCodec()
+    encoded = [codec.encode(record) for record in records]
+
+    offsets = []
+    position = 0
+    by_match, by_competition, by_market = {}, {}, {}
+
+    for i, (record, data) in enumerate(zip(records, encoded)):
+        offsets.append((position, len(data)))
+        position += len(data)
+
+        by_match.setdefault(record.get('match'), []).append(i)
+        by_competition.setdefault(record.get('competition'), []).append(i)
+        by_market.setdefault(record.get('market'), []).append(i)
+
+    index = codec.encode({
+        'meta': meta,
+        'offsets': offsets,
+        'by_match': by_match,
+        'by_competition': by_competition,
+        'by_market': by_market
+    })
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(index)))
+            f.write(index)
+            for data in encoded:
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Snapshot:
+    """Leitor de um snapshot (mmap; registros decodificados sob demanda e memorizados)"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.path = path
+        self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        magic, version, index_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Arquivo não é um snapshot: {path}")
+        if version != VERSION:
+            raise ValueError(f"Versão de snapshot desconhecida: {version}")
+
+        start = _HEADER.size
+        index = CacheCodec.decode(self._mmap[start:start + index_size])
+
+        self.meta = index['meta']
+        self._offsets = index['offsets']
+        self._by_match = index['by_match']
+        self._by_competition = index['by_competition']
+        self._by_market = index['by_market']
+        self._data_start = start + index_size
+        self._records = {}
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def record(self, i: int) -> Dict:
+        if i not in self._records:
+            offset, size = self._offsets[i]
+            start = self._data_start + offset
+            self._records[i] = CacheCodec.decode(self._mmap[start:start + size])
+        return self._records[i]
+
+    def records(self, ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Registros (todos ou os ids informados), em ordem de gravação"""
+        ids = range(len(self)) if ids is None else sorted(ids)
+        return [self.record(i) for i in ids]
+
+    def matches(self) -> List[str]:
+        return list(self._by_match)
+
+    def competitions(self) -> List[str]:
+        return list(self._by_competition)
+
+    def find_ids(self, match: Optional[str] = None, competition: Optional[str] = None,
+                 market: Optional[str] = None) -> Optional[set]:
+        """Ids dos registros pelo índice (filtros combinados com E; None = sem filtro)"""
+        ids = None
+        for index, value in ((self._by_match, match), (self._by_competition, competition), (self._by_market, market)):
+            if value is None:
+                continue
+            found = set(index.get(value, ()))
+            ids = found if ids is None else ids & found
+
+        return ids
+
+    def find(self, match: Optional[str] = None, competition: Optional[str] = None,
+             market: Optional[str] = None) -> List[Dict]:
+        """Oportunidades pelo índice (filtros combinados com E)"""
+        return self.records(self.find_ids(match, competition, market))
+
+    def close(self):
+        if not self._mmap.closed:
+            self._mmap.close()
+
+
+_open_snapshots: Dict[str, Snapshot] = {}
+_retired_snapshots: Dict[str, Snapshot] = {}
+_open_lock = threading.Lock()
+
+
+def open_snapshot(path: str) -> Optional[Snapshot]:
+    """
+    Abre o snapshot (None se não existir)
+
+    O leitor fica aberto enquanto o arquivo não muda: chamadas repetidas
+    (/chat, API) não decodificam nada de novo. Após uma nova gravação
+    (os.replace → outro inode) o snapshot é reaberto; o leitor substituído
+    fica aposentado por uma geração (requisições em andamento ainda o usam)
+    e é fechado na troca seguinte.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    with _open_lock:
+        snapshot = _open_snapshots.get(path)
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+
+        try:
+            snapshot = Snapshot(path)
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️  Snapshot inválido (%s): %s", path, e)
+            return None
+
+        previous = _open_snapshots.get(path)
+        if previous is not None:
+            retired = _retired_snapshots.pop(path, None)
+            if retired is not None:
+                retired.close()
+            _retired_snapshots[path] = previous
+
+        _open_snapshots[path] = snapshot
+        return snapshot
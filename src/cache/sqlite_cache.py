@@ -0,0 +1,217 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+
+class SQLiteCacheClient:
+    """
+    Backend local do cache em SQLite (fallback quando o Redis está fora)
+
+    Implementa o subconjunto da API do redis-py usado pelo RedisCache
+    (get/mget/setex/set nx/incrby/expire/ttl/delete/flushdb/pipeline) com a mesma semântica
+    de TTL. Persiste em disco: uma queda do Redis ou um ambiente de dev não
+    voltam a gastar créditos das APIs a cada execução.
+
+    Requer SQLite 3.24+ (UPSERT); não usa RETURNING (3.35+), ausente em
+    builds de sistema mais antigos.
+    """
+
+    PURGE_EVERY = 500  # Limpa expirados a cada N escritas
+    # Chaves por statement (SQLITE_MAX_VARIABLE_NUMBER é 999 em builds anteriores à 3.32)
+    MAX_VARIABLES = 900
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self.path = path
+        self._lock = threading.RLock()
+        self._writes = 0
+
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+
+    # =========================
+    # 🔹 API (compatível com redis-py)
+    # =========================
+    def ping(self) -> bool:
+        with self._lock:
+            self._conn.execute("SELECT 1")
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+
+        now = time.time()
+        values = {}
+
+        with self._lock:
+            for chunk in self._chunks(keys):
+                values.update(self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(chunk))}) "
+                    "AND (expires_at IS NULL OR expires_at > ?)",
+                    (*chunk, now)
+                ).fetchall())
+
+        return [values.get(key) for key in keys]
+
+    def setex(self, key: str, seconds: int, value: Any) -> bool:
+        return self.set(key, value, ex=seconds)
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        now = time.time()
+        expires_at = now + ex if ex else None
+        value = value.encode('utf-8') if isinstance(value, str) else value
+
+        with self._lock:
+            if nx:
+                # Só grava se não existir (ou se a entrada atual já expirou)
+                cursor = self._conn.execute(
+                    "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                    "WHERE cache.expires_at IS NOT NULL AND cache.expires_at <= ?",
+                    (key, value, expires_at, now)
+                )
+                written = cursor.rowcount > 0
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at)
+                )
+                written = True
+
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+        if nx:
+            return True if written else None
+        return True
+
+    def incrby(self, key: str, amount: int = 1) -> int:
+        """
+        Incremento atômico (chave ausente ou expirada começa em 0, como no Redis)
+
+        UPSERT + SELECT na mesma transação (BEGIN IMMEDIATE: outros processos
+        não incrementam entre os dois); dentro de um pipeline usa a transação dele.
+        """
+        now = time.time()
+
+        with self._lock:
+            own_transaction = not self._conn.in_transaction
+            if own_transaction:
+                self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO cache (key, value, expires_at) VALUES (?, ?, NULL) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "value = CASE WHEN cache.expires_at IS NOT NULL AND cache.expires_at <= ? "
+                    "THEN excluded.value ELSE CAST(cache.value AS INTEGER) + excluded.value END, "
+                    "expires_at = CASE WHEN cache.expires_at IS NOT NULL AND cache.expires_at <= ? "
+                    "THEN NULL ELSE cache.expires_at END",
+                    (key, amount, now, now)
+                )
+                row = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            except Exception:
+                if own_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+            if own_transaction:
+                self._conn.execute("COMMIT")
+        return int(row[0])
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE cache SET expires_at = ? WHERE key = ?", (time.time() + seconds, key)
+            )
+        return cursor.rowcount > 0
+
+    def ttl(self, key: str) -> int:
+        """Segundos restantes (-2 = não existe, -1 = sem expiração)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return -2
+        if row[0] is None:
+            return -1
+
+        remaining = row[0] - time.time()
+        return math.ceil(remaining) if remaining > 0 else -2
+
+    def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+
+        deleted = 0
+        with self._lock:
+            for chunk in self._chunks(keys):
+                deleted += self._conn.execute(
+                    f"DELETE FROM cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).rowcount
+        return deleted
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+        return True
+
+    def pipeline(self, transaction: bool = True) -> "SQLitePipeline":
+        return SQLitePipeline(self)
+
+    @classmethod
+    def _chunks(cls, keys) -> List[tuple]:
+        """Blocos de chaves dentro do limite de variáveis do SQLite"""
+        keys = tuple(keys)
+        return [keys[i:i + cls.MAX_VARIABLES] for i in range(0, len(keys), cls.MAX_VARIABLES)]
+
+
+class SQLitePipeline:
+    """Pipeline no estilo redis-py: acumula comandos e executa em uma transação"""
+
+    def __init__(self, client: SQLiteCacheClient):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        client = self._client
+
+        with client._lock:
+            client._conn.execute("BEGIN")
+            try:
+                results = [method(*args, **kwargs) for method, args, kwargs in commands]
+            except Exception:
+                client._conn.execute("ROLLBACK")
+                raise
+            client._conn.execute("COMMIT")
+
+        return results
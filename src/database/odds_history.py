@@ -0,0 +1,236 @@
+"""
+Histórico de odds (movimento de linha) em SQLite local
+
+Cada busca na The Odds API é gravada por (evento, mercado, linha, casa).
+Só mudanças de preço viram linha nova: o preço em um instante T é a última
+observação até T. Permite medir steam moves e closing-line value sem pagar
+pelos endpoints históricos do provedor.
+
+Mercados: mesmas chaves de OddsMatrix.outcome_key (home_ml/draw/away_ml,
+over_{linha}/under_{linha}, spread_{linha}/spread_away_{linha}), então o
+mercado de uma oportunidade consulta o histórico direto; a coluna line guarda
+o ponto da cotação (0.0 no h2h).
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config.config import Config
+from src.models.odds_matrix import OddsMatrix
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS odds_history ("
+    "event_id TEXT NOT NULL, sport TEXT, market TEXT NOT NULL, line REAL NOT NULL, "
+    "bookmaker TEXT NOT NULL, fetched_at REAL NOT NULL, price REAL NOT NULL, "
+    "PRIMARY KEY (event_id, market, line, bookmaker, fetched_at)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_odds_history_sport_time ON odds_history (sport, fetched_at)",
+)
+
+# Grava só se o preço mudou em relação à última observação da mesma chave
+_INSERT_IF_CHANGED = (
+    "INSERT OR IGNORE INTO odds_history (event_id, sport, market, line, bookmaker, fetched_at, price) "
+    "SELECT :event_id, :sport, :market, :line, :bookmaker, :fetched_at, :price "
+    "WHERE COALESCE(("
+    "SELECT price FROM odds_history WHERE event_id = :event_id AND market = :market "
+    "AND line = :line AND bookmaker = :bookmaker ORDER BY fetched_at DESC LIMIT 1"
+    "), -1) != :price"
+)
+
+
+class OddsHistory:
+    """Série temporal de preços por (evento, mercado, linha, casa)"""
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or Config.ODDS_HISTORY_PATH
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self.path = path
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    # =========================
+    # 🔹 GRAVAÇÃO
+    # =========================
+    @staticmethod
+    def quotes_from_events(sport: str, events: List[Dict], fetched_at: float) -> List[Dict]:
+        """Cotações de cada casa na resposta bruta do endpoint /odds"""
+        quotes = []
+
+        for event in events:
+            event_id = event.get("id")
+            home_team = event.get("home_team")
+            if not event_id:
+                continue
+
+            for bookmaker in event.get("bookmakers", []):
+                bookmaker_key = bookmaker.get("key") or bookmaker.get("title", "Unknown")
+
+                for market in bookmaker.get("markets", []):
+                    key = market.get("key")
+
+                    for outcome in market.get("outcomes", []):
+                        price = outcome.get("price")
+                        point = outcome.get("point")
+
+                        if price is None:
+                            continue
+
+                        market_name = OddsMatrix.outcome_key(key, outcome.get("name"), point, home_team)
+                        if market_name is None:
+                            continue
+
+                        if key == "h2h":
+                            line = 0.0
+                        elif point is None:
+                            line = 2.5  # totals sem ponto: mesma linha padrão da matriz
+                        else:
+                            line = point
+
+                        quotes.append({
+                            'event_id': event_id,
+                            'sport': sport,
+                            'market': market_name,
+                            'line': float(line),
+                            'bookmaker': bookmaker_key,
+                            'fetched_at': fetched_at,
+                            'price': float(price)
+                        })
+
+        return quotes
+
+    def record_events(self, sport: str, events: List[Dict], fetched_at: Optional[float] = None) -> int:
+        """Grava um snapshot bruto de odds (retorna quantas cotações mudaram)"""
+        quotes = self.quotes_from_events(sport, events, time.time() if fetched_at is None else fetched_at)
+        if not quotes:
+            return 0
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(_INSERT_IF_CHANGED, quotes)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            changed = self._conn.total_changes - before
+
+        logger.debug("📈 Histórico de odds (%s): %d/%d cotações novas", sport, changed, len(quotes))
+        return changed
+
+    # =========================
+    # 🔹 CONSULTAS
+    # =========================
+    def series(self, event_id: str, market: str,
+               bookmaker: Optional[str] = None) -> List[Tuple[float, str, float]]:
+        """Observações (fetched_at, casa, preço) em ordem cronológica (market: ex. 'over_2.5')"""
+        sql = (
+            "SELECT fetched_at, bookmaker, price FROM odds_history "
+            "WHERE event_id = ? AND market = ?"
+        )
+        params = [event_id, market]
+        if bookmaker is not None:
+            sql += " AND bookmaker = ?"
+            params.append(bookmaker)
+
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY fetched_at", params).fetchall()
+
+    def price_at(self, event_id: str, market: str, bookmaker: Optional[str] = None, at: Optional[float] = None) -> Optional[float]:
+        """
+        Preço vigente no instante at (timestamp; padrão agora)
+        Sem bookmaker: melhor preço entre as casas naquele instante
+        """
+        at = time.time() if at is None else at
+        sql = (
+            "SELECT MAX(price) FROM odds_history h "
+            "WHERE event_id = ? AND market = ? {bookmaker} AND fetched_at = ("
+            "SELECT MAX(fetched_at) FROM odds_history WHERE event_id = h.event_id AND market = h.market "
+            "AND line = h.line AND bookmaker = h.bookmaker AND fetched_at <= ?)"
+        )
+        params = [event_id, market]
+        if bookmaker is not None:
+            params.append(bookmaker)
+        params.append(at)
+
+        with self._lock:
+            row = self._conn.execute(
+                sql.format(bookmaker="AND bookmaker = ?" if bookmaker is not None else ""), params
+            ).fetchone()
+        return row[0] if row else None
+
+    def opening_price(self, event_id: str, market: str, bookmaker: Optional[str] = None) -> Optional[float]:
+        """Primeiro preço observado (sem bookmaker: melhor preço da primeira busca)"""
+        series = self.series(event_id, market, bookmaker)
+        if not series:
+            return None
+
+        first = series[0][0]
+        return max(price for fetched_at, _, price in series if fetched_at == first)
+
+    def latest_price(self, event_id: str, market: str, bookmaker: Optional[str] = None) -> Optional[float]:
+        """Último preço observado (sem bookmaker: melhor preço atual entre as casas)"""
+        return self.price_at(event_id, market, bookmaker, at=float('inf'))
+
+    def movement(self, event_id: str, market: str, bookmaker: Optional[str] = None,
+                 window_seconds: Optional[int] = None, now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Movimento do preço na janela (padrão: desde a abertura)
+
+        Returns:
+            {'from', 'to', 'change_pct', 'implied_change', 'per_hour'} ou None sem dados;
+            implied_change/per_hour em pontos de probabilidade implícita
+            (positivo = preço encurtando, dinheiro entrando no lado)
+        """
+        now = time.time() if now is None else now
+        series = self.series(event_id, market, bookmaker)
+        if not series:
+            return None
+
+        start = series[0][0] if window_seconds is None else max(series[0][0], now - window_seconds)
+        start_price = self.price_at(event_id, market, bookmaker, at=start)
+        end_price = self.price_at(event_id, market, bookmaker, at=now)
+        if not start_price or not end_price:
+            return None
+
+        implied_change = (1 / end_price - 1 / start_price) * 100
+        hours = max((now - start) / 3600, 1 / 60)
+
+        return {
+            'from': start_price,
+            'to': end_price,
+            'change_pct': round((end_price / start_price - 1) * 100, 2),
+            'implied_change': round(implied_change, 2),
+            'per_hour': round(implied_change / hours, 3)
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_history = None
+_shared_lock = threading.Lock()
+
+
+def get_odds_history() -> Optional[OddsHistory]:
+    """Histórico compartilhado do processo (None se ODDS_HISTORY_ENABLED=False)"""
+    global _shared_history
+
+    if not Config.ODDS_HISTORY_ENABLED:
+        return None
+
+    with _shared_lock:
+        if _shared_history is None:
+            _shared_history = OddsHistory()
+        return _shared_history
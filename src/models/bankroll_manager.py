@@ -1,3 +1,4 @@
+import numpy as np
 from config.config import Config
 from typing import Dict, Tuple
 
@@ -65,6 +66,26 @@ class BankrollManager:
         
         return round((stake_pct / 100) * self.bankroll, 2)
     
+    def calculate_stakes(self, probabilities, odds) -> np.ndarray:
+        """Versão vetorizada de calculate_stake (mesmas regras, arrays de entrada)"""
+        phase_info = self.get_phase_info()
+        max_stake_pct = phase_info['max_stake_pct']
+        
+        probabilities = np.asarray(probabilities, dtype=float)
+        odds = np.asarray(odds, dtype=float)
+        
+        # Kelly fracionado conservador
+        kelly_fraction = 0.25 if self.phase == 'consolidation' else 0.5
+        edge = (probabilities * odds) - 1
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            kelly_stake_pct = (edge / (odds - 1)) * kelly_fraction * 100
+        
+        # Limita ao máximo da fase
+        stake_pct = np.minimum(kelly_stake_pct, max_stake_pct)
+        
+        return np.where(edge > 0, np.round((stake_pct / 100) * self.bankroll, 2), 0.0)
+    
     def check_phase_completion(self) -> Tuple[bool, float]:
         """Verifica se atingiu meta da fase e retorna valor pra sacar"""
         if self.phase == 'consolidation':
@@ -0,0 +1,236 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from src.models.records import Event
+
+
+class OddsMatrix:
+    """
+    Matriz densa de odds de uma resposta da The Odds API: eventos × resultados × casas
+
+    Resultados (chaves no formato de OddsAPI._format_odds):
+        home_ml / draw / away_ml          (h2h)
+        over_{linha} / under_{linha}      (totals)
+        spread_{linha} / spread_away_{linha}  (spreads, linha do ponto de vista do lado)
+
+    Resultados complementares formam um grupo (1X2, Over/Under da mesma linha,
+    handicap do mandante e do visitante na linha oposta). Melhor preço, média,
+    dispersão entre casas e probabilidade de consenso sem margem (no-vig) são
+    calculados de uma vez com NumPy; NaN = casa sem cotação.
+    """
+
+    def __init__(self, event_ids: List[str], outcomes: List[str], bookmakers: List[str],
+                 prices: np.ndarray, groups: np.ndarray):
+        self.event_ids = event_ids
+        self.outcomes = outcomes
+        self.bookmakers = bookmakers
+        self.prices = prices    # (E, O, B)
+        self.groups = groups    # (O,) grupo de cada resultado
+
+        self._outcome_index = {key: i for i, key in enumerate(outcomes)}
+        self.group_size = np.bincount(groups) if len(groups) else np.zeros(0, dtype=int)
+        self._membership = np.eye(len(self.group_size))[groups]  # (O, G)
+
+    @staticmethod
+    def outcome_group(key: str) -> Optional[str]:
+        """Grupo de resultados complementares da chave (None = mercado fora da matriz)"""
+        try:
+            if key in ('home_ml', 'draw', 'away_ml'):
+                return 'h2h'
+            if key.startswith(('over_', 'under_')):
+                return f"totals_{float(key.split('_', 1)[1])}"
+            if key.startswith('spread_away_'):
+                return f"spreads_{-float(key[len('spread_away_'):]) + 0.0}"
+            if key.startswith('spread_'):
+                return f"spreads_{float(key[len('spread_'):])}"
+        except ValueError:
+            pass
+        return None
+
+    @staticmethod
+    def outcome_key(market_key: str, outcome_name: str, point: Optional[float],
+                    home_team: Optional[str]) -> Optional[str]:
+        """
+        Chave do resultado de uma cotação bruta do /odds (None = mercado fora da matriz)
+
+        Mesma nomenclatura em todo o pipeline: odds formatadas, oportunidades
+        e histórico de odds (src/database/odds_history.py).
+        """
+        if market_key == "h2h":
+            if outcome_name == "Draw":
+                return "draw"
+            return "home_ml" if outcome_name == home_team else "away_ml"
+        if market_key == "totals" and outcome_name in ("Over", "Under"):
+            point = 2.5 if point is None else point
+            return f"{outcome_name.lower()}_{point}"
+        if market_key == "spreads" and point is not None:
+            prefix = "spread" if outcome_name == home_team else "spread_away"
+            return f"{prefix}_{point}"
+        return None
+
+    @classmethod
+    def from_events(cls, events: List[Dict]) -> "OddsMatrix":
+        """Monta a matriz a partir da resposta bruta do endpoint /odds"""
+        cells = []
+
+        for e, event in enumerate(events):
+            home_team = event.get("home_team")
+
+            for bookmaker in event.get("bookmakers", []):
+                name = bookmaker.get("title", "Unknown")
+
+                for market in bookmaker.get("markets", []):
+                    market_key = market.get("key")
+
+                    for outcome in market.get("outcomes", []):
+                        price = outcome.get("price")
+                        if price is None:
+                            continue
+
+                        key = cls.outcome_key(market_key, outcome.get("name"), outcome.get("point"), home_team)
+                        if key is not None:
+                            cells.append((e, key, name, price))
+
+        return cls._from_cells([event.get("id") for event in events], cells)
+
+    @classmethod
+    def from_formatted(cls, games: List[Dict]) -> "OddsMatrix":
+        """
+        Monta a matriz a partir de jogos já formatados (OddsAPI._format_odds / cache)
+
+        Só há o melhor preço de cada resultado: cada célula fica na casa que o oferece.
+        """
+        cells = []
+
+        for e, game in enumerate(games):
+            for key, quote in Event.from_dict(game).markets.items():
+                if quote.odd is not None:
+                    cells.append((e, key, quote.bookmaker, quote.odd))
+
+        return cls._from_cells([game.get('match_id') for game in games], cells)
+
+    @classmethod
+    def _from_cells(cls, event_ids: List[str], cells: List[Tuple]) -> "OddsMatrix":
+        """Monta a matriz a partir de (evento, chave do resultado, casa, preço)"""
+        outcomes, groups, bookmakers = {}, {}, {}
+        group_ids = {}
+        indexed = []
+
+        for e, key, bookmaker, price in cells:
+            if key not in outcomes:
+                group = cls.outcome_group(key)
+                if group is None:
+                    continue
+                outcomes[key] = len(outcomes)
+                groups[key] = group_ids.setdefault(group, len(group_ids))
+
+            b = bookmakers.setdefault(bookmaker, len(bookmakers))
+            indexed.append((e, outcomes[key], b, price))
+
+        prices = np.full((len(event_ids), len(outcomes), len(bookmakers)), np.nan)
+        if indexed:
+            e_idx, o_idx, b_idx, values = zip(*indexed)
+            prices[list(e_idx), list(o_idx), list(b_idx)] = values
+
+        return cls(
+            event_ids,
+            list(outcomes),
+            list(bookmakers),
+            prices,
+            np.array([groups[key] for key in outcomes], dtype=int)
+        )
+
+    # =========================
+    # 🔹 ESTATÍSTICAS POR RESULTADO (E, O)
+    # =========================
+    @property
+    def quoted(self) -> np.ndarray:
+        """Casas com cotação para cada (evento, resultado)"""
+        return (~np.isnan(self.prices)).sum(axis=2)
+
+    def best_prices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Melhor preço e índice da casa que o oferece (NaN / -1 sem cotação)"""
+        if not self.bookmakers:
+            shape = self.prices.shape[:2]
+            return np.full(shape, np.nan), np.full(shape, -1)
+
+        filled = np.where(np.isnan(self.prices), -np.inf, self.prices)
+        best_bookmaker = filled.argmax(axis=2)
+        best = np.take_along_axis(filled, best_bookmaker[..., None], axis=2)[..., 0]
+
+        missing = np.isinf(best)
+        return np.where(missing, np.nan, best), np.where(missing, -1, best_bookmaker)
+
+    def mean_prices(self) -> np.ndarray:
+        count = self.quoted
+        total = np.nansum(self.prices, axis=2)
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+    def price_spread(self) -> np.ndarray:
+        """Dispersão entre casas (maior - menor preço)"""
+        best, _ = self.best_prices()
+        worst = np.where(np.isnan(self.prices), np.inf, self.prices).min(axis=2) if self.bookmakers else best
+        return np.where(np.isnan(best), np.nan, best - worst)
+
+    def _group_sums(self, values: np.ndarray) -> np.ndarray:
+        """Soma de values (E, O, B) por grupo de resultados → (E, G, B)"""
+        return np.einsum('eob,og->egb', values, self._membership)
+
+    def sum_by_group(self, values: np.ndarray) -> np.ndarray:
+        """Soma de values (E, O) por grupo de resultados → (E, G)"""
+        return values @ self._membership
+
+    def group_outcomes(self, group: int) -> np.ndarray:
+        """Índices dos resultados de um grupo"""
+        return np.flatnonzero(self.groups == group)
+
+    def consensus(self) -> np.ndarray:
+        """
+        Probabilidade de consenso sem margem (E, O)
+
+        Cada casa com o grupo completo (ex: Over e Under da linha) tem a margem
+        removida (1/odd normalizado no grupo); o consenso é a média entre as
+        casas, renormalizada para o grupo somar 1. NaN sem casa completa.
+        """
+        if not self.outcomes or not self.bookmakers:
+            return np.full(self.prices.shape[:2], np.nan)
+
+        quoted = ~np.isnan(self.prices)
+        implied = np.where(quoted, 1.0 / np.where(quoted, self.prices, 1.0), 0.0)
+
+        complete = self._group_sums(quoted.astype(float)) == self.group_size[None, :, None]  # (E, G, B)
+        overround = self._group_sums(implied)
+
+        fair_mask = complete[:, self.groups, :] & quoted
+        fair = np.where(fair_mask, implied / np.where(fair_mask, overround[:, self.groups, :], 1.0), 0.0)
+
+        books = fair_mask.sum(axis=2)
+        mean_fair = np.where(books > 0, fair.sum(axis=2) / np.maximum(books, 1), 0.0)
+
+        # Renormaliza no grupo (médias de casas diferentes não somam 1 exatamente)
+        group_total = (mean_fair @ self._membership)[:, self.groups]
+        return np.where(books > 0, mean_fair / np.where(group_total > 0, group_total, 1.0), np.nan)
+
+    def margins(self) -> np.ndarray:
+        """Margem (overround) de cada casa por grupo (E, G, B); NaN com grupo incompleto"""
+        quoted = ~np.isnan(self.prices)
+        implied = np.where(quoted, 1.0 / np.where(quoted, self.prices, 1.0), 0.0)
+        complete = self._group_sums(quoted.astype(float)) == self.group_size[None, :, None]
+        return np.where(complete, self._group_sums(implied) - 1.0, np.nan)
+
+    def outliers(self, max_edge: float, min_books: int = 3) -> np.ndarray:
+        """
+        Preços fora da curva (E, O, B): acima do preço justo do consenso por mais
+        de max_edge (ex: 0.10 = 10%), com pelo menos min_books casas cotando.
+        Costumam ser linhas paradas (stale) de uma casa que ainda não acompanhou o mercado.
+        """
+        consensus = self.consensus()
+        edge = self.prices * consensus[..., None] - 1.0
+        enough = (self.quoted >= min_books)[..., None]
+        return (np.nan_to_num(edge, nan=-1.0) > max_edge) & enough
+
+    # =========================
+    # 🔹 ACESSO
+    # =========================
+    def outcome(self, key: str) -> int:
+        return self._outcome_index[key]
@@ -1,29 +1,34 @@
 import numpy as np
 from typing import Dict, Tuple
-from scipy.stats import poisson
+from src.models.score_matrix import ScoreMatrix, poisson_pmf, settle_weights
 
 class ProbabilityModel:
     """Calcula probabilidades para diferentes mercados usando Poisson"""
     
+    # Mercados aceitos por evaluate_markets
+    # (margem usada, sinal, linha fixa ou None = usa lines)
+    BATCH_MARKETS = {
+        'over': ('total', 1, None),       # Over line (gols > line)
+        'under': ('total', -1, None),     # Under line
+        'home': ('diff', 1, None),        # Handicap asiático do mandante
+        'away': ('diff', -1, None),       # Handicap asiático do visitante
+        'home_ml': ('diff', 1, -0.5),     # 1
+        'away_ml': ('diff', -1, -0.5),    # 2
+        'draw': ('diff', 0, None),        # X
+        'btts_yes': ('btts', 1, None),
+        'btts_no': ('btts', -1, None),
+    }
+    
     def __init__(self):
         self.home_advantage = 1.0
     
+    def score_matrix(self, home_lambda: float, away_lambda: float) -> ScoreMatrix:
+        """Matriz de placares do jogo (montar 1x e reutilizar em todos os mercados)"""
+        return ScoreMatrix(home_lambda * self.home_advantage, away_lambda)
+    
     def calculate_over_under(self, home_avg: float, away_avg: float, line: float) -> Dict:
         """Calcula probabilidade de Over/Under X.5 gols"""
-        home_expected = home_avg * self.home_advantage
-        away_expected = away_avg
-        
-        total_expected = home_expected + away_expected
-        
-        # Probabilidade de over usando Poisson
-        prob_under = sum([poisson.pmf(i, total_expected) for i in range(int(line) + 1)])
-        prob_over = 1 - prob_under
-        
-        return {
-            'prob_over': round(prob_over, 4),
-            'prob_under': round(prob_under, 4),
-            'expected_goals': round(total_expected, 2)
-        }
+        return self.score_matrix(home_avg, away_avg).over_under(line)
     
     def calculate_btts_from_lambdas(self, home_lambda: float, away_lambda: float) -> float:
         """
@@ -36,16 +41,8 @@ class ProbabilityModel:
         Returns:
             Probabilidade de ambos marcarem
         """
-        from scipy.stats import poisson
-        
-        # P(casa marcar) = 1 - P(casa fazer 0 gols)
-        home_score_prob = 1 - poisson.pmf(0, home_lambda)
-        
-        # P(visitante marcar) = 1 - P(visitante fazer 0 gols)
-        away_score_prob = 1 - poisson.pmf(0, away_lambda)
-        
         # P(ambos marcarem) = P(casa marcar) * P(visitante marcar)
-        btts_prob = home_score_prob * away_score_prob
+        btts_prob = ScoreMatrix(home_lambda, away_lambda).btts()['yes']
         
         return round(btts_prob, 4)
     
@@ -67,35 +64,109 @@ class ProbabilityModel:
         return False, ev
     def calculate_handicap(self, home_avg: float, away_avg: float, line: float) -> Dict:
         """
-        Calcula probabilidade de handicap/spread
-        line: handicap (ex: -1.5 para home, +1.5 para away)
+        Calcula probabilidade de handicap asiático (exata, pela matriz de placares)
+        line: handicap do mandante (ex: -1.5, -0.25, 0.0, +0.75)
+        
+        Linhas inteiras e de 1/4 têm devolução (prob_push); para EV use
+        ScoreMatrix.effective_probability com a odd do mercado.
         """
-        # Estima diferença esperada de gols
-        expected_diff = home_avg - away_avg
-        
-        # Probabilidade do home cobrir o handicap
-        # Se line = -1.5, home precisa ganhar por 2+ gols
-        # Se expected_diff > line, favorece home
-        
-        # Modelo simplificado baseado em distribuição normal
-        # Em produção, usar simulação de Monte Carlo
-        margin = expected_diff - line
-        
-        # Converte margem em probabilidade (aproximação)
-        if margin > 1.5:
-            prob_home = 0.75
-        elif margin > 0.5:
-            prob_home = 0.65
-        elif margin > -0.5:
-            prob_home = 0.55
-        elif margin > -1.5:
-            prob_home = 0.45
-        else:
-            prob_home = 0.35
+        settlement = self.score_matrix(home_avg, away_avg).asian_handicap(line)
         
         return {
-            'prob_home_cover': prob_home,
-            'prob_away_cover': 1 - prob_home,
-            'expected_diff': expected_diff,
+            'prob_home_cover': round(settlement['win'], 4),
+            'prob_push': round(settlement['push'], 4),
+            'prob_away_cover': round(settlement['lose'], 4),
+            'expected_diff': home_avg - away_avg,
             'line': line
-        }
\ No newline at end of file
+        }
+    
+    def evaluate_markets(self, home_lambdas, away_lambdas, match_idx, market_types,
+                         lines, odds, min_ev, bankroll_manager=None,
+                         max_goals: int = ScoreMatrix.MAX_GOALS) -> Dict[str, np.ndarray]:
+        """
+        Avalia o slate inteiro (jogo × mercado × linha) em uma passada NumPy
+        
+        Args:
+            home_lambdas, away_lambdas: gols esperados por jogo (n_jogos)
+            match_idx: jogo de cada linha (n_linhas)
+            market_types: tipo de mercado de cada linha (chaves de BATCH_MARKETS)
+            lines: linha de cada mercado (ignorada em 1X2/BTTS)
+            odds: odd oferecida de cada linha
+            min_ev: EV mínimo (%) - escalar ou por linha
+            bankroll_manager: se informado, calcula stakes (Kelly fracionado)
+        
+        Returns:
+            {'probability', 'ev', 'valid', 'stake'} - arrays alinhados com as linhas
+            (probability já considera devolução em linhas inteiras / 1/4)
+        """
+        match_idx = np.asarray(match_idx, dtype=int)
+        market_types = np.asarray(market_types)
+        lines = np.asarray(lines, dtype=float)
+        odds = np.asarray(odds, dtype=float)
+        min_ev = np.broadcast_to(np.asarray(min_ev, dtype=float), odds.shape)
+        
+        # 1. Distribuições por jogo: total de gols e saldo (a partir da matriz conjunta)
+        goals = np.arange(max_goals + 1)
+        home_pmf = poisson_pmf(goals, np.asarray(home_lambdas, dtype=float) * self.home_advantage)
+        away_pmf = poisson_pmf(goals, np.asarray(away_lambdas, dtype=float))
+        matrices = home_pmf[:, :, None] * away_pmf[:, None, :]
+        
+        flat = matrices.reshape(len(matrices), -1)
+        margins = np.arange(-max_goals, 2 * max_goals + 1)
+        total_idx = (goals[:, None] + goals[None, :]).ravel() + max_goals
+        diff_idx = (goals[:, None] - goals[None, :]).ravel() + max_goals
+        
+        distributions = {
+            'total': np.zeros((len(flat), len(margins))),
+            'diff': np.zeros((len(flat), len(margins)))
+        }
+        np.add.at(distributions['total'].T, total_idx, flat.T)
+        np.add.at(distributions['diff'].T, diff_idx, flat.T)
+        btts_yes = (1 - home_pmf[:, 0]) * (1 - away_pmf[:, 0])
+        
+        # 2. Probabilidade de acerto / devolução por linha, agrupando por tipo de mercado
+        win = np.zeros(len(odds))
+        push = np.zeros(len(odds))
+        
+        for market in np.unique(market_types):
+            if market not in self.BATCH_MARKETS:
+                raise ValueError(f"Mercado não suportado: {market}")
+            
+            margin_kind, sign, fixed_line = self.BATCH_MARKETS[market]
+            rows = market_types == market
+            matches = match_idx[rows]
+            
+            if margin_kind == 'btts':
+                win[rows] = btts_yes[matches] if sign > 0 else 1 - btts_yes[matches]
+                continue
+            
+            dist = distributions[margin_kind][matches]
+            
+            if sign == 0:
+                # Empate: saldo == 0
+                win[rows] = dist[:, margins == 0][:, 0]
+                continue
+            
+            row_lines = np.full(rows.sum(), fixed_line) if fixed_line is not None else lines[rows]
+            if market == 'over':
+                row_lines = -row_lines
+            
+            w, p = settle_weights(margins[None, :], row_lines[:, None], sign)
+            win[rows] = (dist * w).sum(axis=1)
+            push[rows] = (dist * p).sum(axis=1)
+        
+        # 3. EV e validação (mesmas regras de validate_opportunity)
+        probability = np.round(win + push / odds, 4)
+        ev = np.round((probability * odds - 1) * 100, 2)
+        valid = (ev >= min_ev) & (probability > 1 / odds)
+        
+        result = {
+            'probability': probability,
+            'ev': ev,
+            'valid': valid
+        }
+        
+        if bankroll_manager is not None:
+            result['stake'] = bankroll_manager.calculate_stakes(probability, odds)
+        
+        return result
@@ -0,0 +1,185 @@
+"""
+Registros tipados e compactos (dataclasses com __slots__) do pipeline
+
+- MarketQuote: preço de um resultado (odd + casa)
+- Event: jogo com odds formatadas (OddsAPI._format_odds)
+- Opportunity: oportunidade de aposta
+- OpportunityFrame: oportunidades em colunas NumPy (validação em lote)
+
+O formato em dict (cache, API, cache diário) continua o mesmo: from_dict/to_dict
+convertem na borda; dentro do pipeline os campos são atributos.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class MarketQuote:
+    """Preço de um resultado (melhor odd e a casa que a oferece)"""
+
+    odd: float
+    bookmaker: str = 'Unknown'
+
+    @classmethod
+    def from_value(cls, value: Any) -> "MarketQuote":
+        """Aceita {'odd', 'bookmaker'} ou só a odd (dados simulados / cache antigo)"""
+        if isinstance(value, dict):
+            return cls(value.get('odd'), value.get('bookmaker') or 'Unknown')
+        return cls(value)
+
+    def to_dict(self) -> Dict:
+        return {'odd': self.odd, 'bookmaker': self.bookmaker}
+
+
+@dataclass(slots=True)
+class Event:
+    """Jogo com odds por resultado, consenso sem margem e preços parados"""
+
+    home_team: str
+    away_team: str
+    commence_time: Optional[str] = None
+    league: Optional[str] = None
+    match_id: Optional[str] = None
+    markets: Dict[str, MarketQuote] = field(default_factory=dict)
+    consensus: Dict[str, float] = field(default_factory=dict)
+    stale: FrozenSet[str] = frozenset()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Event":
+        return cls(
+            home_team=data.get('home_team'),
+            away_team=data.get('away_team'),
+            commence_time=data.get('commence_time'),
+            league=data.get('league'),
+            match_id=data.get('match_id'),
+            markets={key: MarketQuote.from_value(value) for key, value in data.get('markets', {}).items()},
+            consensus=data.get('consensus', {}),
+            stale=frozenset(data.get('stale', ()))
+        )
+
+    def to_dict(self) -> Dict:
+        """Formato do cache de odds (OddsAPI)"""
+        return {
+            'match_id': self.match_id,
+            'home_team': self.home_team,
+            'away_team': self.away_team,
+            'commence_time': self.commence_time,
+            'league': self.league,
+            'markets': {key: quote.to_dict() for key, quote in self.markets.items()},
+            'consensus': self.consensus,
+            'stale': sorted(self.stale)
+        }
+
+
+@dataclass(slots=True)
+class Opportunity:
+    """Oportunidade de aposta (campos opcionais ficam fora do dict quando None)"""
+
+    match: str
+    competition: str
+    date: str
+    market: str
+    odds: float
+    probability: float
+    ev: float
+    stake: float
+    potential_return: float
+    phase: int
+    bookmaker: Optional[str] = None
+    consensus_probability: Optional[float] = None
+    stale_price: Optional[bool] = None
+    event_id: Optional[str] = None
+    outcome: Optional[str] = None
+
+    # event_id/outcome: chave do histórico de odds (OddsHistory.movement(event_id, outcome))
+    _OPTIONAL = ('bookmaker', 'consensus_probability', 'stale_price', 'event_id', 'outcome')
+
+    _PRICED = ('market', 'odds', 'probability', 'ev', 'stake')
+
+    @classmethod
+    def is_priced(cls, data: Dict) -> bool:
+        """Registro com mercado/odd/EV/stake (análises sem preço, como as de tênis, ficam de fora)"""
+        return all(data.get(name) is not None for name in cls._PRICED)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Opportunity":
+        return cls(
+            match=data['match'],
+            competition=data.get('competition', 'N/A'),
+            date=data.get('date', ''),
+            market=data['market'],
+            odds=data['odds'],
+            probability=data['probability'],
+            ev=data['ev'],
+            stake=data['stake'],
+            potential_return=data.get('potential_return', 0.0),
+            phase=data.get('phase', 1),
+            bookmaker=data.get('bookmaker'),
+            consensus_probability=data.get('consensus_probability'),
+            stale_price=data.get('stale_price'),
+            event_id=data.get('event_id'),
+            outcome=data.get('outcome')
+        )
+
+    def to_dict(self) -> Dict:
+        """Formato da API e do cache diário"""
+        data = {
+            'match': self.match,
+            'competition': self.competition,
+            'date': self.date,
+            'market': self.market,
+            'odds': self.odds,
+            'bookmaker': self.bookmaker,
+            'probability': self.probability,
+            'ev': self.ev,
+            'stake': self.stake,
+            'potential_return': self.potential_return,
+            'phase': self.phase,
+            'consensus_probability': self.consensus_probability,
+            'stale_price': self.stale_price,
+            'event_id': self.event_id,
+            'outcome': self.outcome
+        }
+        for name in self._OPTIONAL:
+            if data[name] is None:
+                del data[name]
+        return data
+
+    def to_context(self) -> Dict:
+        """Formato enxuto para o contexto do LLM"""
+        return {
+            'match': self.match,
+            'date': self.date,
+            'market': self.market,
+            'odds': self.odds,
+            'probability': round(self.probability, 4),
+            'ev': round(self.ev, 2),
+            'stake': self.stake
+        }
+
+
+@dataclass(slots=True)
+class OpportunityFrame:
+    """Colunas numéricas de um lote de oportunidades (mesma ordem da lista de origem)"""
+
+    odds: np.ndarray
+    probability: np.ndarray
+    ev: np.ndarray
+    stake: np.ndarray
+
+    @classmethod
+    def from_dicts(cls, opportunities: List[Dict]) -> "OpportunityFrame":
+        if not opportunities:
+            empty = np.zeros(0)
+            return cls(empty, empty, empty, empty)
+
+        columns = np.array(
+            [(opp['odds'], opp['probability'], opp['ev'], opp['stake']) for opp in opportunities],
+            dtype=float
+        )
+        return cls(columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3])
+
+    def __len__(self) -> int:
+        return len(self.odds)
@@ -1,3 +1,4 @@
+import numpy as np
 from typing import Dict, Tuple, List
 from datetime import datetime, timedelta
 
@@ -12,18 +13,31 @@ class RiskManager:
     
     def check_daily_limit(self, new_stake: float) -> Tuple[bool, str]:
         """Verifica se pode apostar mais hoje"""
+        today_total = self._today_total()
+        max_daily = self._max_daily()
+        
+        if (today_total + new_stake) > max_daily:
+            return False, f"Limite diário atingido (R$ {today_total:.2f} / R$ {max_daily:.2f})"
+        
+        return True, ""
+    
+    def daily_limit_mask(self, stakes: np.ndarray) -> np.ndarray:
+        """check_daily_limit para um lote de stakes (cada um avaliado isoladamente)"""
+        return self._today_total() + np.asarray(stakes, dtype=float) <= self._max_daily()
+    
+    def _today_total(self) -> float:
+        """Exposição de hoje (descarta stakes de dias anteriores)"""
         today = datetime.now().date()
         
-        # Remove stakes de dias anteriores
         self.daily_stakes = [
             s for s in self.daily_stakes 
             if datetime.fromisoformat(s['date']).date() == today
         ]
         
-        # Calcula exposição de hoje
-        today_total = sum(s['stake'] for s in self.daily_stakes)
-        
-        # Define limite por fase
+        return sum(s['stake'] for s in self.daily_stakes)
+    
+    def _max_daily(self) -> float:
+        """Limite diário de exposição da fase"""
         daily_limits = {
             1: 0.50,  # 50% da banca
             2: 0.40,  # 40%
@@ -34,12 +48,7 @@ class RiskManager:
         
         phase_key = self.phase if self.phase != 'consolidation' else 'consolidation'
         limit_pct = daily_limits.get(phase_key, 0.50)
-        max_daily = self.bankroll * limit_pct
-        
-        if (today_total + new_stake) > max_daily:
-            return False, f"Limite diário atingido (R$ {today_total:.2f} / R$ {max_daily:.2f})"
-        
-        return True, ""
+        return self.bankroll * limit_pct
     
     def check_max_simultaneous(self, pending_count: int) -> Tuple[bool, str]:
         """Verifica número máximo de apostas simultâneas"""
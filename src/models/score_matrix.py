@@ -0,0 +1,170 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from scipy.special import gammaln
+
+
+def poisson_pmf(goals: np.ndarray, lam) -> np.ndarray:
+    """PMF de Poisson vetorizada (lam escalar ou array → broadcast no último eixo)"""
+    lam = np.asarray(lam, dtype=float)[..., None]
+    safe_lam = np.where(lam > 0, lam, 1.0)
+    pmf = np.exp(goals * np.log(safe_lam) - safe_lam - gammaln(goals + 1))
+    # λ = 0 → sempre 0 gols
+    return np.where(lam > 0, pmf, (goals == 0).astype(float))
+
+
+def split_line(line):
+    """
+    Divide linha asiática em duas meias apostas (escalar ou array)
+    Ex: -0.25 → (-0.5, 0.0) | 2.75 → (2.5, 3.0) | 2.5 → (2.5, 2.5)
+    """
+    line = np.asarray(line, dtype=float)
+    quarter = np.round(line * 4) % 2 != 0
+    return np.where(quarter, line - 0.25, line), np.where(quarter, line + 0.25, line)
+
+
+def settle_weights(margin: np.ndarray, line, sign=1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pesos de acerto e devolução de cada placar para uma linha (incluindo 1/4)
+
+    O mercado ganha quando sign * margin + line > 0 (handicap: margin = saldo;
+    totals: margin = total de gols, line negativa para Over).
+    Linhas de 1/4 são duas meias apostas: cada metade pesa 0.5.
+    line/sign podem ser arrays (broadcast com margin).
+
+    Returns:
+        (win, push) no formato do broadcast
+    """
+    win = 0.0
+    push = 0.0
+
+    for half in split_line(line):
+        x = sign * margin + half
+        win = win + 0.5 * (x > 0)
+        push = push + 0.5 * (x == 0)
+
+    return win, push
+
+
+class ScoreMatrix:
+    """
+    Matriz conjunta de placares (casa × fora) de um jogo, via Poisson independente
+
+    Monta a matriz uma única vez com NumPy; todos os mercados do jogo viram
+    reduções baratas sobre ela (totals, handicaps asiático/europeu, BTTS,
+    1X2 e placar exato), sem chamadas repetidas ao scipy.
+    """
+
+    MAX_GOALS = 20
+
+    _grids: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def __init__(self, home_lambda: float, away_lambda: float, max_goals: int = MAX_GOALS):
+        self.home_lambda = home_lambda
+        self.away_lambda = away_lambda
+        self.max_goals = max_goals
+
+        goals, self.total_goals, self.goal_diff = self._grid(max_goals)
+        self.home_pmf = poisson_pmf(goals, home_lambda)
+        self.away_pmf = poisson_pmf(goals, away_lambda)
+        self.matrix = np.outer(self.home_pmf, self.away_pmf)
+
+    @classmethod
+    def _grid(cls, max_goals: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Gols, total e saldo de cada placar (compartilhados entre jogos)"""
+        if max_goals not in cls._grids:
+            goals = np.arange(max_goals + 1)
+            cls._grids[max_goals] = (
+                goals,
+                goals[:, None] + goals[None, :],
+                goals[:, None] - goals[None, :]
+            )
+        return cls._grids[max_goals]
+
+    @property
+    def expected_goals(self) -> float:
+        return self.home_lambda + self.away_lambda
+
+    def _settle(self, margin: np.ndarray, line: float, sign: int = 1) -> Dict:
+        """Probabilidades de ganhar / devolver / perder (linhas de 1/4 incluídas)"""
+        win, push = settle_weights(margin, line, sign)
+        prob_win = float((self.matrix * win).sum())
+        prob_push = float((self.matrix * push).sum())
+
+        return {
+            'win': prob_win,
+            'push': prob_push,
+            'lose': max(0.0, 1.0 - prob_win - prob_push)
+        }
+
+    @staticmethod
+    def effective_probability(settlement: Dict, odds: float) -> float:
+        """
+        Probabilidade equivalente para EV/Kelly quando há devolução (push)
+        EV = win * odds + push - 1  →  p_eq = win + push / odds
+        """
+        return settlement['win'] + settlement['push'] / odds
+
+    # =========================
+    # 🔹 MERCADOS
+    # =========================
+    def totals(self, line: float) -> Dict:
+        """Over/Under (qualquer linha, incluindo .0, .25 e .75)"""
+        return {
+            'over': self._settle(self.total_goals, -line, sign=1),
+            'under': self._settle(self.total_goals, line, sign=-1)
+        }
+
+    def over_under(self, line: float) -> Dict:
+        """Over/Under no formato do ProbabilityModel.calculate_over_under"""
+        totals = self.totals(line)
+
+        return {
+            'prob_over': round(totals['over']['win'], 4),
+            'prob_under': round(totals['under']['win'], 4),
+            'prob_push': round(totals['over']['push'], 4),
+            'expected_goals': round(self.expected_goals, 2)
+        }
+
+    def asian_handicap(self, line: float, side: str = 'home') -> Dict:
+        """Handicap asiático exato (line do ponto de vista de side)"""
+        sign = 1 if side == 'home' else -1
+        return self._settle(self.goal_diff, line, sign=sign)
+
+    def european_handicap(self, line: int) -> Dict:
+        """Handicap europeu (3 vias) com line inteira aplicada ao mandante"""
+        adjusted = self.goal_diff + line
+
+        return {
+            'home': float(self.matrix[adjusted > 0].sum()),
+            'draw': float(self.matrix[adjusted == 0].sum()),
+            'away': float(self.matrix[adjusted < 0].sum())
+        }
+
+    def match_result(self) -> Dict:
+        """1X2"""
+        return self.european_handicap(0)
+
+    def btts(self) -> Dict:
+        """Ambas marcam (sim/não)"""
+        yes = float((1 - self.home_pmf[0]) * (1 - self.away_pmf[0]))
+
+        return {
+            'yes': yes,
+            'no': 1.0 - yes
+        }
+
+    def correct_score(self, home_goals: int, away_goals: int) -> float:
+        """Probabilidade de um placar exato"""
+        if home_goals > self.max_goals or away_goals > self.max_goals:
+            return 0.0
+        return float(self.matrix[home_goals, away_goals])
+
+    def most_likely_scores(self, top_n: int = 5) -> List[Dict]:
+        """Placares mais prováveis"""
+        flat = np.argsort(self.matrix, axis=None)[::-1][:top_n]
+        home_goals, away_goals = np.unravel_index(flat, self.matrix.shape)
+
+        return [
+            {'score': f"{h}-{a}", 'probability': round(float(self.matrix[h, a]), 4)}
+            for h, a in zip(home_goals.tolist(), away_goals.tolist())
+        ]
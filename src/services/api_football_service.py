@@ -2,7 +2,11 @@ import requests
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from config.config import Config
-from src.cache.redis_client import RedisCache
+from src.cache.redis_client import get_shared_cache
+from src.utils.instrumentation import record_response
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class APIFootballService:
@@ -11,7 +15,7 @@ class APIFootballService:
     def __init__(self):
         self.api_key = Config.API_FOOTBALL_KEY
         self.base_url = Config.API_FOOTBALL_BASE_URL
-        self.cache = RedisCache()
+        self.cache = get_shared_cache()
     
     def get_fixtures_by_date(self, date: str) -> List[Dict]:
         """
@@ -21,15 +25,23 @@ class APIFootballService:
         """
         cache_key = f"api_football_fixtures_{date}"
         
-        # Verifica cache
-        cached = self.cache.get(cache_key)
-        if cached:
-            print(f"📦 Usando cache (API-Football {date})")
-            return cached
-        
         if not self.api_key:
-            return []
+            return self.cache.get(cache_key) or []
         
+        try:
+            # Single-flight + cache por 6 horas (atualizado em segundo plano após CACHE_SOFT_TTL_FIXTURES)
+            return self.cache.get_or_fetch(
+                cache_key,
+                lambda: self._fetch_fixtures(date),
+                expire_seconds=21600,
+                soft_ttl=Config.CACHE_SOFT_TTL_FIXTURES
+            )
+        except Exception as e:
+            logger.warning("❌ Erro ao buscar fixtures da API-Football: %s", e)
+            return []
+    
+    def _fetch_fixtures(self, date: str) -> List[Dict]:
+        """Busca e formata os jogos da data na API-Football (sem cache)"""
         url = f"{self.base_url}/fixtures"
         headers = {
             'x-apisports-key': self.api_key
@@ -38,28 +50,22 @@ class APIFootballService:
             'date': date
         }
         
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            fixtures = self._format_fixtures(data.get('response', []))
-            
-            # Cache por 6 horas
-            self.cache.set(cache_key, fixtures, expire_seconds=21600)
-            
-            return fixtures
-            
-        except Exception as e:
-            print(f"❌ Erro ao buscar fixtures da API-Football: {e}")
-            return []
+        response = requests.get(url, headers=headers, params=params, timeout=30)
+        record_response('api_football', response)
+        response.raise_for_status()
+        data = response.json()
+        
+        return self._format_fixtures(data.get('response', []))
     
     def get_fixtures_next_days(self, days: int = 3) -> List[Dict]:
         """Busca jogos dos próximos N dias"""
         all_fixtures = []
+        dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+        
+        # Cache de todas as datas em 1 round-trip
+        self.cache.get_many([f"api_football_fixtures_{date}" for date in dates])
         
-        for i in range(days):
-            date = (datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d')
+        for date in dates:
             fixtures = self.get_fixtures_by_date(date)
             all_fixtures.extend(fixtures)
         
@@ -92,6 +98,7 @@ class APIFootballService:
         
         try:
             response = requests.get(url, headers=headers, params=params, timeout=30)
+            record_response('api_football', response)
             response.raise_for_status()
             data = response.json()
             
@@ -106,7 +113,7 @@ class APIFootballService:
             return stats
             
         except Exception as e:
-            print(f"⚠️ Erro ao buscar estatísticas do time {team_id}: {e}")
+            logger.warning("⚠️ Erro ao buscar estatísticas do time %s: %s", team_id, e)
             return None
     
     def get_team_form(self, team_id: int, last_n_games: int = 5) -> List[str]:
@@ -135,6 +142,7 @@ class APIFootballService:
         
         try:
             response = requests.get(url, headers=headers, params=params, timeout=30)
+            record_response('api_football', response)
             response.raise_for_status()
             data = response.json()
             
@@ -150,7 +158,7 @@ class APIFootballService:
             return form
             
         except Exception as e:
-            print(f"⚠️ Erro ao buscar forma do time {team_id}: {e}")
+            logger.warning("⚠️ Erro ao buscar forma do time %s: %s", team_id, e)
             return ['D'] * last_n_games
     
     def get_head_to_head(self, team1_id: int, team2_id: int, last_n: int = 5) -> Dict:
@@ -179,6 +187,7 @@ class APIFootballService:
         
         try:
             response = requests.get(url, headers=headers, params=params, timeout=30)
+            record_response('api_football', response)
             response.raise_for_status()
             data = response.json()
             
@@ -190,7 +199,7 @@ class APIFootballService:
             return h2h_stats
             
         except Exception as e:
-            print(f"⚠️ Erro ao buscar H2H: {e}")
+            logger.warning("⚠️ Erro ao buscar H2H: %s", e)
             return {'team1_wins': 0, 'team2_wins': 0, 'draws': 0}
     
     def _format_fixtures(self, fixtures: List[Dict]) -> List[Dict]:
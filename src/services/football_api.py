@@ -1,9 +1,15 @@
+import threading
 import requests
+import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from config.config import Config
-from src.cache.redis_client import RedisCache
+from src.cache.redis_client import get_shared_cache
 from src.utils.api_retry import retry_on_rate_limit
+from src.utils.instrumentation import record_response
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 class FootballAPI:
     """Serviço para buscar dados de jogos com cache Redis"""
@@ -12,52 +18,74 @@ class FootballAPI:
         self.api_key = Config.FOOTBALL_API_KEY
         self.base_url = Config.FOOTBALL_API_BASE_URL
         self.headers = {'X-Auth-Token': self.api_key}
-        self.cache = RedisCache()
+        self.cache = get_shared_cache()
+        
+        # Índices por competição (em memória): elencos e tabelas de stats
+        self._rosters: Dict[str, Dict] = {}
+        self._league_stats: Dict[tuple, Dict] = {}
+        self._locks_guard = threading.Lock()
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._team_id_memo: Dict[tuple, Optional[int]] = {}
+    
+    def _get_lock(self, *key) -> threading.Lock:
+        """Lock por recurso: threads do mesmo lote esperam uma única busca"""
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
     
     @retry_on_rate_limit(max_retries=3)
-    def get_team_stats_by_venue(self, team_id: int, season: int = 2025) -> Optional[Dict]:
+    def get_team_stats_by_venue(self, team_id: int, season: int = 2025,
+                                competition_code: Optional[str] = None) -> Optional[Dict]:
         """
         Busca estatísticas do time separadas por CASA e FORA
         Retorna dict com stats de casa e fora
+        
+        Com competition_code, lê da tabela da liga (1 request para a liga inteira);
+        sem ela, ou com o time fora da tabela, busca os jogos do time (2 requests por time)
         Cache: 24 horas
         """
-        cache_key = f"team_venue_stats:{team_id}:season_{season}"
+        if competition_code:
+            table = self.get_league_venue_stats(competition_code, season)
+            stats = table.get(str(team_id)) if table else None
+            if stats is not None:
+                return stats
+            if table:
+                logger.debug("🔎 Time %s fora da tabela de %s - buscando jogos do time", team_id, competition_code)
         
-        # Tenta cache
-        cached = self.cache.get(cache_key)
-        if cached:
-            print(f"📦 Cache: stats do time {team_id}")
-            return cached
+        cache_key = f"team_venue_stats:{team_id}:season_{season}"
         
         try:
-            # Busca jogos em CASA
-            home_matches = self._get_team_matches(team_id, season, venue='HOME', status='FINISHED')
-            # Busca jogos FORA
-            away_matches = self._get_team_matches(team_id, season, venue='AWAY', status='FINISHED')
-            
-            if not home_matches and not away_matches:
-                return None
-            
-            # Calcula médias
-            home_stats = self._calculate_venue_stats(home_matches, team_id, is_home=True)
-            away_stats = self._calculate_venue_stats(away_matches, team_id, is_home=False)
-            
-            result = {
-                'team_id': team_id,
-                'season': season,
-                'home': home_stats,
-                'away': away_stats
-            }
-            
-            # Salva no cache (24 horas)
-            self.cache.set(cache_key, result, expire_seconds=86400)
-            
-            return result
-            
+            # Cache (24 horas) com atualização em segundo plano após CACHE_SOFT_TTL_STATS
+            return self.cache.get_or_fetch(
+                cache_key,
+                lambda: self._fetch_team_venue_stats(team_id, season),
+                expire_seconds=86400,
+                soft_ttl=Config.CACHE_SOFT_TTL_STATS
+            )
         except Exception as e:
-            print(f"❌ Erro ao buscar stats do time {team_id}: {e}")
+            logger.error("❌ Erro ao buscar stats do time %s: %s", team_id, e)
             return None
     
+    def _fetch_team_venue_stats(self, team_id: int, season: int) -> Optional[Dict]:
+        """Busca jogos de casa e fora do time e calcula as médias (sem cache)"""
+        # Busca jogos em CASA
+        home_matches = self._get_team_matches(team_id, season, venue='HOME', status='FINISHED')
+        # Busca jogos FORA
+        away_matches = self._get_team_matches(team_id, season, venue='AWAY', status='FINISHED')
+        
+        if not home_matches and not away_matches:
+            return None
+        
+        # Calcula médias
+        home_stats = self._calculate_venue_stats(home_matches, team_id, is_home=True)
+        away_stats = self._calculate_venue_stats(away_matches, team_id, is_home=False)
+        
+        return {
+            'team_id': team_id,
+            'season': season,
+            'home': home_stats,
+            'away': away_stats
+        }
+    
     def _get_team_matches(self, team_id: int, season: int, venue: str, status: str) -> List[Dict]:
         """Busca jogos do time filtrados por venue (HOME/AWAY) e status"""
         try:
@@ -69,13 +97,166 @@ class FootballAPI:
             }
             
             response = requests.get(url, headers=self.headers, params=params, timeout=10)
+            record_response('football_data', response)
             response.raise_for_status()
             
             return response.json().get('matches', [])
         except Exception as e:
-            print(f"❌ Erro ao buscar jogos: {e}")
+            logger.error("❌ Erro ao buscar jogos: %s", e)
             return []
     
+    def get_league_venue_stats(self, competition_code: str, season: int = 2025) -> Optional[Dict[str, Dict]]:
+        """
+        Tabela de stats por venue de TODOS os times da competição
+        Uma única request (/competitions/{code}/matches?status=FINISHED)
+        
+        Returns:
+            {str(team_id): {'team_id', 'season', 'home': {...}, 'away': {...}}}
+            ou None se a competição não estiver disponível ou não tiver jogos
+            (tabela vazia fica memorizada no processo, mas não conta como resultado)
+        Cache: 24 horas (por competição e temporada)
+        """
+        table_key = (competition_code, season)
+        table = self._league_stats.get(table_key)
+        if table is not None:
+            return table or None
+        
+        with self._get_lock('league_stats', competition_code, season):
+            table = self._league_stats.get(table_key)
+            if table is not None:
+                return table or None
+            
+            cache_key = f"league_venue_stats:{competition_code}:season_{season}"
+            
+            try:
+                # Single-flight entre workers + cache (24 horas, atualização em
+                # segundo plano após CACHE_SOFT_TTL_STATS)
+                table = self.cache.get_or_fetch(
+                    cache_key,
+                    lambda: self._calculate_league_venue_stats(
+                        self._get_competition_matches(competition_code, season, status='FINISHED'),
+                        season
+                    ),
+                    expire_seconds=86400,
+                    soft_ttl=Config.CACHE_SOFT_TTL_STATS
+                )
+            except Exception as e:
+                logger.error("❌ Erro ao buscar jogos da competição %s: %s", competition_code, e)
+                return None
+            
+            self._league_stats[table_key] = table or {}
+            return table or None
+    
+    @retry_on_rate_limit(max_retries=3)
+    def _get_competition_matches(self, competition_code: str, season: int, status: str) -> List[Dict]:
+        """Busca todos os jogos da competição na temporada filtrados por status"""
+        url = f"{self.base_url}/competitions/{competition_code}/matches"
+        params = {
+            'season': season,
+            'status': status
+        }
+        
+        response = requests.get(url, headers=self.headers, params=params, timeout=30)
+        record_response('football_data', response)
+        response.raise_for_status()
+        
+        return response.json().get('matches', [])
+    
+    def _calculate_league_venue_stats(self, matches: List[Dict], season: int,
+                                      form_limit: int = 5) -> Dict[str, Dict]:
+        """
+        Calcula médias de casa/fora e forma recente de todos os times
+        em uma única passada vetorizada (NumPy)
+        """
+        rows = []
+        for match in matches:
+            score = match.get('score', {}).get('fullTime', {}) or {}
+            home_goals = score.get('home')
+            away_goals = score.get('away')
+            if home_goals is None or away_goals is None:
+                continue
+            
+            rows.append((
+                match['homeTeam']['id'],
+                match['awayTeam']['id'],
+                home_goals,
+                away_goals,
+                match.get('utcDate', '')
+            ))
+        
+        if not rows:
+            return {}
+        
+        home_ids, away_ids, home_goals, away_goals, dates = zip(*rows)
+        home_ids = np.array(home_ids)
+        away_ids = np.array(away_ids)
+        home_goals = np.array(home_goals, dtype=float)
+        away_goals = np.array(away_goals, dtype=float)
+        # Datas ISO 8601 ordenam como texto; rank = ordem cronológica
+        date_rank = np.argsort(np.argsort(np.array(dates), kind='stable'), kind='stable')
+        
+        team_ids, team_idx = np.unique(np.concatenate([home_ids, away_ids]), return_inverse=True)
+        n_teams = len(team_ids)
+        home_idx = team_idx[:len(rows)]
+        away_idx = team_idx[len(rows):]
+        
+        # Somatórios por time (casa e fora)
+        home_games = np.bincount(home_idx, minlength=n_teams)
+        home_scored = np.bincount(home_idx, weights=home_goals, minlength=n_teams)
+        home_conceded = np.bincount(home_idx, weights=away_goals, minlength=n_teams)
+        away_games = np.bincount(away_idx, minlength=n_teams)
+        away_scored = np.bincount(away_idx, weights=away_goals, minlength=n_teams)
+        away_conceded = np.bincount(away_idx, weights=home_goals, minlength=n_teams)
+        
+        # Resultado do ponto de vista do mandante: W, D, L
+        margin = np.sign(home_goals - away_goals).astype(int)
+        home_results = np.array(['L', 'D', 'W'])[margin + 1]
+        away_results = np.array(['W', 'D', 'L'])[margin + 1]
+        
+        home_form = self._recent_form_by_team(home_idx, date_rank, home_results, n_teams, form_limit)
+        away_form = self._recent_form_by_team(away_idx, date_rank, away_results, n_teams, form_limit)
+        
+        def venue(games, scored, conceded, form, i):
+            n = int(games[i])
+            return {
+                'recent_form': form[i],
+                'games': n,
+                'goals_scored': int(scored[i]),
+                'goals_conceded': int(conceded[i]),
+                'avg_scored': round(float(scored[i]) / n, 2) if n > 0 else 0.0,
+                'avg_conceded': round(float(conceded[i]) / n, 2) if n > 0 else 0.0
+            }
+        
+        table = {}
+        for i, team_id in enumerate(team_ids.tolist()):
+            table[str(team_id)] = {
+                'team_id': team_id,
+                'season': season,
+                'home': venue(home_games, home_scored, home_conceded, home_form, i),
+                'away': venue(away_games, away_scored, away_conceded, away_form, i)
+            }
+        
+        return table
+    
+    @staticmethod
+    def _recent_form_by_team(team_idx: np.ndarray, date_rank: np.ndarray, results: np.ndarray,
+                             n_teams: int, limit: int) -> List[List[str]]:
+        """Últimos N resultados de cada time (mais recente primeiro)"""
+        # Ordena por time e, dentro do time, do jogo mais recente para o mais antigo
+        order = np.lexsort((-date_rank, team_idx))
+        sorted_teams = team_idx[order]
+        
+        # Posição de cada jogo dentro do grupo do time
+        group_start = np.searchsorted(sorted_teams, sorted_teams, side='left')
+        position = np.arange(len(order)) - group_start
+        keep = position < limit
+        
+        form = [[] for _ in range(n_teams)]
+        for team, result in zip(sorted_teams[keep].tolist(), results[order][keep].tolist()):
+            form[team].append(result)
+        
+        return form
+    
     def _calculate_venue_stats(self, matches: List[Dict], team_id: int, is_home: bool) -> Dict:
         """Calcula estatísticas para casa ou fora"""
         goals_scored = []
@@ -140,68 +321,122 @@ class FootballAPI:
         
         return form
     
-    @retry_on_rate_limit(max_retries=3)
     def get_team_id_by_name(self, team_name: str, competition_code: str = 'PL') -> Optional[int]:
         """
         Busca ID do time pelo nome na competição com FUZZY MATCHING
-        Cache: 7 dias (nomes não mudam)
+        Usa o índice do elenco da competição (1 request por competição, em memória)
         """
         from thefuzz import fuzz
         
-        cache_key = f"team_id:{competition_code}:{team_name}"
-        
-        # Tenta cache
-        cached = self.cache.get(cache_key)
-        if cached:
-            return cached
+        memo_key = (competition_code, team_name)
+        if memo_key in self._team_id_memo:
+            return self._team_id_memo[memo_key]
         
         try:
-            url = f"{self.base_url}/competitions/{competition_code}/teams"
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            teams = response.json().get('teams', [])
-            
-            # Normaliza nome buscado
-            normalized_search = self._normalize_team_name(team_name)
+            roster = self._get_roster_index(competition_code)
+        except Exception as e:
+            logger.error("❌ Erro ao buscar ID do time %s: %s", team_name, e)
+            return None
+        
+        # Normaliza nome buscado
+        normalized_search = self._normalize_team_name(team_name)
+        
+        # Match exato (nome, nome curto ou TLA) - O(1)
+        team_id = roster['exact'].get(normalized_search)
+        if team_id:
+            self._team_id_memo[memo_key] = team_id
+            return team_id
+        
+        best_match = None
+        best_score = 0
+        
+        # Busca melhor match com fuzzy (nomes já normalizados no índice)
+        for normalized_name, candidate_id in roster['entries']:
+            score = fuzz.ratio(normalized_search, normalized_name)
             
-            best_match = None
-            best_score = 0
+            if score > best_score:
+                best_score = score
+                best_match = candidate_id
+        
+        # Aceita match com 70%+ de similaridade
+        if best_score >= 70:
+            logger.debug("✅ Match: '%s' → %s%% similar", team_name, best_score)
+            self._team_id_memo[memo_key] = best_match
+            return best_match
+        
+        logger.info("❌ Nenhum match para '%s' em %s (melhor: %s%%)", team_name, competition_code, best_score)
+        self._team_id_memo[memo_key] = None
+        return None
+    
+    def prefetch_competitions(self, competition_codes: List[str], season: int = 2025):
+        """
+        Aquece elencos e tabelas de várias competições com 1 leitura em lote do cache
+        (o que não estiver em cache continua sendo buscado sob demanda)
+        """
+        keys = []
+        for code in dict.fromkeys(competition_codes):
+            if code not in self._rosters:
+                keys.append(f"team_roster:{code}")
+            if (code, season) not in self._league_stats:
+                keys.append(f"league_venue_stats:{code}:season_{season}")
+        
+        if keys:
+            self.cache.get_many(keys)
+    
+    def _get_roster_index(self, competition_code: str) -> Dict:
+        """
+        Índice do elenco da competição: nomes, nomes curtos e TLAs já normalizados
+        Memória do processo → Redis (7 dias) → API (1 request por competição)
+        """
+        roster = self._rosters.get(competition_code)
+        if roster is not None:
+            return roster
+        
+        with self._get_lock('roster', competition_code):
+            roster = self._rosters.get(competition_code)
+            if roster is not None:
+                return roster
             
-            # Busca melhor match com fuzzy
-            for team in teams:
-                team_names = [
-                    team.get('name', ''),
-                    team.get('shortName', ''),
-                    team.get('tla', '')
-                ]
-                
-                for name in team_names:
-                    if not name:
-                        continue
-                        
-                    normalized_name = self._normalize_team_name(name)
-                    
-                    # Calcula similaridade
-                    score = fuzz.ratio(normalized_search, normalized_name)
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_match = team['id']
+            cache_key = f"team_roster:{competition_code}"
             
-            # Aceita match com 70%+ de similaridade
-            if best_score >= 70:
-                print(f"   ✅ Match: '{team_name}' → {best_score}% similar")
-                # Cache por 7 dias
-                self.cache.set(cache_key, best_match, expire_seconds=604800)
-                return best_match
+            # Single-flight entre workers + cache por 7 dias (elencos não mudam durante a temporada)
+            entries = self.cache.get_or_fetch(
+                cache_key,
+                lambda: self._build_roster_entries(self._fetch_competition_teams(competition_code)),
+                expire_seconds=604800
+            )
             
-            print(f"   ❌ Nenhum match para '{team_name}' em {competition_code} (melhor: {best_score}%)")
-            return None
+            roster = {
+                'entries': [tuple(entry) for entry in entries],
+                'exact': {}
+            }
+            for normalized_name, team_id in roster['entries']:
+                roster['exact'].setdefault(normalized_name, team_id)
             
-        except Exception as e:
-            print(f"❌ Erro ao buscar ID do time {team_name}: {e}")
-            return None
+            self._rosters[competition_code] = roster
+            return roster
+    
+    @retry_on_rate_limit(max_retries=3)
+    def _fetch_competition_teams(self, competition_code: str) -> List[Dict]:
+        """Busca times da competição"""
+        url = f"{self.base_url}/competitions/{competition_code}/teams"
+        response = requests.get(url, headers=self.headers, timeout=10)
+        record_response('football_data', response)
+        response.raise_for_status()
+        
+        return response.json().get('teams', [])
+    
+    def _build_roster_entries(self, teams: List[Dict]) -> List[List]:
+        """Gera pares [nome normalizado, team_id] para nome, nome curto e TLA"""
+        entries = []
+        
+        for team in teams:
+            for name in (team.get('name', ''), team.get('shortName', ''), team.get('tla', '')):
+                if not name:
+                    continue
+                entries.append([self._normalize_team_name(name), team['id']])
+        
+        return entries
     
     def _normalize_team_name(self, name: str) -> str:
         """Normaliza nome do time para melhor matching"""
@@ -236,7 +471,7 @@ class FootballAPI:
         
         cached = self.cache.get(cache_key)
         if cached:
-            print("📦 Usando cache (jogos de hoje)")
+            logger.debug("📦 Usando cache (jogos de hoje)")
             return cached
         
         if not self.api_key or self.api_key == 'your_api_key_here':
@@ -247,6 +482,7 @@ class FootballAPI:
         params = {'dateFrom': today, 'dateTo': today}
         
         response = requests.get(url, headers=self.headers, params=params)
+        record_response('football_data', response)
         response.raise_for_status()
         
         matches = response.json().get('matches', [])
@@ -1,15 +1,16 @@
 import requests
 from datetime import datetime, timedelta
 from typing import List, Dict
-from src.cache.redis_client import RedisCache
+from src.cache.redis_client import get_shared_cache
 from src.utils.api_retry import retry_on_rate_limit
+from src.utils.instrumentation import record_response
 
 class NFLAPI:
     """Serviço para buscar dados da NFL via ESPN API"""
     
     def __init__(self):
         self.base_url = "https://site.api.espn.com/apis/site/v2/sports/football/nfl"
-        self.cache = RedisCache()
+        self.cache = get_shared_cache()
     
     @retry_on_rate_limit(max_retries=3)
     def get_today_games(self) -> List[Dict]:
@@ -25,6 +26,7 @@ class NFLAPI:
         url = f"{self.base_url}/scoreboard"
         
         response = requests.get(url)
+        record_response('espn_nfl', response)
         response.raise_for_status()
         
         data = response.json()
@@ -50,6 +52,7 @@ class NFLAPI:
         url = f"{self.base_url}/scoreboard"
         
         response = requests.get(url)
+        record_response('espn_nfl', response)
         response.raise_for_status()
         
         data = response.json()
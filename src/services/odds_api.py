@@ -1,9 +1,20 @@
+import logging
+import numpy as np
 import requests
-from typing import List, Dict
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from config.config import Config
-from src.cache.redis_client import RedisCache
+from src.cache.redis_client import get_shared_cache
+from src.database.odds_history import get_odds_history
+from src.services.odds_credit_planner import OddsCreditPlanner
+from src.models.odds_matrix import OddsMatrix
+from src.models.records import Event, MarketQuote
 from src.utils.api_retry import retry_on_rate_limit
+from src.utils.instrumentation import record_response, bind
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class OddsAPI:
@@ -12,7 +23,10 @@ class OddsAPI:
     def __init__(self):
         self.api_key = Config.ODDS_API_KEY
         self.base_url = Config.ODDS_API_BASE_URL
-        self.cache = RedisCache()
+        self.cache = get_shared_cache()
+        self.regions = [r.strip() for r in Config.ODDS_REGIONS.split(',') if r.strip()]
+        self.markets = [m.strip() for m in Config.ODDS_MARKETS.split(',') if m.strip()]
+        self.planner = OddsCreditPlanner(self.cache)
 
     # ==========================================================
     # ✅ COMPATIBILIDADE (NÃO QUEBRAR O BettingAgent ANTIGO)
@@ -37,7 +51,7 @@ class OddsAPI:
 
         cached = self.cache.get(cache_key)  # ✅ CACHE REATIVADO
         if cached:
-            print("📦 Usando cache (ligas de futebol)")
+            logger.debug("📦 Usando cache (ligas de futebol)")
             return cached
 
         if not self.api_key:
@@ -47,6 +61,8 @@ class OddsAPI:
         params = {"apiKey": self.api_key}
 
         response = requests.get(url, params=params, timeout=30)
+        record_response('odds_api', response)
+        self.planner.record_response(response)
         response.raise_for_status()
 
         sports = response.json()
@@ -58,186 +74,258 @@ class OddsAPI:
         ]
 
         self.cache.set(cache_key, soccer_sports, expire_seconds=86400)  # ✅ CACHE REATIVADO
-        print(f"⚽ {len(soccer_sports)} ligas de futebol encontradas")
+        logger.info("⚽ %d ligas de futebol encontradas", len(soccer_sports))
 
         return soccer_sports
 
     # =========================
     # 🔹 BUSCA DE ODDS (GENÉRICA)
     # =========================
-    @retry_on_rate_limit(max_retries=3)
-    def get_odds_for_sport(self, sport: str) -> List[Dict]:
+    def get_odds_for_sport(self, sport: str, refresh: bool = False,
+                           window: Optional[Tuple[datetime, datetime]] = None) -> List[Dict]:
         """
         Busca odds para uma liga específica
         Cache: 12 HORAS (economia de créditos)
+        refresh=True descarta o valor em cache e busca linhas novas (1 crédito)
+        window=(início, fim): só jogos com kickoff na janela (commenceTimeFrom/To,
+        ver commence_window); a janela faz parte da chave de cache
         """
-        cache_key = f"odds:{sport}:{datetime.now().strftime('%Y-%m-%d')}"
+        cache_key = self._odds_cache_key(sport, window)
 
-        cached = self.cache.get(cache_key)  # ✅ CACHE REATIVADO
-        if cached:
-            print(f"📦 Usando cache (odds {sport})")
-            return cached
+        if not self.api_key:
+            return self.cache.get(cache_key) or []
+
+        if refresh:
+            self.cache.delete(cache_key)
+
+        # Single-flight: chamadas simultâneas (threads/workers) gastam 1 crédito por chave.
+        # Após CACHE_SOFT_TTL_ODDS o valor em cache é devolvido na hora e atualizado em segundo plano
+        return self.cache.get_or_fetch(
+            cache_key,
+            lambda: self._fetch_odds(sport, window),
+            expire_seconds=43200,  # ✅ CACHE REATIVADO - 12 HORAS
+            soft_ttl=Config.CACHE_SOFT_TTL_ODDS,
+            can_refresh=lambda: self.planner.can_spend(sport, self.regions, self.markets)
+        )
+
+    def get_odds_for_sports(self, sports: List[str], refresh: bool = False,
+                            window: Optional[Tuple[datetime, datetime]] = None) -> Dict[str, List[Dict]]:
+        """
+        Busca odds de várias ligas de uma vez
+        
+        Cache lido com 1 MGET; só as ligas ausentes vão para a API (em paralelo,
+        limitado por ODDS_MAX_WORKERS, com single-flight por chave).
+        refresh=True ignora o cache e busca todas as ligas na API.
+        As buscas na API passam pelo OddsCreditPlanner: ligas por EV esperado
+        por crédito, dentro do orçamento do dia (as demais ficam de fora).
+        Com window, jogos já iniciados saem do resultado (a janela começa no
+        início do bloco, ver commence_window).
+        
+        Returns:
+            {liga: jogos formatados} (ligas com erro ficam de fora)
+        """
+        results = self._get_odds_for_sports(sports, refresh, window)
+        if window is None:
+            return results
+
+        return {sport: self.not_started(matches) for sport, matches in results.items()}
+
+    def _get_odds_for_sports(self, sports: List[str], refresh: bool,
+                             window: Optional[Tuple[datetime, datetime]]) -> Dict[str, List[Dict]]:
+        keys = {sport: self._odds_cache_key(sport, window) for sport in sports}
+        cached = {} if refresh and self.api_key else self.cache.get_many(list(keys.values()))
 
         if not self.api_key:
-            return []
+            return {sport: cached[key] for sport, key in keys.items() if cached.get(key)}
+
+        # Em cache (memória, já aquecida): get_or_fetch só agenda atualização das stale
+        results = {
+            sport: self.get_odds_for_sport(sport, window=window)
+            for sport, key in keys.items() if cached.get(key)
+        }
+        missing = [sport for sport in sports if sport not in results]
+        logger.debug("📦 Odds em cache: %d/%d ligas", len(results), len(sports))
+
+        missing = self.planner.plan(missing, self.regions, self.markets)
+        if not missing:
+            return results
+
+        fetched = {}
+        max_workers = max(1, min(len(missing), Config.ODDS_MAX_WORKERS))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(bind(self.get_odds_for_sport), sport, refresh, window): sport
+                for sport in missing
+            }
+
+            for future in as_completed(futures):
+                sport = futures[future]
+                try:
+                    fetched[sport] = future.result()
+                except Exception as e:
+                    logger.warning("⚠️ Erro ao buscar %s: %s", sport, e)
+
+        results.update(fetched)
+        return results
+
+    @staticmethod
+    def commence_window(hours: int, now: Optional[datetime] = None,
+                        align_hours: Optional[int] = None) -> Tuple[datetime, datetime]:
+        """
+        Janela de kickoff (UTC) que cobre as próximas `hours` horas
+
+        O início é alinhado a blocos de ODDS_WINDOW_ALIGN_HOURS (00h, 06h, 12h, 18h
+        no padrão) e o fim cobre o bloco inteiro (início + align + hours): a chave
+        de cache fica estável durante o bloco, então o soft TTL das odds
+        (CACHE_SOFT_TTL_ODDS) vale também para buscas com janela.
+        Jogos já iniciados no começo do bloco voltam na resposta da API e são
+        descartados em get_odds_for_sports (not_started), antes da análise.
+        """
+        align_hours = max(1, align_hours or Config.ODDS_WINDOW_ALIGN_HOURS)
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+
+        day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        start = day + timedelta(hours=now.hour // align_hours * align_hours)
+        return start, start + timedelta(hours=hours + align_hours)
+
+    @staticmethod
+    def not_started(matches: List[Dict], now: Optional[datetime] = None) -> List[Dict]:
+        """Jogos com kickoff depois de now (sem horário: mantidos)"""
+        now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+        upcoming = []
+
+        for match in matches:
+            try:
+                kickoff = datetime.fromisoformat(match['commence_time'].replace('Z', '+00:00'))
+            except (KeyError, AttributeError, ValueError):
+                upcoming.append(match)
+                continue
+            if kickoff > now:
+                upcoming.append(match)
+
+        return upcoming
 
+    @staticmethod
+    def _format_commence_time(moment: datetime) -> str:
+        return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    @staticmethod
+    def _odds_cache_key(sport: str, window: Optional[Tuple[datetime, datetime]] = None) -> str:
+        if window:
+            start, end = (moment.astimezone(timezone.utc) for moment in window)
+            return f"odds:{sport}:{start:%Y-%m-%dT%H}:{end:%Y-%m-%dT%H}"
+        return f"odds:{sport}:{datetime.now().strftime('%Y-%m-%d')}"
+
+    @retry_on_rate_limit(max_retries=3)
+    def _fetch_odds(self, sport: str, window: Optional[Tuple[datetime, datetime]] = None) -> List[Dict]:
+        """Busca e formata odds de uma liga na The Odds API (sem cache)"""
         url = f"{self.base_url}/sports/{sport}/odds"
 
         params = {
             "apiKey": self.api_key,
-            "regions": "us,uk,eu",
-            "markets": "h2h,totals,spreads",
+            "regions": ",".join(self.regions),
+            "markets": ",".join(self.markets),
             "oddsFormat": "decimal",
         }
 
+        if window:
+            params["commenceTimeFrom"] = self._format_commence_time(window[0])
+            params["commenceTimeTo"] = self._format_commence_time(window[1])
+
         response = requests.get(url, params=params, timeout=30)
+        record_response('odds_api', response)
+        self.planner.record_response(response, sport, self.planner.estimate_cost(self.regions, self.markets))
         response.raise_for_status()
 
-        formatted = self._format_odds(response.json())
-        self.cache.set(cache_key, formatted, expire_seconds=43200)  # ✅ CACHE REATIVADO - 12 HORAS
+        data = response.json()
+        self._record_history(sport, data)
 
-        # DEBUG: Mostra estrutura de markets do primeiro jogo
-        if formatted and len(formatted) > 0:
-            first = formatted[0]
-            print(f"🔍 DEBUG odds_api - Primeiro jogo:")
-            print(f"   Home: {first.get('home_team')}")
-            if 'markets' in first:
-                sample_market = list(first['markets'].keys())[0] if first['markets'] else None
-                if sample_market:
-                    print(f"   Market '{sample_market}': {first['markets'][sample_market]}")
-        
-        return formatted
+        return self._format_odds(data)
+
+    def _record_history(self, sport: str, data: List[Dict]):
+        """Grava o snapshot bruto (todas as casas) no histórico de odds"""
+        history = get_odds_history()
+        if history is None:
+            return
+
+        try:
+            history.record_events(sport, data)
+        except Exception as e:
+            logger.warning("⚠️ Erro ao gravar histórico de odds (%s): %s", sport, e)
 
     # =========================
     # 🔹 BUSCA DE ODDS (MASSIVA)
     # =========================
-    def get_all_soccer_odds(self) -> List[Dict]:
+    def get_all_soccer_odds(self, window: Optional[Tuple[datetime, datetime]] = None) -> List[Dict]:
         """
         Busca odds de TODAS as ligas de futebol disponíveis
-        """
-        all_odds: List[Dict] = []
 
+        Passa por get_odds_for_sports: cache em lote e planejador de créditos
+        (ligas fora do orçamento do dia ficam de fora).
+        """
         sports = self.get_available_soccer_sports()
+        league_odds = self.get_odds_for_sports(sports, window=window)
 
-        for sport in sports:
-            try:
-                odds = self.get_odds_for_sport(sport)
-                all_odds.extend(odds)
-            except Exception as e:
-                print(f"⚠️ Falha ao buscar odds de {sport}: {e}")
+        all_odds = [match for sport in sports for match in league_odds.get(sport, [])]
 
-        print(f"💰 Total de jogos com odds: {len(all_odds)}")
+        logger.info("💰 Total de jogos com odds: %d", len(all_odds))
         return all_odds
 
     # =========================
     # 🔹 FORMATADORES
     # =========================
     def _format_odds(self, data: List[Dict]) -> List[Dict]:
+        """
+        Formata a resposta do /odds a partir da matriz eventos × resultados × casas (OddsMatrix)
+
+        Por jogo:
+            markets: melhor preço de cada resultado {'odd', 'bookmaker'}
+                     (spreads: spread_{linha} do mandante, spread_away_{linha} do visitante)
+            consensus: probabilidade de consenso sem margem por resultado
+            stale: resultados cujo melhor preço está fora da curva do consenso
+                   (> ODDS_OUTLIER_EDGE acima do preço justo, provável linha parada)
+        """
+        matrix = OddsMatrix.from_events(data)
+        best, best_bookmaker = matrix.best_prices()
+        consensus = matrix.consensus()
+        outliers = matrix.outliers(Config.ODDS_OUTLIER_EDGE, Config.ODDS_CONSENSUS_MIN_BOOKS)
+
+        # Melhor preço é outlier? (E, O)
+        stale = np.take_along_axis(outliers, np.maximum(best_bookmaker, 0)[..., None], axis=2)[..., 0]
+        stale &= best_bookmaker >= 0
+
         formatted: List[Dict] = []
 
-        for game in data:
-            game_data = {
-                "match_id": game.get("id"),
-                "home_team": game.get("home_team"),
-                "away_team": game.get("away_team"),
-                "commence_time": game.get("commence_time"),
-                "league": game.get("sport_key"),  # Liga do jogo
-                "markets": {},
-            }
+        for e, game in enumerate(data):
+            event = Event(
+                match_id=game.get("id"),
+                home_team=game.get("home_team"),
+                away_team=game.get("away_team"),
+                commence_time=game.get("commence_time"),
+                league=game.get("sport_key"),  # Liga do jogo
+            )
+            stale_keys = []
+
+            for o in np.flatnonzero(best_bookmaker[e] >= 0):
+                key = matrix.outcomes[o]
 
-            for bookmaker in game.get("bookmakers", []):
-                bookmaker_name = bookmaker.get("title", "Unknown")
-                for market in bookmaker.get("markets", []):
-                    key = market.get("key")
+                if not np.isnan(consensus[e, o]):
+                    event.consensus[key] = round(float(consensus[e, o]), 4)
 
-                    if key == "totals":
-                        self._extract_totals(market, game_data["markets"], bookmaker_name)
-                    elif key == "h2h":
-                        self._extract_h2h(market, game_data["markets"], bookmaker_name)
-                    elif key == "spreads":
-                        self._extract_spreads(market, game_data["markets"], bookmaker_name)
+                event.markets[key] = MarketQuote(float(best[e, o]), matrix.bookmakers[best_bookmaker[e, o]])
+                if stale[e, o]:
+                    stale_keys.append(key)
 
-            if game_data["markets"]:
-                formatted.append(game_data)
+            if event.markets:
+                event.stale = frozenset(stale_keys)
+                formatted.append(event.to_dict())
 
         # DEBUG: Mostra estrutura de markets do primeiro jogo
-        if formatted and len(formatted) > 0:
+        if formatted and logger.isEnabledFor(logging.DEBUG):
             first = formatted[0]
-            print(f"🔍 DEBUG odds_api - Primeiro jogo:")
-            print(f"   Home: {first.get('home_team')}")
-            if 'markets' in first:
-                sample_market = list(first['markets'].keys())[0] if first['markets'] else None
-                if sample_market:
-                    print(f"   Market '{sample_market}': {first['markets'][sample_market]}")
+            sample_market = next(iter(first['markets']), None)
+            logger.debug("🔍 Primeiro jogo: %s | Market '%s': %s",
+                         first.get('home_team'), sample_market, first['markets'].get(sample_market))
         
         return formatted
-
-    def _extract_totals(self, market: Dict, markets_dict: Dict, bookmaker_name: str):
-        """Extrai Over e Under"""
-        for outcome in market.get("outcomes", []):
-            point = outcome.get("point", 2.5)
-            price = outcome.get("price")
-
-            if outcome.get("name") == "Over":
-                key = f"over_{point}"
-            elif outcome.get("name") == "Under":
-                key = f"under_{point}"
-            else:
-                continue
-
-            if price is None:
-                continue
-
-            # Pega a melhor odd (maior)
-            if key not in markets_dict or price > markets_dict[key]:
-                markets_dict[key] = price
-
-    def _extract_h2h(self, market: Dict, markets_dict: Dict, bookmaker_name: str):
-        """Extrai 1X2 (casa, empate, fora)"""
-        home_team = None
-        away_team = None
-        
-        for outcome in market.get("outcomes", []):
-            name = outcome.get("name", "")
-            price = outcome.get("price")
-            
-            if price is None:
-                continue
-            
-            # Identifica home/away/draw
-            if name == "Draw":
-                key = "draw"
-            elif home_team is None:
-                home_team = name
-                key = "home_ml"
-            elif away_team is None:
-                away_team = name
-                key = "away_ml"
-            else:
-                continue
-            
-            # Salva odd com maior valor
-            if key not in markets_dict:
-                markets_dict[key] = {"odd": price, "bookmaker": bookmaker_name}
-            elif isinstance(markets_dict[key], dict) and price > markets_dict[key].get("odd", 0):
-                markets_dict[key] = {"odd": price, "bookmaker": bookmaker_name}
-            elif not isinstance(markets_dict[key], dict) and price > markets_dict[key]:
-                markets_dict[key] = {"odd": price, "bookmaker": bookmaker_name}
-
-    def _extract_spreads(self, market: Dict, markets_dict: Dict, bookmaker_name: str):
-        """Extrai Handicaps/Spreads"""
-        for outcome in market.get("outcomes", []):
-            point = outcome.get("point")
-            price = outcome.get("price")
-
-            if point is None or price is None:
-                continue
-
-            key = f"spread_{point}"
-            # Pega a melhor odd (maior) e guarda a casa
-            if key not in markets_dict:
-                markets_dict[key] = {"odd": price, "bookmaker": bookmaker_name}
-            elif isinstance(markets_dict[key], dict) and price > markets_dict[key].get("odd", 0):
-                markets_dict[key] = {"odd": price, "bookmaker": bookmaker_name}
-            elif not isinstance(markets_dict[key], dict) and price > markets_dict[key]:
-                markets_dict[key] = {"odd": price, "bookmaker": bookmaker_name}
\ No newline at end of file
@@ -0,0 +1,218 @@
+import calendar
+import math
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional
+
+from config.config import Config
+from src.cache.redis_client import RedisCache, get_shared_cache
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OddsCreditPlanner:
+    """
+    Planejador de créditos da The Odds API
+
+    - Registra a cota a partir dos headers de resposta (x-requests-remaining,
+      x-requests-used, x-requests-last) e o gasto do dia
+    - Estima o custo de cada busca: regiões × mercados (ou o último custo
+      observado da liga)
+    - Ordena as ligas por valor esperado por crédito (EV das oportunidades que
+      cada liga rendeu nas buscas anteriores, com decaimento) e corta o que
+      passar do orçamento do dia
+
+    Estado persistido no cache compartilhado (Redis ou fallback SQLite).
+    """
+
+    QUOTA_KEY = "odds:quota"
+    STATE_TTL = 40 * 86400  # Cobre o ciclo mensal da cota
+
+    def __init__(self, cache: Optional[RedisCache] = None):
+        self.cache = cache or get_shared_cache()
+        self._lock = threading.Lock()
+
+    # =========================
+    # 🔹 COTA E GASTO
+    # =========================
+    @staticmethod
+    def estimate_cost(regions: List[str], markets: List[str]) -> int:
+        """Custo de /odds na The Odds API: 1 crédito por região por mercado"""
+        return max(1, len(regions)) * max(1, len(markets))
+
+    def record_response(self, response, sport: Optional[str] = None, estimated_cost: int = 0):
+        """Atualiza a cota e o gasto do dia com os headers de uma resposta da The Odds API"""
+        headers = response.headers
+        remaining = headers.get('x-requests-remaining')
+        used = headers.get('x-requests-used')
+        last = headers.get('x-requests-last')
+
+        cost = int(float(last)) if last is not None else estimated_cost
+
+        with self._lock:
+            if remaining is not None:
+                self.cache.set(self.QUOTA_KEY, {
+                    'remaining': int(float(remaining)),
+                    'used': int(float(used)) if used is not None else None,
+                    'updated_at': time.time()
+                }, expire_seconds=self.STATE_TTL)
+
+            if sport and last is not None:
+                self.cache.set(f"odds:cost:{sport}", cost, expire_seconds=self.STATE_TTL)
+
+        # Contadores atômicos no backend (várias threads/workers buscam ao mesmo tempo)
+        if cost:
+            self.cache.incr(self._spent_key(), cost, expire_seconds=2 * 86400)
+        if sport:
+            # Busca paga ainda não contabilizada no rendimento da liga (ver record_yield)
+            self.cache.incr(self._fetches_key(sport), 1, expire_seconds=self.STATE_TTL)
+
+        logger.debug("💳 Odds API: %s créditos restantes (última chamada: %s)", remaining, cost)
+
+    def quota(self) -> Optional[Dict]:
+        """Última cota conhecida {'remaining', 'used', 'updated_at'}"""
+        return self.cache.get(self.QUOTA_KEY)
+
+    def spent_today(self) -> int:
+        return self.cache.get_counter(self._spent_key())
+
+    def daily_budget(self) -> Optional[int]:
+        """
+        Orçamento do dia: ODDS_DAILY_BUDGET, ou o restante da cota dividido
+        pelos dias que faltam no mês (None = cota desconhecida, sem limite)
+        """
+        if Config.ODDS_DAILY_BUDGET:
+            return Config.ODDS_DAILY_BUDGET
+
+        quota = self.quota()
+        if not quota:
+            return None
+
+        today = date.today()
+        days_left = calendar.monthrange(today.year, today.month)[1] - today.day + 1
+        # O restante já desconta o gasto de hoje: soma de volta para não contar 2x
+        return math.floor((quota['remaining'] + self.spent_today()) / days_left)
+
+    def remaining_today(self) -> Optional[int]:
+        """Créditos ainda disponíveis hoje (None = sem limite conhecido)"""
+        budget = self.daily_budget()
+        if budget is None:
+            return None
+
+        available = budget - self.spent_today()
+        quota = self.quota()
+        if quota:
+            available = min(available, quota['remaining'])
+        return max(0, available)
+
+    def can_spend(self, sport: str, regions: List[str], markets: List[str]) -> bool:
+        """Cabe mais uma busca da liga no orçamento de hoje? (ex: atualização em segundo plano)"""
+        available = self.remaining_today()
+        if available is None:
+            return True
+
+        cost = self.costs([sport], regions, markets)[sport]
+        if cost > available:
+            logger.info("💳 Atualização de %s adiada: orçamento do dia esgotado (%d créditos)", sport, available)
+            return False
+        return True
+
+    @staticmethod
+    def _spent_key() -> str:
+        return f"odds:credits:{date.today().isoformat()}"
+
+    @staticmethod
+    def _fetches_key(sport: str) -> str:
+        return f"odds:fetches:{sport}"
+
+    # =========================
+    # 🔹 RENDIMENTO POR LIGA
+    # =========================
+    def record_yield(self, sport: str, opportunities: List[Dict]):
+        """
+        Registra o que uma busca da liga rendeu (média com decaimento: buscas recentes pesam mais)
+
+        Só conta se houve busca paga desde o último registro (respostas do cache
+        não gastam créditos e não entram no EV por crédito).
+        """
+        fetches_key = self._fetches_key(sport)
+        pending = self.cache.get_counter(fetches_key)
+        if pending <= 0:
+            return
+        # Desconta só o que foi lido: buscas concorrentes continuam pendentes
+        self.cache.incr(fetches_key, -pending, expire_seconds=self.STATE_TTL)
+
+        key = f"odds:yield:{sport}"
+        decay = Config.ODDS_PLANNER_DECAY
+
+        with self._lock:
+            stats = self.cache.get(key) or {'fetches': 0.0, 'opportunities': 0.0, 'ev': 0.0}
+            stats = {
+                'fetches': stats['fetches'] * decay + 1,
+                'opportunities': stats['opportunities'] * decay + len(opportunities),
+                'ev': stats['ev'] * decay + sum(max(0.0, opp.get('ev', 0.0)) for opp in opportunities)
+            }
+            self.cache.set(key, stats, expire_seconds=self.STATE_TTL)
+
+    def expected_values(self, sports: List[str]) -> Dict[str, float]:
+        """
+        EV esperado por busca de cada liga
+
+        Ligas sem histórico recebem a média das conhecidas (ou 1.0),
+        para continuarem sendo exploradas.
+        """
+        stats = self.cache.get_many([f"odds:yield:{sport}" for sport in sports])
+        known = {
+            sport: stats[f"odds:yield:{sport}"]['ev'] / stats[f"odds:yield:{sport}"]['fetches']
+            for sport in sports
+            if stats.get(f"odds:yield:{sport}") and stats[f"odds:yield:{sport}"]['fetches'] > 0
+        }
+        prior = sum(known.values()) / len(known) if known else 1.0
+
+        return {sport: known.get(sport, prior) for sport in sports}
+
+    # =========================
+    # 🔹 PLANO
+    # =========================
+    def costs(self, sports: List[str], regions: List[str], markets: List[str]) -> Dict[str, int]:
+        """Custo de cada liga: último custo observado ou estimativa regiões × mercados"""
+        estimate = self.estimate_cost(regions, markets)
+        observed = self.cache.get_many([f"odds:cost:{sport}" for sport in sports])
+
+        return {
+            sport: observed.get(f"odds:cost:{sport}") or estimate
+            for sport in sports
+        }
+
+    def plan(self, sports: List[str], regions: List[str], markets: List[str]) -> List[str]:
+        """
+        Ligas a buscar, por EV esperado por crédito, dentro do orçamento do dia
+
+        Returns:
+            Ligas selecionadas (em ordem de prioridade)
+        """
+        if not sports:
+            return []
+
+        costs = self.costs(sports, regions, markets)
+        values = self.expected_values(sports)
+        ranked = sorted(sports, key=lambda sport: values[sport] / costs[sport], reverse=True)
+
+        available = self.remaining_today()
+        if available is None:
+            return ranked
+
+        selected, planned = [], 0
+        for sport in ranked:
+            if planned + costs[sport] <= available:
+                selected.append(sport)
+                planned += costs[sport]
+
+        skipped = [sport for sport in ranked if sport not in selected]
+        if skipped:
+            logger.warning("💳 Orçamento do dia (%d créditos): %d ligas adiadas (%s)",
+                           available, len(skipped), ", ".join(skipped))
+
+        return selected
@@ -1,6 +1,19 @@
+import json
+import os
+import threading
+from collections import defaultdict
 from difflib import SequenceMatcher
-from typing import Optional, Dict, List
-from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from config.config import Config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class TeamMatcher:
@@ -57,18 +70,21 @@ class TeamMatcher:
         return name
     
     @staticmethod
-    def similarity_score(name1: str, name2: str) -> float:
-        """Calcula score de similaridade entre dois nomes (0-1)"""
-        # Normaliza ambos
-        norm1 = TeamMatcher.normalize_name(name1)
-        norm2 = TeamMatcher.normalize_name(name2)
+    @lru_cache(maxsize=4096)
+    def canonical_name(name: str) -> str:
+        """Nome normalizado + mapeamento manual (cacheado por nome)"""
+        norm = TeamMatcher.normalize_name(name)
         
         # Checa mapeamento manual primeiro
-        if norm1 in TeamMatcher.KNOWN_MAPPINGS:
-            norm1 = TeamMatcher.KNOWN_MAPPINGS[norm1]
-        if norm2 in TeamMatcher.KNOWN_MAPPINGS:
-            norm2 = TeamMatcher.KNOWN_MAPPINGS[norm2]
+        if norm in TeamMatcher.KNOWN_MAPPINGS:
+            return TeamMatcher.KNOWN_MAPPINGS[norm]
         
+        # Depois os aliases aprendidos em execuções anteriores
+        return TeamAliasStore.lookup(norm)
+    
+    @staticmethod
+    def canonical_similarity(norm1: str, norm2: str) -> float:
+        """Similaridade (0-1) entre dois nomes já canônicos"""
         # Se forem iguais após normalização, match perfeito
         if norm1 == norm2:
             return 1.0
@@ -76,6 +92,14 @@ class TeamMatcher:
         # Usa SequenceMatcher para calcular similaridade
         return SequenceMatcher(None, norm1, norm2).ratio()
     
+    @staticmethod
+    def similarity_score(name1: str, name2: str) -> float:
+        """Calcula score de similaridade entre dois nomes (0-1)"""
+        return TeamMatcher.canonical_similarity(
+            TeamMatcher.canonical_name(name1),
+            TeamMatcher.canonical_name(name2)
+        )
+    
     @staticmethod
     def parse_datetime(dt_str: str) -> Optional[datetime]:
         """Parse datetime de diferentes formatos das APIs"""
@@ -96,7 +120,16 @@ class TeamMatcher:
             except:
                 continue
         
-        return None
+        # ISO 8601 com offset (ex: API-Football "2025-01-01T15:00:00+00:00") → UTC sem tz
+        try:
+            dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        return dt
     
     @staticmethod
     def time_match(time1: str, time2: str, tolerance_hours: int = 3) -> bool:
@@ -153,6 +186,11 @@ class TeamMatcher:
         
         return None
     
+    @staticmethod
+    def build_index(api_football_matches: List[Dict], bucket_hours: int = 3) -> 'FixtureIndex':
+        """Monta índice de fixtures (uma vez por lista) para matching em lote"""
+        return FixtureIndex(api_football_matches, bucket_hours=bucket_hours)
+    
     @staticmethod
     def match_teams(odds_home: str, odds_away: str, 
                    api_football_matches: List[Dict], 
@@ -186,7 +224,7 @@ class TeamMatcher:
             if home_score >= threshold and away_score >= threshold:
                 # NOVO: Verifica também o horário
                 if odds_datetime and not TeamMatcher.time_match(odds_datetime, match_datetime, time_tolerance_hours):
-                    print(f"   ⏰ Horários diferentes: {odds_datetime} vs {match_datetime} - descartando")
+                    logger.debug("⏰ Horários diferentes: %s vs %s - descartando", odds_datetime, match_datetime)
                     continue
                 
                 # Score combinado (média)
@@ -200,3 +238,311 @@ class TeamMatcher:
                 }
         
         return None
+
+
+class TeamAliasStore:
+    """
+    Aliases de times aprendidos com matches confirmados (estende KNOWN_MAPPINGS)
+
+    Persistido em JSON (Config.TEAM_ALIASES_FILE); carregado uma vez por processo. Cada alias mapeia o
+    nome normalizado da The Odds API para o nome canônico da API-Football,
+    então a próxima execução resolve o par com um lookup O(1).
+    """
+    
+    _aliases: Optional[Dict[str, str]] = None
+    _dirty = False
+    _lock = threading.Lock()
+    
+    @classmethod
+    def _load(cls) -> Dict[str, str]:
+        if cls._aliases is None:
+            with cls._lock:
+                if cls._aliases is None:
+                    try:
+                        with open(Config.TEAM_ALIASES_FILE, 'r') as f:
+                            cls._aliases = json.load(f)
+                    except (OSError, ValueError):
+                        cls._aliases = {}
+        return cls._aliases
+    
+    @classmethod
+    def lookup(cls, norm: str) -> str:
+        """Retorna o nome canônico aprendido (ou o próprio nome)"""
+        return cls._load().get(norm, norm)
+    
+    @classmethod
+    def learn(cls, name: str, canonical: str) -> bool:
+        """Registra alias name → canonical (nomes já normalizados)"""
+        aliases = cls._load()
+        
+        if not name or name == canonical or name in TeamMatcher.KNOWN_MAPPINGS:
+            return False
+        if aliases.get(name) == canonical:
+            return False
+        
+        with cls._lock:
+            aliases[name] = canonical
+            cls._dirty = True
+        
+        # Nomes canônicos cacheados podem ter mudado
+        TeamMatcher.canonical_name.cache_clear()
+        return True
+    
+    @classmethod
+    def save(cls):
+        """Persiste aliases novos (escrita atômica)"""
+        if not cls._dirty:
+            return
+        
+        with cls._lock:
+            path = Config.TEAM_ALIASES_FILE
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            
+            tmp_file = f"{path}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(cls._aliases, f, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp_file, path)
+            cls._dirty = False
+
+
+class FixtureIndex:
+    """
+    Índice de jogos da API-Football para matching rápido
+
+    Monta uma vez por lista de fixtures:
+    - nomes canônicos e horários parseados uma única vez
+    - blocos por janela de horário (bucket_hours)
+    - blocos por token (e prefixo de 4 letras) dos nomes normalizados
+
+    Cada jogo da The Odds API só é comparado com os candidatos plausíveis
+    (mesma janela de horário e pelo menos um token em comum).
+    """
+    
+    PREFIX_SIZE = 4
+    
+    def __init__(self, fixtures: List[Dict], bucket_hours: int = 3):
+        self.fixtures = fixtures
+        self.bucket_seconds = bucket_hours * 3600
+        
+        self._names: List[tuple] = []
+        self._known_names: set = set()
+        self._datetimes: List[Optional[datetime]] = []
+        self._time_buckets: Dict[int, List[int]] = defaultdict(list)
+        self._undated: List[int] = []
+        self._tokens: Dict[str, set] = defaultdict(set)
+        
+        for idx, fixture in enumerate(fixtures):
+            home = TeamMatcher.canonical_name(fixture.get('home_team', '') or '')
+            away = TeamMatcher.canonical_name(fixture.get('away_team', '') or '')
+            self._names.append((home, away))
+            self._known_names.update((home, away))
+            
+            for key in self._block_keys(home) | self._block_keys(away):
+                self._tokens[key].add(idx)
+            
+            dt = TeamMatcher.parse_datetime(fixture.get('date', ''))
+            self._datetimes.append(dt)
+            
+            if dt is None:
+                # Sem horário: sempre candidato (mesmo comportamento do time_match)
+                self._undated.append(idx)
+            else:
+                self._time_buckets[self._bucket(dt)].append(idx)
+    
+    def __len__(self) -> int:
+        return len(self.fixtures)
+    
+    @classmethod
+    def _block_keys(cls, canonical: str) -> set:
+        """Tokens do nome e seus prefixos (pega variações como munich/munchen)"""
+        keys = set()
+        for token in canonical.split():
+            keys.add(token)
+            if len(token) > cls.PREFIX_SIZE:
+                keys.add(token[:cls.PREFIX_SIZE])
+        return keys
+    
+    def _bucket(self, dt: datetime) -> int:
+        return int(dt.replace(tzinfo=timezone.utc).timestamp() // self.bucket_seconds)
+    
+    def candidates(self, odds_home: str, odds_away: str, odds_dt: Optional[datetime],
+                   time_tolerance_hours: int = 3) -> List[int]:
+        """Índices dos fixtures plausíveis (ordem original da lista)"""
+        home = TeamMatcher.canonical_name(odds_home)
+        away = TeamMatcher.canonical_name(odds_away)
+        
+        by_name = set()
+        for key in self._block_keys(home) | self._block_keys(away):
+            by_name |= self._tokens.get(key, set())
+        
+        if odds_dt is not None:
+            tolerance = time_tolerance_hours * 3600
+            start = self._bucket(odds_dt - timedelta(seconds=tolerance))
+            end = self._bucket(odds_dt + timedelta(seconds=tolerance))
+            
+            by_time = set(self._undated)
+            for bucket in range(start, end + 1):
+                by_time.update(self._time_buckets.get(bucket, ()))
+            
+            by_name &= by_time
+        
+        return sorted(by_name)
+    
+    def match(self, odds_home: str, odds_away: str, odds_datetime: str = None,
+              threshold: float = 0.7, time_tolerance_hours: int = 3) -> Optional[Dict]:
+        """
+        Mesmo contrato de TeamMatcher.match_teams, comparando só os candidatos
+        
+        Returns:
+            Dict com dados do jogo da API-Football, ou None se não houver match
+        """
+        odds_dt = TeamMatcher.parse_datetime(odds_datetime) if odds_datetime else None
+        home = TeamMatcher.canonical_name(odds_home)
+        away = TeamMatcher.canonical_name(odds_away)
+        
+        for idx in self.candidates(odds_home, odds_away, odds_dt, time_tolerance_hours):
+            fixture_home, fixture_away = self._names[idx]
+            
+            # Calcula score para ambos os times
+            home_score = TeamMatcher.canonical_similarity(home, fixture_home)
+            if home_score < threshold:
+                continue
+            away_score = TeamMatcher.canonical_similarity(away, fixture_away)
+            if away_score < threshold:
+                continue
+            
+            # Verifica também o horário (exato, o bucket é só um pré-filtro)
+            fixture_dt = self._datetimes[idx]
+            if odds_dt and fixture_dt:
+                diff = abs((odds_dt - fixture_dt).total_seconds() / 3600)
+                if diff > time_tolerance_hours:
+                    continue
+            
+            # Score combinado (média)
+            return {
+                **self.fixtures[idx],
+                'match_score': (home_score + away_score) / 2,
+                'home_match_score': home_score,
+                'away_match_score': away_score
+            }
+        
+        return None
+    
+    @staticmethod
+    def _candidate_components(edges: Dict[int, Dict[int, tuple]]) -> List[List[int]]:
+        """Eventos agrupados pelos componentes conexos do grafo evento ↔ fixture candidato"""
+        parent = {e: e for e, eligible in edges.items() if eligible}
+        
+        def find(e: int) -> int:
+            while parent[e] != e:
+                parent[e] = parent[parent[e]]
+                e = parent[e]
+            return e
+        
+        owner: Dict[int, int] = {}
+        for e in parent:
+            for idx in edges[e]:
+                if idx in owner:
+                    parent[find(e)] = find(owner[idx])
+                else:
+                    owner[idx] = e
+        
+        components: Dict[int, List[int]] = defaultdict(list)
+        for e in parent:
+            components[find(e)].append(e)
+        return list(components.values())
+    
+    def match_slate(self, events: List[Tuple[str, str, Optional[str]]],
+                    threshold: float = 0.7, time_tolerance_hours: int = 3,
+                    alias_min_score: float = 0.9) -> List[Optional[Dict]]:
+        """
+        Matching global de um slate inteiro (atribuição ótima)
+        
+        Monta a matriz de similaridade evento × fixture candidato e resolve a
+        atribuição com o algoritmo húngaro em cada componente conexo do grafo de
+        candidatos (eventos que disputam algum fixture ficam no mesmo bloco,
+        inclusive jogos perto da meia-noite), então um fixture nunca é usado
+        por dois eventos e o par com maior score vence.
+        Pares confirmados com score >= alias_min_score viram aliases aprendidos.
+        
+        Args:
+            events: Lista de (home, away, commence_time) da The Odds API
+        
+        Returns:
+            Lista alinhada com events: dict do jogo (como match_teams) ou None
+        """
+        # 1. Scores dos candidatos elegíveis de cada evento
+        edges: Dict[int, Dict[int, tuple]] = {}
+        event_names = []
+        
+        for event_idx, (odds_home, odds_away, odds_datetime) in enumerate(events):
+            odds_dt = TeamMatcher.parse_datetime(odds_datetime) if odds_datetime else None
+            home = TeamMatcher.canonical_name(odds_home)
+            away = TeamMatcher.canonical_name(odds_away)
+            event_names.append((home, away))
+            
+            eligible = {}
+            for idx in self.candidates(odds_home, odds_away, odds_dt, time_tolerance_hours):
+                fixture_home, fixture_away = self._names[idx]
+                
+                home_score = TeamMatcher.canonical_similarity(home, fixture_home)
+                if home_score < threshold:
+                    continue
+                away_score = TeamMatcher.canonical_similarity(away, fixture_away)
+                if away_score < threshold:
+                    continue
+                
+                fixture_dt = self._datetimes[idx]
+                if odds_dt and fixture_dt:
+                    diff = abs((odds_dt - fixture_dt).total_seconds() / 3600)
+                    if diff > time_tolerance_hours:
+                        continue
+                
+                eligible[idx] = (home_score, away_score)
+            
+            edges[event_idx] = eligible
+        
+        # 2. Atribuição ótima por componente conexo (blocos independentes)
+        results: List[Optional[Dict]] = [None] * len(events)
+        
+        for event_ids in self._candidate_components(edges):
+            fixture_ids = sorted({idx for e in event_ids for idx in edges[e]})
+            column = {idx: col for col, idx in enumerate(fixture_ids)}
+            
+            scores = np.zeros((len(event_ids), len(fixture_ids)))
+            for row, e in enumerate(event_ids):
+                for idx, (home_score, away_score) in edges[e].items():
+                    scores[row, column[idx]] = (home_score + away_score) / 2
+            
+            rows, cols = linear_sum_assignment(scores, maximize=True)
+            
+            for row, col in zip(rows, cols):
+                if scores[row, col] <= 0:
+                    continue
+                
+                event_idx = event_ids[row]
+                fixture_idx = fixture_ids[col]
+                home_score, away_score = edges[event_idx][fixture_idx]
+                
+                results[event_idx] = {
+                    **self.fixtures[fixture_idx],
+                    'match_score': scores[row, col],
+                    'home_match_score': home_score,
+                    'away_match_score': away_score
+                }
+                
+                # 3. Aprende aliases de pares confirmados com score alto
+                if scores[row, col] >= alias_min_score:
+                    fixture_home, fixture_away = self._names[fixture_idx]
+                    home, away = event_names[event_idx]
+                    self._learn_alias(home, fixture_home, home_score, alias_min_score)
+                    self._learn_alias(away, fixture_away, away_score, alias_min_score)
+        
+        return results
+    
+    def _learn_alias(self, name: str, fixture_name: str, score: float, min_score: float):
+        """Só aprende se o nome não existe como time nesta lista (evita 'Betis' → 'Betis B')"""
+        if min_score <= score < 1.0 and name not in self._known_names:
+            TeamAliasStore.learn(name, fixture_name)
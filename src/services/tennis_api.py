@@ -3,13 +3,14 @@ import time
 import requests
 from datetime import datetime
 from typing import Any, Dict, List, Optional
+from src.utils.instrumentation import record_response
 
 # Se você já tem esses módulos, beleza.
 # Se não tiver Redis rodando, o código continua funcionando sem cache.
 try:
-    from src.cache.redis_client import RedisCache
+    from src.cache.redis_client import get_shared_cache
 except Exception:
-    RedisCache = None
+    get_shared_cache = None
 
 
 class TennisAPI:
@@ -36,7 +37,7 @@ class TennisAPI:
         }
 
         # Cache (opcional)
-        self.cache = RedisCache() if RedisCache else None
+        self.cache = get_shared_cache() if get_shared_cache else None
 
         # Endpoints (defaults). Se der 404, COPIE do Code Snippets e ajuste via .env/Config.
         # Ex.: RAPIDAPI_TENNIS_EP_ATP_RANKINGS="/atp/official_players_rankings" (exemplo)
@@ -79,6 +80,7 @@ class TennisAPI:
         # retry simples pra 429
         for attempt in range(3):
             resp = requests.get(url, headers=self.headers, params=params or {}, timeout=self.default_timeout)
+            record_response('tennis_api', resp)
 
             if resp.status_code == 429:
                 wait = int(resp.headers.get("Retry-After", "0") or 0) or (2 ** attempt)
@@ -0,0 +1,108 @@
+import numpy as np
+from typing import List, Dict
+
+from src.models.odds_matrix import OddsMatrix
+
+
+class ArbitrageScanner:
+    """
+    Detecta surebets entre casas nos jogos formatados (OddsAPI._format_odds)
+
+    Para cada grupo de resultados complementares (1X2, Over/Under da linha,
+    handicap mandante/visitante) pega o melhor preço de cada resultado; se a
+    soma de 1/odd for menor que 1, apostar em todos os lados garante retorno.
+    Só entram linhas sem devolução (1X2 e linhas .5): em linhas inteiras e de
+    1/4 um push devolve toda ou metade da aposta e as pernas deixam de pagar
+    o mesmo, então o retorno não é garantido.
+    Todos os jogos de todas as ligas são avaliados em uma única passada NumPy.
+    """
+
+    @staticmethod
+    def scan(games: List[Dict], total_stake: float = 100.0, min_profit_pct: float = 0.0) -> List[Dict]:
+        """
+        Args:
+            games: jogos formatados de qualquer número de ligas
+            total_stake: valor total distribuído entre as pernas
+            min_profit_pct: lucro garantido mínimo (%)
+
+        Returns:
+            Surebets ordenadas pelo retorno garantido (maior primeiro)
+        """
+        if not games:
+            return []
+
+        matrix = OddsMatrix.from_formatted(games)
+        best, best_bookmaker = matrix.best_prices()  # (E, O)
+
+        quoted = ~np.isnan(best)
+        inverse = np.where(quoted, 1.0 / np.where(quoted, best, 1.0), 0.0)
+
+        # Soma das probabilidades implícitas por grupo; só grupos com todos os lados cotados
+        implied_total = matrix.sum_by_group(inverse)                          # (E, G)
+        group_size = np.tile(matrix.group_size, (len(games), 1))                # (E, G)
+        if 'home_ml' in matrix.outcomes:
+            # 1X2 de futebol exige o empate, mesmo que nenhum jogo do slate cote o empate
+            soccer = np.array([str(game.get('league') or '').startswith('soccer') for game in games])
+            group_size[soccer, matrix.groups[matrix.outcome('home_ml')]] = 3
+        complete = matrix.sum_by_group(quoted.astype(float)) == group_size
+        complete &= ArbitrageScanner._pushless_groups(matrix)
+
+        profit_pct = np.where(complete, (1.0 / np.where(complete, implied_total, 1.0) - 1.0) * 100, -np.inf)
+        events, groups = np.nonzero((profit_pct > 0) & (profit_pct >= min_profit_pct))
+
+        surebets = []
+        for e, g in zip(events.tolist(), groups.tolist()):
+            game = games[e]
+            outcomes = matrix.group_outcomes(g)
+            total_return = total_stake / implied_total[e, g]
+
+            legs = [
+                {
+                    'outcome': matrix.outcomes[o],
+                    'odds': float(best[e, o]),
+                    'bookmaker': matrix.bookmakers[best_bookmaker[e, o]],
+                    'stake': round(total_stake * inverse[e, o] / implied_total[e, g], 2)
+                }
+                for o in outcomes
+            ]
+
+            surebets.append({
+                'match': f"{game.get('home_team')} x {game.get('away_team')}",
+                'league': game.get('league'),
+                'date': game.get('commence_time', ''),
+                'market': ArbitrageScanner._market_label(matrix.outcomes[outcomes[0]]),
+                'legs': legs,
+                'implied_total': round(float(implied_total[e, g]), 4),
+                'profit_pct': round(float(profit_pct[e, g]), 2),
+                'total_stake': total_stake,
+                'guaranteed_return': round(float(total_return), 2)
+            })
+
+        surebets.sort(key=lambda x: x['profit_pct'], reverse=True)
+        return surebets
+
+    @staticmethod
+    def _pushless_groups(matrix: OddsMatrix) -> np.ndarray:
+        """Grupos sem push possível (G,): 1X2 e linhas terminadas em .5"""
+        pushless = np.zeros(len(matrix.group_size), dtype=bool)
+
+        for g in range(len(pushless)):
+            group = OddsMatrix.outcome_group(matrix.outcomes[matrix.group_outcomes(g)[0]])
+            if group == 'h2h':
+                pushless[g] = True
+            else:
+                pushless[g] = abs(float(group.split('_', 1)[1])) % 1 == 0.5
+
+        return pushless
+
+    @staticmethod
+    def _market_label(outcome_key: str) -> str:
+        """Nome do mercado do grupo (1X2, Over/Under 2.5, Handicap -0.5)"""
+        group = OddsMatrix.outcome_group(outcome_key)
+        if group == 'h2h':
+            return '1X2'
+
+        kind, line = group.split('_', 1)
+        if kind == 'totals':
+            return f"Over/Under {line}"
+        return f"Handicap {float(line):+g}"
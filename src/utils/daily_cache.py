@@ -1,91 +1,383 @@
 import os
+import copy
 import json
+import hashlib
+import time
 from datetime import datetime, date
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable
+
+from src.cache.snapshot_store import open_snapshot, write_snapshot
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class DailyCache:
-    """Cache que persiste por dia inteiro - busca APIs apenas 1x por dia"""
-    
+    """
+    Cache diário incremental - snapshot do dia dividido por liga e por jogo
+
+    - Liga: guarda quando foi buscada e até quando vale; a validade encurta
+      conforme o kickoff do próximo jogo se aproxima (ver kickoff_ttl)
+    - Jogo: guarda o hash do conteúdo das odds e as oportunidades calculadas;
+      numa atualização só os jogos com odds diferentes são reanalisados
+
+    Ligas ainda válidas não são consultadas de novo (sem gastar créditos).
+    Persistido como snapshot indexado (ver src/cache/snapshot_store.py).
+    """
+
     CACHE_DIR = "cache/daily"
-    DATE_FILE = "cache/daily/last_fetch_date.txt"
-    DATA_FILE = "cache/daily/opportunities_data.json"
-    
-    @staticmethod
-    def _ensure_cache_dir():
-        """Garante que diretório de cache existe"""
-        os.makedirs(DailyCache.CACHE_DIR, exist_ok=True)
-    
+    SNAPSHOT_FILE = "cache/daily/opportunities.snapshot"
+
     @staticmethod
     def _get_today() -> str:
         """Retorna data de hoje como string (YYYY-MM-DD)"""
         return date.today().isoformat()
-    
-    @staticmethod
-    def was_fetched_today() -> bool:
-        """Verifica se já buscou dados hoje"""
-        DailyCache._ensure_cache_dir()
-        
-        if not os.path.exists(DailyCache.DATE_FILE):
-            return False
-        
-        try:
-            with open(DailyCache.DATE_FILE, 'r') as f:
-                last_date = f.read().strip()
-            
-            return last_date == DailyCache._get_today()
-        except:
-            return False
-    
-    @staticmethod
-    def save_today_data(opportunities: list, matches_count: int, leagues_count: int):
-        """Salva dados buscados hoje"""
-        DailyCache._ensure_cache_dir()
-        
-        data = {
+
+    @staticmethod
+    def _empty_state() -> Dict[str, Any]:
+        return {
             'date': DailyCache._get_today(),
-            'timestamp': datetime.now().isoformat(),
-            'opportunities': opportunities,
-            'matches_count': matches_count,
-            'leagues_count': leagues_count
+            'timestamp': None,
+            'leagues': {},
+            'matches': {},
+            'extras': {}
         }
-        
-        # Salva dados
-        with open(DailyCache.DATA_FILE, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        # Marca data de hoje
-        with open(DailyCache.DATE_FILE, 'w') as f:
-            f.write(DailyCache._get_today())
-        
-        print(f"✅ Dados salvos no cache diário ({DailyCache._get_today()})")
-    
+
+    # =========================
+    # 🔹 ESTADO DO DIA
+    # =========================
     @staticmethod
-    def load_today_data() -> Optional[Dict[str, Any]]:
-        """Carrega dados de hoje se existirem"""
-        DailyCache._ensure_cache_dir()
-        
-        if not DailyCache.was_fetched_today():
+    def _today_snapshot():
+        """Snapshot de hoje (None se ainda não buscou hoje)"""
+        snapshot = open_snapshot(DailyCache.SNAPSHOT_FILE)
+        if snapshot is None or snapshot.meta.get('date') != DailyCache._get_today():
             return None
-        
+        return snapshot
+
+    @staticmethod
+    def load_state() -> Dict[str, Any]:
+        """Estado de hoje (vazio se ainda não buscou hoje)"""
+        snapshot = DailyCache._today_snapshot()
+        if snapshot is None:
+            return DailyCache._empty_state()
+
+        state = copy.deepcopy(snapshot.meta)
+        for entry in list(state['matches'].values()) + list(state['extras'].values()):
+            entry['opportunities'] = [dict(opp) for opp in snapshot.records(entry.pop('records'))]
+
+        return state
+
+    @staticmethod
+    def save_state(state: Dict[str, Any]):
+        """Salva o estado do dia (snapshot atômico, oportunidades ordenadas por EV)"""
+        state['date'] = DailyCache._get_today()
+        state['timestamp'] = datetime.now().isoformat()
+
+        entries = [('matches', key, entry) for key, entry in state['matches'].items()]
+        entries += [('extras', key, entry) for key, entry in state['extras'].items()]
+
+        ranked = sorted(
+            ((opp, section, key) for section, key, entry in entries for opp in entry['opportunities']),
+            key=lambda item: item[0].get('ev', 0),
+            reverse=True
+        )
+
+        meta = {
+            'date': state['date'],
+            'timestamp': state['timestamp'],
+            'leagues': state['leagues'],
+            'matches': {},
+            'extras': {}
+        }
+        for section, key, entry in entries:
+            meta[section][key] = {field: value for field, value in entry.items() if field != 'opportunities'}
+            meta[section][key]['records'] = []
+
+        for i, (_, section, key) in enumerate(ranked):
+            meta[section][key]['records'].append(i)
+
+        write_snapshot(DailyCache.SNAPSHOT_FILE, meta, [opp for opp, _, _ in ranked])
+
+        logger.info("✅ Cache diário atualizado (%d jogos, %d ligas)", len(state['matches']), len(state['leagues']))
+
+    # =========================
+    # 🔹 VALIDADE (KICKOFF)
+    # =========================
+    @staticmethod
+    def _kickoff_timestamp(commence_time: str) -> Optional[float]:
         try:
-            with open(DailyCache.DATA_FILE, 'r') as f:
-                data = json.load(f)
-            
-            print(f"📦 Usando cache diário ({data['date']} às {data['timestamp'][:16]})")
-            return data
-        except:
+            return datetime.fromisoformat(commence_time.replace('Z', '+00:00')).timestamp()
+        except (AttributeError, ValueError):
             return None
-    
+
+    @staticmethod
+    def kickoff_ttl(commence_time: str, now: Optional[float] = None) -> int:
+        """
+        Validade (segundos) de um jogo: fração do tempo até o kickoff,
+        entre DAILY_CACHE_MIN_TTL e DAILY_CACHE_MAX_TTL
+
+        Ex (padrão 25%): kickoff em 10h → 2h30 | em 2h → 30min | em 20min → 10min
+        Jogo já iniciado (ou sem horário) → MAX_TTL (não há o que atualizar)
+        """
+        from config.config import Config
+
+        now = time.time() if now is None else now
+        kickoff = DailyCache._kickoff_timestamp(commence_time)
+
+        if kickoff is None or kickoff <= now:
+            return Config.DAILY_CACHE_MAX_TTL
+
+        ttl = (kickoff - now) * Config.DAILY_CACHE_TTL_FRACTION
+        return int(min(Config.DAILY_CACHE_MAX_TTL, max(Config.DAILY_CACHE_MIN_TTL, ttl)))
+
+    @staticmethod
+    def due_leagues(state: Dict[str, Any], leagues: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Ligas sem entrada no estado ou com validade vencida"""
+        now = time.time() if now is None else now
+
+        return [
+            sport for sport in leagues
+            if sport not in state['leagues'] or state['leagues'][sport]['expires_at'] <= now
+        ]
+
+    # =========================
+    # 🔹 JOGOS (HASH DAS ODDS)
+    # =========================
+    @staticmethod
+    def match_key(match: Dict) -> str:
+        """Chave estável do jogo (id da The Odds API ou times + horário)"""
+        return match.get('match_id') or f"{match['home_team']}|{match['away_team']}|{match.get('commence_time', '')}"
+
+    @staticmethod
+    def odds_hash(match: Dict) -> str:
+        """Hash do conteúdo das odds do jogo (mudança de linha/preço → hash novo)"""
+        payload = json.dumps(
+            [match.get('commence_time'), match.get('markets', {})],
+            sort_keys=True, separators=(',', ':')
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def changed_matches(state: Dict[str, Any], matches: List[Dict]) -> List[Dict]:
+        """Jogos novos ou com odds diferentes das do snapshot"""
+        changed = []
+
+        for match in matches:
+            entry = state['matches'].get(DailyCache.match_key(match))
+            if entry is None or entry['odds_hash'] != DailyCache.odds_hash(match):
+                changed.append(match)
+
+        return changed
+
+    @staticmethod
+    def update_league(state: Dict[str, Any], sport: str, matches: List[Dict], opportunities: List[Dict],
+                      max_ttl: Optional[int] = None, now: Optional[float] = None):
+        """
+        Atualiza o snapshot de uma liga
+
+        Args:
+            matches: jogos da liga na janela de análise (viram entradas e definem a validade)
+            opportunities: oportunidades recalculadas (só dos jogos que mudaram)
+            max_ttl: limite da validade da liga (ex: jogos fora da janela ainda vão entrar)
+        """
+        from config.config import Config
+
+        now = time.time() if now is None else now
+
+        # Oportunidades recalculadas agrupadas pelo jogo ("Casa x Fora")
+        by_match = {}
+        for opp in opportunities:
+            by_match.setdefault(opp['match'], []).append(opp)
+
+        changed = {DailyCache.match_key(m) for m in DailyCache.changed_matches(state, matches)}
+
+        # Entradas antigas da liga saem; jogos sem mudança mantêm as oportunidades
+        previous = {key: entry for key, entry in state['matches'].items() if entry['league'] == sport}
+        for key in previous:
+            del state['matches'][key]
+
+        for match in matches:
+            key = DailyCache.match_key(match)
+            if key in changed:
+                match_opps = by_match.get(f"{match['home_team']} x {match['away_team']}", [])
+            else:
+                match_opps = previous[key]['opportunities']
+
+            state['matches'][key] = {
+                'league': sport,
+                'match': f"{match['home_team']} x {match['away_team']}",
+                'commence_time': match.get('commence_time', ''),
+                'odds_hash': DailyCache.odds_hash(match),
+                'opportunities': match_opps
+            }
+
+        ttl = min(
+            (DailyCache.kickoff_ttl(m.get('commence_time', ''), now) for m in matches),
+            default=Config.DAILY_CACHE_MAX_TTL
+        )
+        if max_ttl:
+            ttl = min(ttl, max_ttl)
+
+        state['leagues'][sport] = {
+            'fetched_at': now,
+            'expires_at': now + ttl,
+            'matches_count': len(matches)
+        }
+
+    @staticmethod
+    def defer_league(state: Dict[str, Any], sport: str, ttl: int, now: Optional[float] = None):
+        """
+        Adia a próxima atualização de uma liga que não foi buscada (fora do
+        orçamento de créditos ou erro na API): deixa de ficar vencida por ttl
+        segundos. Jogos já no snapshot são mantidos; liga nunca buscada fica
+        com fetched_at None.
+        """
+        now = time.time() if now is None else now
+        league = state['leagues'].get(sport, {'fetched_at': None, 'matches_count': 0})
+
+        state['leagues'][sport] = {**league, 'expires_at': now + ttl}
+
+    @staticmethod
+    def league_opportunities(state: Dict[str, Any], sport: str) -> List[Dict]:
+        """Oportunidades atuais dos jogos de uma liga"""
+        return [
+            opp
+            for entry in state['matches'].values() if entry['league'] == sport
+            for opp in entry['opportunities']
+        ]
+
+    # =========================
+    # 🔹 EXTRAS (tênis etc.)
+    # =========================
+    @staticmethod
+    def extra_due(state: Dict[str, Any], name: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        entry = state['extras'].get(name)
+        return entry is None or entry['expires_at'] <= now
+
+    @staticmethod
+    def set_extra(state: Dict[str, Any], name: str, opportunities: List[Dict], ttl: int,
+                  now: Optional[float] = None):
+        now = time.time() if now is None else now
+        state['extras'][name] = {'expires_at': now + ttl, 'opportunities': opportunities}
+
+    # =========================
+    # 🔹 LEITURA
+    # =========================
+    @staticmethod
+    def opportunities(state: Dict[str, Any], now: Optional[float] = None) -> List[Dict]:
+        """Oportunidades do snapshot (jogos ainda não iniciados), ordenadas por EV"""
+        now = time.time() if now is None else now
+        opportunities = []
+
+        for entry in state['matches'].values():
+            kickoff = DailyCache._kickoff_timestamp(entry['commence_time'])
+            if kickoff is not None and kickoff <= now:
+                continue
+            opportunities.extend(entry['opportunities'])
+
+        for extra in state['extras'].values():
+            opportunities.extend(extra['opportunities'])
+
+        opportunities.sort(key=lambda x: x.get('ev', 0), reverse=True)
+        return opportunities
+
+    @staticmethod
+    def _started_records(snapshot, now: Optional[float] = None) -> set:
+        """Registros de jogos que já começaram"""
+        now = time.time() if now is None else now
+        started = set()
+
+        for entry in snapshot.meta['matches'].values():
+            kickoff = DailyCache._kickoff_timestamp(entry['commence_time'])
+            if kickoff is not None and kickoff <= now:
+                started.update(entry['records'])
+
+        return started
+
+    @staticmethod
+    def load_today_data() -> Optional[Dict[str, Any]]:
+        """Carrega dados de hoje se existirem (visão consolidada do snapshot)"""
+        snapshot = DailyCache._today_snapshot()
+        if snapshot is None:
+            return None
+
+        meta = snapshot.meta
+        logger.info("📦 Usando cache diário (%s às %s)", meta['date'], meta['timestamp'][:16])
+
+        started = DailyCache._started_records(snapshot)
+
+        return {
+            'date': meta['date'],
+            'timestamp': meta['timestamp'],
+            'opportunities': snapshot.records(i for i in range(len(snapshot)) if i not in started),
+            'matches_count': len(meta['matches']),
+            'leagues_count': sum(1 for league in meta['leagues'].values() if league['matches_count'])
+        }
+
+    @staticmethod
+    def index_summary() -> Optional[Dict[str, Any]]:
+        """
+        Visão de hoje só pelo índice do snapshot (nenhuma oportunidade decodificada)
+
+        Returns:
+            {'date', 'timestamp', 'opportunities_count', 'matches_count', 'matches', 'competitions'}
+            ou None se ainda não buscou hoje
+        """
+        snapshot = DailyCache._today_snapshot()
+        if snapshot is None:
+            return None
+
+        meta = snapshot.meta
+        return {
+            'date': meta['date'],
+            'timestamp': meta['timestamp'],
+            'opportunities_count': len(snapshot) - len(DailyCache._started_records(snapshot)),
+            'matches_count': len(meta['matches']),
+            'matches': snapshot.matches(),
+            'competitions': snapshot.competitions()
+        }
+
+    @staticmethod
+    def top_opportunities(limit: int) -> List[Dict]:
+        """Melhores oportunidades de hoje (registros gravados por EV: decodifica só os primeiros)"""
+        snapshot = DailyCache._today_snapshot()
+        if snapshot is None:
+            return []
+
+        started = DailyCache._started_records(snapshot)
+        ids = []
+        for i in range(len(snapshot)):
+            if len(ids) >= limit:
+                break
+            if i not in started:
+                ids.append(i)
+
+        return snapshot.records(ids)
+
+    @staticmethod
+    def find_opportunities(match: Optional[str] = None, competition: Optional[str] = None,
+                           market: Optional[str] = None) -> List[Dict]:
+        """
+        Oportunidades de hoje pelo índice do snapshot (sem decodificar o dia inteiro)
+        Jogos já iniciados ficam de fora; ordem por EV
+
+        Ex: find_opportunities(match="Arsenal x Chelsea") | find_opportunities(competition="Premier League")
+        """
+        snapshot = DailyCache._today_snapshot()
+        if snapshot is None:
+            return []
+
+        ids = snapshot.find_ids(match=match, competition=competition, market=market)
+        if ids is None:
+            ids = range(len(snapshot))
+
+        return snapshot.records(set(ids) - DailyCache._started_records(snapshot))
+
     @staticmethod
     def clear_cache():
         """Limpa cache (forçar nova busca)"""
-        DailyCache._ensure_cache_dir()
-        
-        if os.path.exists(DailyCache.DATE_FILE):
-            os.remove(DailyCache.DATE_FILE)
-        
-        if os.path.exists(DailyCache.DATA_FILE):
-            os.remove(DailyCache.DATA_FILE)
-        
-        print("🗑️  Cache diário limpo!")
\ No newline at end of file
+        if os.path.exists(DailyCache.SNAPSHOT_FILE):
+            os.remove(DailyCache.SNAPSHOT_FILE)
+
+        logger.info("🗑️  Cache diário limpo!")
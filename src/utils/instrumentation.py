@@ -0,0 +1,192 @@
+"""
+Instrumentação leve do pipeline de oportunidades
+
+- Spans por etapa (fixtures, odds, matching, stats, análise, validação, múltiplas)
+- Chamadas HTTP por provedor (quantidade, bytes, latência, erros)
+- Cache hit/miss por prefixo de chave
+
+O trace ativo fica em um ContextVar; sem trace ativo (padrão: TRACE_ENABLED=False)
+span/record_* retornam imediatamente.
+"""
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+from config.config import Config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_current_trace = contextvars.ContextVar('betiq_trace', default=None)
+_NOOP = nullcontext()
+
+# "odds:soccer_epl:2025-01-01" → "odds" | "api_football_fixtures_2025-01-01" → "api_football_fixtures"
+_KEY_PREFIX = re.compile(r':|_(?=\d)')
+
+
+class Trace:
+    """Coleta spans, chamadas HTTP e acessos a cache de uma execução"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.utcnow().isoformat()
+        self.duration_ms = None
+        self.spans = []
+        self.http = {}
+        self.cache = {}
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._saved = False
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def add_span(self, name: str, start_ms: float, duration_ms: float, **attrs):
+        span = {'name': name, 'start_ms': round(start_ms, 1), 'duration_ms': round(duration_ms, 1)}
+        if attrs:
+            span.update(attrs)
+        with self._lock:
+            self.spans.append(span)
+
+    def add_http(self, provider: str, elapsed_ms: float, size: int, status: int):
+        with self._lock:
+            stats = self.http.setdefault(provider, {
+                'calls': 0, 'bytes': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'errors': 0
+            })
+            stats['calls'] += 1
+            stats['bytes'] += size
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            if status >= 400:
+                stats['errors'] += 1
+
+    def add_cache(self, prefix: str, hit: bool, memory: bool = False):
+        with self._lock:
+            stats = self.cache.setdefault(prefix, {'hits': 0, 'misses': 0, 'memory_hits': 0})
+            stats['hits' if hit else 'misses'] += 1
+            if memory:
+                stats['memory_hits'] += 1
+
+    def stages(self) -> Dict[str, float]:
+        """Tempo total por etapa (spans com o mesmo nome somados)"""
+        totals = {}
+        for span in self.spans:
+            totals[span['name']] = totals.get(span['name'], 0.0) + span['duration_ms']
+        return {name: round(ms, 1) for name, ms in totals.items()}
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            http = {
+                provider: {
+                    **stats,
+                    'total_ms': round(stats['total_ms'], 1),
+                    'max_ms': round(stats['max_ms'], 1),
+                    'avg_ms': round(stats['total_ms'] / stats['calls'], 1)
+                }
+                for provider, stats in self.http.items()
+            }
+            cache = {prefix: dict(stats) for prefix, stats in self.cache.items()}
+            spans = list(self.spans)
+
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration_ms if self.duration_ms is not None else self.elapsed_ms(), 1),
+            'stages': self.stages(),
+            'spans': spans,
+            'http': http,
+            'cache': cache
+        }
+
+    def finish(self, trace_file: Optional[str] = None) -> Dict:
+        """Fecha o trace e grava no JSONL (uma única vez)"""
+        self.duration_ms = self.elapsed_ms()
+        data = self.to_dict()
+
+        trace_file = trace_file or Config.TRACE_FILE
+        if trace_file and not self._saved:
+            self._saved = True
+            try:
+                os.makedirs(os.path.dirname(trace_file) or '.', exist_ok=True)
+                with open(trace_file, 'a') as f:
+                    f.write(json.dumps(data) + '\n')
+            except OSError as e:
+                logger.warning("⚠️  Erro ao gravar trace: %s", e)
+
+        return data
+
+
+def start_trace(name: str) -> Optional[Trace]:
+    """Cria um trace (None se a instrumentação estiver desligada)"""
+    return Trace(name) if Config.TRACE_ENABLED else None
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def use_trace(trace: Optional[Trace]):
+    """Ativa o trace no contexto atual"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def span(name: str, **attrs):
+    """Mede uma etapa do pipeline (no-op sem trace ativo)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP
+    return _span(trace, name, attrs)
+
+
+@contextmanager
+def _span(trace: Trace, name: str, attrs: Dict):
+    start = trace.elapsed_ms()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, trace.elapsed_ms() - start, **attrs)
+
+
+def bind(func: Callable) -> Callable:
+    """Propaga o trace ativo para funções executadas em ThreadPoolExecutor"""
+    trace = _current_trace.get()
+    if trace is None:
+        return func
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with use_trace(trace):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def record_response(provider: str, response):
+    """Registra uma resposta HTTP (requests.Response) do provedor"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+
+    elapsed = getattr(response, 'elapsed', None)
+    elapsed_ms = elapsed.total_seconds() * 1000 if elapsed is not None else 0.0
+    trace.add_http(provider, elapsed_ms, len(response.content or b''), response.status_code)
+
+
+def record_cache(key: str, hit: bool, memory: bool = False):
+    """Registra hit/miss de cache agrupado pelo prefixo da chave (memory = hit na camada local)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.add_cache(_KEY_PREFIX.split(key, 1)[0], hit, memory)
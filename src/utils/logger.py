@@ -0,0 +1,71 @@
+"""
+Logger estruturado com níveis (stdlib logging)
+
+Use argumentos lazy - logger.debug("Match: %s vs %s", home, away) - para que
+mensagens de níveis desligados nunca sejam formatadas. LOG_LEVEL define o nível
+(DEBUG, INFO, WARNING...) e LOG_FORMAT=json gera uma linha JSON por evento,
+incluindo campos passados em extra={...}.
+"""
+import json
+import logging
+import sys
+import threading
+
+from config.config import Config
+
+_ROOT = 'betiq'
+_configured = False
+_configure_lock = threading.Lock()
+
+# Atributos padrão do LogRecord (o resto veio de extra={...})
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por evento"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _configure():
+    global _configured
+
+    with _configure_lock:
+        if _configured:
+            return
+
+        handler = logging.StreamHandler(sys.stdout)
+        if Config.LOG_FORMAT == 'json':
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(name)s | %(message)s', '%H:%M:%S'))
+
+        root = logging.getLogger(_ROOT)
+        root.setLevel(Config.LOG_LEVEL.upper())
+        root.addHandler(handler)
+        root.propagate = False
+
+        _configured = True
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger do módulo (ex: get_logger(__name__) → betiq.agents.betting_agent)"""
+    if not _configured:
+        _configure()
+
+    if name.startswith('src.'):
+        name = name[len('src.'):]
+
+    return logging.getLogger(f'{_ROOT}.{name}')
@@ -1,7 +1,7 @@
 import json
 import os
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 class RejectionLogger:
     """Logger estruturado para registrar rejeições de oportunidades"""
@@ -19,14 +19,31 @@ class RejectionLogger:
         competition: Optional[str] = None
     ):
         """Registra uma rejeição com detalhes estruturados"""
-        entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+        self.log_rejections([{
             "match": match,
             "market": market,
-            "competition": competition,
             "reason": reason,
-            "details": details
-        }
+            "details": details,
+            "competition": competition
+        }])
+    
+    def log_rejections(self, rejections: List[Dict]):
+        """Registra várias rejeições abrindo o arquivo uma única vez"""
+        if not rejections:
+            return
+        
+        timestamp = datetime.utcnow().isoformat()
+        lines = [
+            json.dumps({
+                "timestamp": timestamp,
+                "match": r["match"],
+                "market": r["market"],
+                "competition": r.get("competition"),
+                "reason": r["reason"],
+                "details": r["details"]
+            })
+            for r in rejections
+        ]
         
         with open(self.log_file, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
+            f.write('\n'.join(lines) + '\n')
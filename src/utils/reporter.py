@@ -129,4 +129,21 @@ Isso protege seus lucros e reduz risco.
 
 Próxima fase inicia com R$ {new_bankroll:.2f}
 {'='*60}
-"""
\ No newline at end of file
+"""
+    
+    @staticmethod
+    def format_trace(trace: Dict) -> str:
+        """Formata tempos por etapa, chamadas HTTP e cache da análise"""
+        output = f"\n⏱️ INSTRUMENTAÇÃO ({trace['duration_ms'] / 1000:.2f}s):\n"
+        
+        for name, ms in trace['stages'].items():
+            output += f"- {name}: {ms / 1000:.2f}s\n"
+        
+        for provider, stats in trace['http'].items():
+            output += (f"🌐 {provider}: {stats['calls']} chamadas | {stats['bytes'] / 1024:.0f} KB | "
+                       f"média {stats['avg_ms']:.0f}ms | máx {stats['max_ms']:.0f}ms | erros {stats['errors']}\n")
+        
+        for prefix, stats in trace['cache'].items():
+            output += f"💾 {prefix}: {stats['hits']} hits ({stats['memory_hits']} em memória) / {stats['misses']} misses\n"
+        
+        return output
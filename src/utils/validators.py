@@ -1,7 +1,40 @@
+import numpy as np
 from typing import Dict, Tuple, List
 
+from src.models.records import OpportunityFrame
+
 class OpportunityValidator:
-    """Valida oportunidades antes de sugerir"""
+    """
+    Valida oportunidades antes de sugerir
+    
+    Em lote (validate_frame): uma passada NumPy sobre as colunas do slate,
+    retornando máscara de aprovadas + bitmask de motivos por oportunidade.
+    As mensagens legíveis só são montadas sob demanda (describe).
+    """
+    
+    # Códigos de motivo (bits combináveis)
+    ODDS_TOO_LOW = 1
+    ODDS_TOO_HIGH = 2
+    LOW_PROBABILITY = 4
+    LOW_EV = 8
+    STAKE_OVER_LIMIT = 16
+    STAKE_TOO_SMALL = 32
+    DAILY_LIMIT = 64  # Preenchido por quem aplica RiskManager.daily_limit_mask
+    
+    REASONS = {
+        ODDS_TOO_LOW: 'odds_too_low',
+        ODDS_TOO_HIGH: 'odds_too_high',
+        LOW_PROBABILITY: 'low_probability',
+        LOW_EV: 'low_ev',
+        STAKE_OVER_LIMIT: 'stake_over_limit',
+        STAKE_TOO_SMALL: 'stake_too_small',
+        DAILY_LIMIT: 'daily_limit'
+    }
+    
+    MIN_ODDS = 1.5
+    MAX_ODDS = 3.0
+    MIN_PROBABILITY = 0.45
+    MIN_STAKE = 1.0
     
     @staticmethod
     def validate_odds_range(odds: float, min_odds: float = 1.5, max_odds: float = 3.0) -> Tuple[bool, str]:
@@ -36,33 +69,59 @@ class OpportunityValidator:
             return False, "Stake muito pequeno (< R$ 1)"
         return True, ""
     
-    @staticmethod
-    def validate_opportunity(opp: Dict, phase_info: Dict, bankroll: float) -> Tuple[bool, List[str]]:
-        """Valida oportunidade completa"""
-        errors = []
-        
-        # Valida odds
-        valid, msg = OpportunityValidator.validate_odds_range(opp['odds'])
-        if not valid:
-            errors.append(msg)
+    @classmethod
+    def validate_frame(cls, frame: OpportunityFrame, phase_info: Dict,
+                       bankroll: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Valida um lote de oportunidades de uma vez
         
-        # Valida probabilidade
-        valid, msg = OpportunityValidator.validate_probability(opp['probability'])
-        if not valid:
-            errors.append(msg)
+        Returns:
+            (valid, reasons): máscara booleana e bitmask uint8 de motivos (0 = aprovada)
+        """
+        stake_pct = frame.stake / bankroll * 100
         
-        # Valida EV
-        valid, msg = OpportunityValidator.validate_ev(opp['ev'], phase_info['min_ev'])
-        if not valid:
-            errors.append(msg)
+        reasons = (
+            np.where(frame.odds < cls.MIN_ODDS, cls.ODDS_TOO_LOW, 0)
+            | np.where(frame.odds > cls.MAX_ODDS, cls.ODDS_TOO_HIGH, 0)
+            | np.where(frame.probability < cls.MIN_PROBABILITY, cls.LOW_PROBABILITY, 0)
+            | np.where(frame.ev < phase_info['min_ev'], cls.LOW_EV, 0)
+            | np.where(stake_pct > phase_info['max_stake_pct'], cls.STAKE_OVER_LIMIT, 0)
+            | np.where(frame.stake < cls.MIN_STAKE, cls.STAKE_TOO_SMALL, 0)
+        ).astype(np.uint8)
         
-        # Valida stake
-        valid, msg = OpportunityValidator.validate_stake(
-            opp['stake'], 
-            bankroll, 
-            phase_info['max_stake_pct']
+        return reasons == 0, reasons
+    
+    @classmethod
+    def describe(cls, reasons: int, opp: Dict, phase_info: Dict, bankroll: float) -> List[str]:
+        """Mensagens legíveis dos motivos de uma oportunidade (só para exibição/log)"""
+        checks = (
+            (cls.ODDS_TOO_LOW | cls.ODDS_TOO_HIGH,
+             lambda: cls.validate_odds_range(opp['odds'], cls.MIN_ODDS, cls.MAX_ODDS)),
+            (cls.LOW_PROBABILITY,
+             lambda: cls.validate_probability(opp['probability'], cls.MIN_PROBABILITY)),
+            (cls.LOW_EV,
+             lambda: cls.validate_ev(opp['ev'], phase_info['min_ev'])),
+            (cls.STAKE_OVER_LIMIT | cls.STAKE_TOO_SMALL,
+             lambda: cls.validate_stake(opp['stake'], bankroll, phase_info['max_stake_pct'])),
         )
-        if not valid:
-            errors.append(msg)
         
-        return len(errors) == 0, errors
\ No newline at end of file
+        messages = [check()[1] for bits, check in checks if reasons & bits]
+        if reasons & cls.DAILY_LIMIT:
+            messages.append("Limite diário atingido")
+        return messages
+    
+    @classmethod
+    def count_reasons(cls, reasons: np.ndarray) -> Dict[str, int]:
+        """Contagem de rejeições por motivo (uma oportunidade pode ter vários)"""
+        counts = {}
+        for bit, name in cls.REASONS.items():
+            count = int(np.count_nonzero(reasons & bit))
+            if count:
+                counts[name] = count
+        return counts
+    
+    @classmethod
+    def validate_opportunity(cls, opp: Dict, phase_info: Dict, bankroll: float) -> Tuple[bool, List[str]]:
+        """Valida oportunidade completa (lote de uma; ver validate_frame)"""
+        valid, reasons = cls.validate_frame(OpportunityFrame.from_dicts([opp]), phase_info, bankroll)
+        return bool(valid[0]), cls.describe(int(reasons[0]), opp, phase_info, bankroll)
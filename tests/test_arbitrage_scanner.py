@@ -0,0 +1,110 @@
+import pytest
+
+from src.utils.arbitrage_scanner import ArbitrageScanner
+
+
+def game(markets, home='Arsenal', away='Chelsea'):
+    return {
+        'match_id': f'{home}-{away}',
+        'home_team': home,
+        'away_team': away,
+        'commence_time': '2025-03-01T15:00:00Z',
+        'league': 'soccer_epl',
+        'markets': {key: {'odd': odd, 'bookmaker': bookmaker} for key, (odd, bookmaker) in markets.items()},
+    }
+
+
+def test_three_way_surebet_math():
+    games = [game({'home_ml': (3.2, 'b1'), 'draw': (3.6, 'b2'), 'away_ml': (3.9, 'b3')})]
+
+    surebets = ArbitrageScanner.scan(games, total_stake=100)
+
+    assert len(surebets) == 1
+    surebet = surebets[0]
+    implied = 1 / 3.2 + 1 / 3.6 + 1 / 3.9
+
+    assert surebet['market'] == '1X2'
+    assert surebet['implied_total'] == pytest.approx(round(implied, 4))
+    assert surebet['profit_pct'] == pytest.approx(round((1 / implied - 1) * 100, 2))
+    assert surebet['guaranteed_return'] == pytest.approx(round(100 / implied, 2))
+
+    legs = {leg['outcome']: leg for leg in surebet['legs']}
+    assert {key: leg['bookmaker'] for key, leg in legs.items()} == {'home_ml': 'b1', 'draw': 'b2', 'away_ml': 'b3'}
+    assert sum(leg['stake'] for leg in legs.values()) == pytest.approx(100, abs=0.02)
+
+    # Mesmo retorno qualquer que seja o resultado
+    for leg in legs.values():
+        assert leg['stake'] * leg['odds'] == pytest.approx(surebet['guaranteed_return'], abs=0.05)
+
+
+def test_no_surebet_when_book_is_overround():
+    games = [game({'home_ml': (2.0, 'b1'), 'draw': (3.3, 'b2'), 'away_ml': (3.5, 'b3')})]
+
+    assert ArbitrageScanner.scan(games) == []
+
+
+def test_incomplete_group_is_ignored():
+    # Futebol sem o empate cotado: o 1X2 está incompleto, não é surebet de dois lados
+    games = [game({'home_ml': (5.0, 'b1'), 'away_ml': (5.0, 'b2')})]
+
+    assert ArbitrageScanner.scan(games) == []
+
+
+def test_two_way_totals_and_spreads():
+    games = [game({
+        'over_2.5': (2.1, 'b1'), 'under_2.5': (2.05, 'b2'),
+        'spread_-0.5': (2.2, 'b1'), 'spread_away_0.5': (1.9, 'b3'),
+    })]
+
+    surebets = ArbitrageScanner.scan(games)
+
+    assert {s['market'] for s in surebets} == {'Over/Under 2.5', 'Handicap -0.5'}
+    assert [s['profit_pct'] for s in surebets] == sorted((s['profit_pct'] for s in surebets), reverse=True)
+
+
+def test_min_profit_filter_and_multiple_games():
+    games = [
+        game({'home_ml': (3.2, 'b1'), 'draw': (3.6, 'b2'), 'away_ml': (3.9, 'b3')}),
+        game({'over_2.5': (2.02, 'b1'), 'under_2.5': (2.02, 'b2')}, home='Liverpool', away='Everton'),
+    ]
+
+    assert len(ArbitrageScanner.scan(games)) == 2
+
+    surebets = ArbitrageScanner.scan(games, min_profit_pct=5)
+    assert [s['match'] for s in surebets] == ['Arsenal x Chelsea']
+
+
+def test_empty_slate():
+    assert ArbitrageScanner.scan([]) == []
+
+
+def test_two_way_moneyline_outside_soccer():
+    games = [game({'home_ml': (2.1, 'b1'), 'away_ml': (2.05, 'b2')}, home='Lakers', away='Celtics')]
+    games[0]['league'] = 'basketball_nba'
+
+    surebets = ArbitrageScanner.scan(games)
+
+    assert len(surebets) == 1
+    assert {leg['outcome'] for leg in surebets[0]['legs']} == {'home_ml', 'away_ml'}
+
+
+@pytest.mark.parametrize('markets', [
+    {'over_2.0': (2.1, 'b1'), 'under_2.0': (2.05, 'b2')},
+    {'over_2.25': (2.1, 'b1'), 'under_2.25': (2.05, 'b2')},
+    {'over_2.75': (2.1, 'b1'), 'under_2.75': (2.05, 'b2')},
+    {'spread_0.0': (2.1, 'b1'), 'spread_away_0.0': (2.05, 'b2')},
+    {'spread_-0.25': (2.1, 'b1'), 'spread_away_0.25': (2.05, 'b2')},
+    {'spread_-0.75': (2.1, 'b1'), 'spread_away_0.75': (2.05, 'b2')},
+])
+def test_lines_with_push_are_excluded(markets):
+    # Push devolve toda/metade da aposta: as pernas não pagam o mesmo, não há retorno garantido
+    assert ArbitrageScanner.scan([game(markets)]) == []
+
+
+def test_half_line_kept_alongside_whole_line():
+    games = [game({
+        'over_2.0': (2.1, 'b1'), 'under_2.0': (2.05, 'b2'),
+        'over_2.5': (2.1, 'b1'), 'under_2.5': (2.05, 'b2'),
+    })]
+
+    assert [s['market'] for s in ArbitrageScanner.scan(games)] == ['Over/Under 2.5']
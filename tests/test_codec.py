@@ -0,0 +1,94 @@
+import json
+import zlib
+
+import pytest
+
+from src.cache import codec
+from src.cache.codec import CacheCodec, DECODE_ERRORS
+
+VALUE = {
+    'match': 'São Paulo x Grêmio',
+    'markets': {'over_2.5': {'odd': 1.95, 'bookmaker': 'pinnacle'}},
+    'stale': ['home_ml'],
+    'count': 3,
+    'ok': True,
+    'none': None,
+    'games': [{'id': i, 'odds': [1.5 + i / 10, 2.4]} for i in range(50)],
+}
+
+
+@pytest.mark.parametrize('fmt, compression, flags', [
+    ('json', 'none', codec.FORMAT_JSON | (codec.COMPRESSION_NONE << 4)),
+    ('json', 'zlib', codec.FORMAT_JSON | (codec.COMPRESSION_ZLIB << 4)),
+    pytest.param('msgpack', 'none', codec.FORMAT_MSGPACK | (codec.COMPRESSION_NONE << 4),
+                  marks=pytest.mark.skipif(codec.msgpack is None, reason='msgpack não instalado')),
+    pytest.param('msgpack', 'zstd', codec.FORMAT_MSGPACK | (codec.COMPRESSION_ZSTD << 4),
+                  marks=pytest.mark.skipif(codec.msgpack is None or codec.zstandard is None,
+                                           reason='msgpack/zstandard não instalados')),
+])
+def test_round_trip(fmt, compression, flags):
+    data = CacheCodec(fmt, compression, compress_min_bytes=0).encode(VALUE)
+
+    assert data[:2] == codec.MAGIC
+    assert data[2] == codec.VERSION
+    assert data[3] == flags
+    assert CacheCodec.decode(data) == VALUE
+
+
+def test_small_payload_is_not_compressed():
+    data = CacheCodec('json', 'zlib', compress_min_bytes=1024).encode({'a': 1})
+
+    assert data[3] >> 4 == codec.COMPRESSION_NONE
+    assert CacheCodec.decode(data) == {'a': 1}
+
+
+def test_zstd_falls_back_to_zlib_when_missing(monkeypatch):
+    monkeypatch.setattr(codec, 'zstandard', None)
+
+    data = CacheCodec('json', 'zstd', compress_min_bytes=0).encode(VALUE)
+
+    assert data[3] >> 4 == codec.COMPRESSION_ZLIB
+    assert CacheCodec.decode(data) == VALUE
+
+
+def test_decodes_legacy_json_bytes_and_str():
+    legacy = json.dumps(VALUE)
+
+    assert CacheCodec.decode(legacy.encode('utf-8')) == VALUE
+    assert CacheCodec.decode(legacy) == VALUE
+
+
+def test_unknown_version_raises_value_error():
+    data = bytearray(CacheCodec('json', 'none').encode(VALUE))
+    data[2] = codec.VERSION + 1
+
+    with pytest.raises(ValueError):
+        CacheCodec.decode(bytes(data))
+
+
+@pytest.mark.parametrize('data', [
+    codec.MAGIC + bytes((codec.VERSION, codec.FORMAT_JSON | (codec.COMPRESSION_ZLIB << 4))) + b'not zlib',
+    codec.MAGIC + bytes((codec.VERSION, 0x0F)) + b'{}',
+    b'{"truncated": ',
+])
+def test_corrupt_entries_raise_decode_errors(data):
+    with pytest.raises(DECODE_ERRORS):
+        CacheCodec.decode(data)
+
+
+@pytest.mark.skipif(codec.zstandard is None, reason='zstandard não instalado')
+def test_corrupt_zstd_raises_decode_error():
+    data = CacheCodec('json', 'zstd', compress_min_bytes=0).encode(VALUE)
+
+    with pytest.raises(DECODE_ERRORS):
+        CacheCodec.decode(data[:4] + zlib.compress(b'x'))
+
+
+@pytest.mark.skipif(codec.msgpack is None, reason='msgpack não instalado')
+def test_corrupt_msgpack_raises_decode_error():
+    data = CacheCodec('msgpack', 'none').encode(VALUE)
+
+    with pytest.raises(DECODE_ERRORS):
+        CacheCodec.decode(data[:4] + b'\xc1')
+    with pytest.raises(DECODE_ERRORS):
+        CacheCodec.decode(data[:-10])
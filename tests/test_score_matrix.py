@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from src.models.score_matrix import ScoreMatrix, settle_weights, split_line
+
+
+@pytest.mark.parametrize('line, expected', [
+    (-0.25, (-0.5, 0.0)),
+    (0.25, (0.0, 0.5)),
+    (2.75, (2.5, 3.0)),
+    (-1.75, (-2.0, -1.5)),
+    (2.5, (2.5, 2.5)),
+    (1.0, (1.0, 1.0)),
+])
+def test_split_line(line, expected):
+    low, high = split_line(line)
+    assert (float(low), float(high)) == expected
+
+
+def test_settle_weights_half_line():
+    margin = np.array([-1, 0, 1])
+    win, push = settle_weights(margin, -0.5)
+
+    np.testing.assert_array_equal(win, [0, 0, 1])
+    np.testing.assert_array_equal(push, [0, 0, 0])
+
+
+def test_settle_weights_whole_line_pushes():
+    margin = np.array([-1, 0, 1])
+    win, push = settle_weights(margin, 0.0)
+
+    np.testing.assert_array_equal(win, [0, 0, 1])
+    np.testing.assert_array_equal(push, [0, 1, 0])
+
+
+def test_settle_weights_quarter_lines():
+    margin = np.array([-1, 0, 1, 2])
+
+    # -0.25: empate perde metade (metade em -0.5, metade devolvida em 0.0)
+    win, push = settle_weights(margin, -0.25)
+    np.testing.assert_array_equal(win, [0, 0, 1, 1])
+    np.testing.assert_array_equal(push, [0, 0.5, 0, 0])
+
+    # +0.25: empate ganha metade (metade em 0.0 devolvida, metade em +0.5)
+    win, push = settle_weights(margin, 0.25)
+    np.testing.assert_array_equal(win, [0, 0.5, 1, 1])
+    np.testing.assert_array_equal(push, [0, 0.5, 0, 0])
+
+    # -1.75: vitória por 2 ganha metade (-1.5) e devolve metade (-2.0)
+    win, push = settle_weights(margin, -1.75)
+    np.testing.assert_array_equal(win, [0, 0, 0, 0.5])
+    np.testing.assert_array_equal(push, [0, 0, 0, 0.5])
+
+    # -1.25: vitória por 1 devolve metade (-1.0) e perde metade (-1.5)
+    win, push = settle_weights(margin, -1.25)
+    np.testing.assert_array_equal(win, [0, 0, 0, 1])
+    np.testing.assert_array_equal(push, [0, 0, 0.5, 0])
+
+
+def test_settle_weights_totals_sign():
+    goals = np.arange(5)
+
+    # Over 2.75 (margin = total, line negativa): 3 gols → metade ganha, metade devolvida
+    win, push = settle_weights(goals, -2.75, sign=1)
+    np.testing.assert_array_equal(win, [0, 0, 0, 0.5, 1])
+    np.testing.assert_array_equal(push, [0, 0, 0, 0.5, 0])
+
+    # Under 2.25: 2 gols ganha, 3 perde, sem devolução fora de 2 gols
+    win, push = settle_weights(goals, 2.25, sign=-1)
+    np.testing.assert_array_equal(win, [1, 1, 0.5, 0, 0])
+    np.testing.assert_array_equal(push, [0, 0, 0.5, 0, 0])
+
+
+def test_settle_weights_broadcasts_lines():
+    margin = np.array([0, 1])
+    lines = np.array([[-0.5], [-0.25], [0.0]])
+
+    win, push = settle_weights(margin, lines)
+
+    np.testing.assert_array_equal(win, [[0, 1], [0, 1], [0, 1]])
+    np.testing.assert_array_equal(push, [[0, 0], [0.5, 0], [1, 0]])
+
+
+def test_quarter_line_is_average_of_halves():
+    matrix = ScoreMatrix(1.6, 1.1)
+
+    quarter = matrix.asian_handicap(-0.25)
+    low = matrix.asian_handicap(-0.5)
+    high = matrix.asian_handicap(0.0)
+
+    assert quarter['win'] == pytest.approx((low['win'] + high['win']) / 2)
+    assert quarter['push'] == pytest.approx((low['push'] + high['push']) / 2)
+
+
+def test_totals_and_handicap_probabilities_sum_to_one():
+    matrix = ScoreMatrix(1.4, 1.2)
+
+    for line in (2.0, 2.25, 2.5, 2.75):
+        totals = matrix.totals(line)
+        over, under = totals['over'], totals['under']
+        assert over['push'] == pytest.approx(under['push'])
+        assert over['win'] + under['win'] + over['push'] == pytest.approx(1.0)
+
+    home = matrix.asian_handicap(-0.75, 'home')
+    away = matrix.asian_handicap(0.75, 'away')
+    assert home['win'] + away['win'] + home['push'] == pytest.approx(1.0)
+
+    result = matrix.match_result()
+    assert matrix.asian_handicap(-0.5)['win'] == pytest.approx(result['home'])
+
+
+def test_effective_probability_matches_ev_with_push():
+    settlement = {'win': 0.4, 'push': 0.2, 'lose': 0.4}
+    odds = 2.1
+
+    p_eq = ScoreMatrix.effective_probability(settlement, odds)
+
+    assert p_eq * odds - 1 == pytest.approx(settlement['win'] * odds + settlement['push'] - 1)
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from config.config import Config
+from src.services.team_matcher import TeamAliasStore, TeamMatcher
+
+
+@pytest.fixture(autouse=True)
+def isolated_aliases(tmp_path, monkeypatch):
+    """Aliases vazios e em arquivo temporário (não lê nem grava o cache/ do projeto)"""
+    monkeypatch.setattr(Config, 'TEAM_ALIASES_FILE', str(tmp_path / 'team_aliases.json'))
+    monkeypatch.setattr(TeamAliasStore, '_aliases', {})
+    monkeypatch.setattr(TeamAliasStore, '_dirty', False)
+    TeamMatcher.canonical_name.cache_clear()
+    yield
+    TeamMatcher.canonical_name.cache_clear()
+
+
+def fixture(home, away, date):
+    return {'home_team': home, 'away_team': away, 'date': date}
+
+
+def test_match_slate_assigns_each_fixture_once():
+    index = TeamMatcher.build_index([
+        fixture('Arsenal', 'Chelsea', '2025-03-01T15:00:00+00:00'),
+        fixture('Liverpool', 'Everton', '2025-03-01T15:00:00+00:00'),
+    ])
+
+    results = index.match_slate([
+        ('Arsenal', 'Chelsea', '2025-03-01T15:00:00Z'),
+        ('Arsenal FC', 'Chelsea FC', '2025-03-01T15:00:00Z'),
+        ('Liverpool', 'Everton', '2025-03-01T15:00:00Z'),
+    ], alias_min_score=1.1)
+
+    assert results[0]['home_team'] == 'Arsenal'
+    assert results[0]['match_score'] == pytest.approx(1.0)
+    assert results[1] is None
+    assert results[2]['home_team'] == 'Liverpool'
+
+
+def test_match_slate_prefers_best_global_assignment():
+    index = TeamMatcher.build_index([
+        fixture('Real Madrid', 'Getafe', '2025-03-01T20:00:00+00:00'),
+        fixture('Real Madrid Castilla', 'Getafe B', '2025-03-01T20:00:00+00:00'),
+    ])
+
+    results = index.match_slate([
+        ('Real Madrid Castilla', 'Getafe B', '2025-03-01T20:00:00Z'),
+        ('Real Madrid', 'Getafe', '2025-03-01T20:00:00Z'),
+    ], alias_min_score=1.1)
+
+    assert [r['home_team'] for r in results] == ['Real Madrid Castilla', 'Real Madrid']
+
+
+def test_match_slate_midnight_fixture_assigned_once():
+    # Eventos em dias diferentes disputando o mesmo fixture perto da meia-noite
+    index = TeamMatcher.build_index([
+        fixture('Flamengo', 'Palmeiras', '2025-03-02T00:30:00+00:00'),
+    ])
+
+    results = index.match_slate([
+        ('Flamengo', 'Palmeiras', '2025-03-01T23:00:00Z'),
+        ('Flamengo', 'Palmeiras', '2025-03-02T01:00:00Z'),
+    ], alias_min_score=1.1)
+
+    assert sum(result is not None for result in results) == 1
+
+
+def test_match_slate_respects_time_tolerance():
+    index = TeamMatcher.build_index([
+        fixture('Arsenal', 'Chelsea', '2025-03-01T15:00:00+00:00'),
+    ])
+
+    results = index.match_slate([('Arsenal', 'Chelsea', '2025-03-01T20:00:00Z')],
+                                time_tolerance_hours=3, alias_min_score=1.1)
+
+    assert results == [None]
+
+
+def test_match_slate_agrees_with_match_teams():
+    fixtures = [
+        fixture('Manchester United', 'Tottenham', '2025-03-01T17:30:00+00:00'),
+        fixture('Aston Villa', 'Newcastle', '2025-03-01T17:30:00+00:00'),
+    ]
+    events = [
+        ('Manchester United', 'Tottenham Hotspur', '2025-03-01T17:30:00Z'),
+        ('Aston Villa', 'Newcastle United', '2025-03-01T17:30:00Z'),
+    ]
+
+    results = TeamMatcher.build_index(fixtures).match_slate(events, alias_min_score=1.1)
+
+    for (home, away, date), result in zip(events, results):
+        expected = TeamMatcher.match_teams(home, away, fixtures, date)
+        assert result is not None and expected is not None
+        assert result['home_team'] == expected['home_team']
+
+
+def test_learned_aliases_saved_to_config_file(tmp_path):
+    assert TeamAliasStore.learn('wolverhampton wanderers', 'wolves')
+    TeamAliasStore.save()
+
+    assert json.loads((tmp_path / 'team_aliases.json').read_text()) == {'wolverhampton wanderers': 'wolves'}
@@ -0,0 +1,94 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.models.records import OpportunityFrame
+from src.utils.validators import OpportunityValidator as V
+
+PHASE_INFO = {'min_ev': 8.0, 'max_stake_pct': 15.0}
+BANKROLL = 100.0
+
+
+def legacy_validate(opp, phase_info, bankroll):
+    """validate_opportunity antes do lote vetorizado (uma checagem escalar por regra)"""
+    checks = (
+        V.validate_odds_range(opp['odds']),
+        V.validate_probability(opp['probability']),
+        V.validate_ev(opp['ev'], phase_info['min_ev']),
+        V.validate_stake(opp['stake'], bankroll, phase_info['max_stake_pct']),
+    )
+    errors = [msg for valid, msg in checks if not valid]
+    return len(errors) == 0, errors
+
+
+# Valores nos limites de cada regra (abaixo, no limite, acima)
+GRID = [
+    {'odds': odds, 'probability': probability, 'ev': ev, 'stake': stake}
+    for odds, probability, ev, stake in itertools.product(
+        (1.49, 1.5, 2.2, 3.0, 3.01),
+        (0.44, 0.45, 0.6),
+        (7.9, 8.0, 12.0),
+        (0.5, 1.0, 15.0, 15.5),
+    )
+]
+
+
+@pytest.mark.parametrize('bankroll', [BANKROLL, 5.0])
+def test_validate_opportunity_matches_legacy(bankroll):
+    for opp in GRID:
+        assert V.validate_opportunity(opp, PHASE_INFO, bankroll) == legacy_validate(opp, PHASE_INFO, bankroll), opp
+
+
+def test_validate_frame_reason_bits():
+    opps = [
+        {'odds': 2.0, 'probability': 0.6, 'ev': 10.0, 'stake': 5.0},
+        {'odds': 1.4, 'probability': 0.6, 'ev': 10.0, 'stake': 5.0},
+        {'odds': 3.5, 'probability': 0.3, 'ev': 10.0, 'stake': 5.0},
+        {'odds': 2.0, 'probability': 0.6, 'ev': 5.0, 'stake': 20.0},
+        {'odds': 2.0, 'probability': 0.6, 'ev': 10.0, 'stake': 0.5},
+    ]
+
+    valid, reasons = V.validate_frame(OpportunityFrame.from_dicts(opps), PHASE_INFO, BANKROLL)
+
+    assert reasons.dtype == np.uint8
+    np.testing.assert_array_equal(valid, [True, False, False, False, False])
+    np.testing.assert_array_equal(reasons, [
+        0,
+        V.ODDS_TOO_LOW,
+        V.ODDS_TOO_HIGH | V.LOW_PROBABILITY,
+        V.LOW_EV | V.STAKE_OVER_LIMIT,
+        V.STAKE_TOO_SMALL,
+    ])
+
+
+def test_reason_bits_match_scalar_checks():
+    valid, reasons = V.validate_frame(OpportunityFrame.from_dicts(GRID), PHASE_INFO, BANKROLL)
+
+    for opp, ok, bits in zip(GRID, valid, reasons.tolist()):
+        assert bool(bits & (V.ODDS_TOO_LOW | V.ODDS_TOO_HIGH)) == (not V.validate_odds_range(opp['odds'])[0])
+        assert bool(bits & V.LOW_PROBABILITY) == (not V.validate_probability(opp['probability'])[0])
+        assert bool(bits & V.LOW_EV) == (not V.validate_ev(opp['ev'], PHASE_INFO['min_ev'])[0])
+        assert bool(bits & (V.STAKE_OVER_LIMIT | V.STAKE_TOO_SMALL)) == (
+            not V.validate_stake(opp['stake'], BANKROLL, PHASE_INFO['max_stake_pct'])[0]
+        )
+        assert ok == (bits == 0)
+
+
+def test_describe_and_count_reasons():
+    opp = {'odds': 1.4, 'probability': 0.6, 'ev': 5.0, 'stake': 5.0}
+    bits = V.ODDS_TOO_LOW | V.LOW_EV | V.DAILY_LIMIT
+
+    messages = V.describe(bits, opp, PHASE_INFO, BANKROLL)
+
+    assert len(messages) == 3
+    assert messages[-1] == "Limite diário atingido"
+
+    reasons = np.array([bits, V.LOW_EV, 0], dtype=np.uint8)
+    assert V.count_reasons(reasons) == {'odds_too_low': 1, 'low_ev': 2, 'daily_limit': 1}
+
+
+def test_empty_frame():
+    valid, reasons = V.validate_frame(OpportunityFrame.from_dicts([]), PHASE_INFO, BANKROLL)
+
+    assert valid.shape == reasons.shape == (0,)